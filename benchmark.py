@@ -0,0 +1,381 @@
+# benchmark.py
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+# The frame stages draw offscreen; PyOpenGL reads its platform when first imported
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+
+from mod_synthetic import synthetic_dataset, write_dataset, ancestry_tree
+
+# Species counts run when none are given
+BENCHMARK_SIZES = (100, 1000, 10000, 100000)
+BENCHMARK_STAGES = ('load_data', 'load_columnar', 'process_data', 'tree_neighbor_joining', 'tree_upgma',
+                    'tree_igraph', 'layout_radial', 'layout_barnes_hut', 'scene', 'first_frame', 'frame')
+# Largest species count each quadratic or cubic stage is run at; the distance matrix alone
+# takes 8 bytes per species pair
+STAGE_LIMITS = {
+    'process_data': 10000,
+    'tree_neighbor_joining': 2000,
+    'tree_upgma': 10000,
+    'tree_igraph': 1000,
+}
+BASELINE_FILE = 'benchmark_baseline.json'
+# Allowed slowdown of a stage against the baseline, as a fraction of its baseline time
+DEFAULT_TOLERANCE = 0.25
+# Slowdowns smaller than this many seconds are timer noise, whatever the ratio
+MIN_REGRESSION_SECONDS = 0.05
+# Stages faster than this are repeated and the fastest run is kept
+REPEAT_BELOW_SECONDS = 0.2
+STAGE_REPEATS = 5
+FRAME_SIZE = (800, 600)
+# Fixed rather than read from config_settings.json so runs on one machine stay comparable
+BENCHMARK_SETTINGS = {
+    'visualization_params': {'node_size': 10, 'edge_width': 1},
+    'layout_params': {'method': 'barnes_hut', 'seed': 42, 'iterations': 50, 'theta': 1.0},
+    'render_params': {'max_fps': 60, 'lod_mode': 'clusters', 'lod_budget': 20000},
+}
+
+
+def reset_peak_rss():
+    # Linux resets the VmHWM high-water mark on request; elsewhere the peak covers the whole process
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    """
+    Returns:
+        float: Peak resident set size of this process since the last reset_peak_rss, in MiB.
+    """
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def measure(function, *args):
+    """
+    Times a stage and records the peak memory it reached.
+
+    Stages are rerun, up to STAGE_REPEATS runs in all, until they have taken
+    REPEAT_BELOW_SECONDS together, and the fastest run counts, so small sizes
+    are not all timer noise.
+
+    Returns:
+        tuple: (result of the first run, record dict with 'seconds', 'runs' and 'peak_rss_mb').
+    """
+    reset_peak_rss()
+    started = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - started
+    record = {'seconds': seconds, 'runs': 1, 'peak_rss_mb': peak_rss_mb()}
+    total = seconds
+    while total < REPEAT_BELOW_SECONDS and record['runs'] < STAGE_REPEATS:
+        started = time.perf_counter()
+        function(*args)
+        seconds = time.perf_counter() - started
+        record['seconds'] = min(record['seconds'], seconds)
+        record['runs'] += 1
+        total += seconds
+    return result, record
+
+
+class SizeRun:
+    """
+    Every benchmark stage for one synthetic dataset, run in order.
+
+    Later stages take the earlier stages' results. A stage whose input is
+    missing, or whose species count is over its STAGE_LIMITS entry, is
+    recorded as skipped rather than run.
+    """
+
+    def __init__(self, n_species, seed=0, stages=None):
+        self.n_species = n_species
+        self.seed = seed
+        self.stages = stages or BENCHMARK_STAGES
+        self.results = {}
+
+    def skip(self, stage, reason):
+        if stage in self.stages:
+            self.results[stage] = {'skipped': reason}
+
+    def run_stage(self, stage, function, *args):
+        # Returns the stage's result, or None when it was skipped or failed
+        if stage not in self.stages:
+            return None
+        limit = STAGE_LIMITS.get(stage)
+        if limit is not None and self.n_species > limit:
+            self.skip(stage, f"over the {limit} species limit")
+            return None
+        if any(arg is None for arg in args):
+            self.skip(stage, "input stage did not run")
+            return None
+        try:
+            result, self.results[stage] = measure(function, *args)
+        except Exception as e:
+            self.results[stage] = {'error': f"{type(e).__name__}: {e}", 'traceback': traceback.format_exc()}
+            return None
+        return result
+
+    def run(self):
+        """
+        Returns:
+            dict: 'species', 'rows', 'tree_source', 'tree_nodes', 'tree_bytes' (size of the tree's
+            arrays) and 'stages', stage -> record.
+        """
+        from mod_data_loader import load_data, load_columnar
+        from data_processor import process_data, generate_tree as igraph_tree
+        from mod_tree_generator import TREE_BUILDERS, finite_distances, tree_from_merges
+        from mod_layout import compute_layout
+        from mod_scene import scene_from_graph
+
+        dataset = synthetic_dataset(self.n_species, seed=self.seed)
+        directory = tempfile.mkdtemp(prefix='benchmark-')
+        try:
+            file_path = os.path.join(directory, f'synthetic_{self.n_species}.csv')
+            write_dataset(file_path, dataset)
+            raw_data = self.run_stage('load_data', load_data, file_path)
+            self.run_stage('load_columnar', load_columnar, file_path)
+        finally:
+            shutil.rmtree(directory)
+
+        processed_data = self.run_stage('process_data', process_data, raw_data)
+        distances = finite_distances(processed_data['distance_array']) if processed_data else None
+        species = list(processed_data['species']) if processed_data else None
+        trees = {}
+        for method in TREE_BUILDERS:
+            merges = self.run_stage('tree_' + method, TREE_BUILDERS[method], distances)
+            if merges is not None:
+                trees[method] = tree_from_merges(species, *merges)
+        self.run_stage('tree_igraph', igraph_tree, processed_data)
+
+        # Sizes too large to build a tree for are laid out on the tree the data was generated from
+        tree_source = next((method for method in TREE_BUILDERS if method in trees), 'ancestry')
+        tree = trees.get(tree_source) or ancestry_tree(dataset)
+        self.run_stage('layout_radial', compute_layout, tree, 'radial')
+        positions = self.run_stage('layout_barnes_hut',
+                                   partial(compute_layout, **BENCHMARK_SETTINGS['layout_params']), tree)
+        if positions is not None:
+            tree = tree.with_positions(positions)
+        scene = self.run_stage('scene', scene_from_graph, tree if positions is not None else None)
+        self.run_frames(scene)
+        return {'species': self.n_species, 'rows': len(dataset['markers']), 'tree_source': tree_source,
+                'tree_nodes': tree.n_nodes, 'tree_bytes': tree.nbytes, 'stages': self.results}
+
+    def run_frames(self, scene):
+        # One repaint with a fresh upload, then repaints of a rotating view over the uploaded buffers
+        if not {'first_frame', 'frame'} & set(self.stages):
+            return
+        if scene is None:
+            for stage in ('first_frame', 'frame'):
+                self.skip(stage, "input stage did not run")
+            return
+        try:
+            from mod_offscreen import OffscreenContext, frame_scene
+            from PyQt5.QtWidgets import QApplication
+            from OpenGL.GL import glFinish
+            from event_manager import EventManager
+            from mod_visualization import Visualization
+            app = QApplication.instance() or QApplication([])
+            context = OffscreenContext(*FRAME_SIZE)
+        except Exception as e:
+            for stage in ('first_frame', 'frame'):
+                self.skip(stage, f"no offscreen OpenGL: {e}")
+            return
+
+        width, height = FRAME_SIZE
+        try:
+            viz = Visualization(None, BENCHMARK_SETTINGS, EventManager())
+            viz.set_scene(scene)
+            viz.setFixedSize(width, height)
+            frame_scene(viz, scene)
+            viz.initializeGL()
+            viz.resizeGL(width, height)
+
+            def first_frame():
+                viz.invalidate_buffers()
+                viz.paintGL()
+                glFinish()
+
+            def frame():
+                viz.rotation[1] += 1.0
+                viz.paintGL()
+                glFinish()
+
+            self.run_stage('first_frame', first_frame)
+            self.run_stage('frame', frame)
+            viz.renderer.release()
+            viz.deleteLater()
+        finally:
+            context.close()
+            app.processEvents()
+
+
+def run_size(n_species, seed=0, stages=None):
+    return SizeRun(n_species, seed, stages).run()
+
+
+def run_benchmark(sizes=BENCHMARK_SIZES, seed=0, stages=None, isolate=True):
+    """
+    Runs the benchmark stages for every dataset size.
+
+    Parameters:
+        sizes (iterable of int): Species counts.
+        seed (int): Seed of the synthetic datasets.
+        stages (iterable of str, optional): Stages to run; defaults to BENCHMARK_STAGES.
+        isolate (bool): Run each size in a freshly spawned process, so peak memory and
+            allocator state do not carry over from the previous size.
+
+    Returns:
+        dict: Results with the machine description, seed and 'sizes', keyed by the species count as a string.
+    """
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': {'platform': platform.platform(), 'python': platform.python_version(),
+                    'processor': platform.processor(), 'cpus': os.cpu_count()},
+        'seed': seed,
+        'sizes': {},
+    }
+    stages = tuple(stages) if stages else None
+    for n_species in sizes:
+        if not isolate:
+            results['sizes'][str(n_species)] = run_size(n_species, seed, stages)
+            continue
+        try:
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                results['sizes'][str(n_species)] = pool.submit(run_size, n_species, seed, stages).result()
+        except Exception as e:
+            # A worker killed for running out of memory ends up here
+            results['sizes'][str(n_species)] = {'species': n_species, 'error': f"{type(e).__name__}: {e}",
+                                                'stages': {}}
+    return results
+
+
+def find_regressions(baseline, current, tolerance=DEFAULT_TOLERANCE, min_seconds=MIN_REGRESSION_SECONDS):
+    """
+    Compares stage times against a baseline.
+
+    A stage regresses when it takes more than (1 + tolerance) times its
+    baseline time and at least min_seconds longer, or when it ran in the
+    baseline but fails now or is missing from the current run, which includes
+    a whole size that failed or was not run. Stages skipped now are ignored.
+
+    Parameters:
+        baseline (dict): Results of run_benchmark, as saved.
+        current (dict): Results of run_benchmark.
+        tolerance (float): Allowed slowdown as a fraction of the baseline time.
+        min_seconds (float): Smallest absolute slowdown counted.
+
+    Returns:
+        list of dict: 'size', 'stage', 'baseline' and 'current' seconds ('current' is None for failures).
+    """
+    regressions = []
+    for size, base_run in baseline.get('sizes', {}).items():
+        current_stages = current.get('sizes', {}).get(size, {}).get('stages', {})
+        for stage, base_record in base_run.get('stages', {}).items():
+            record = current_stages.get(stage, {})
+            if 'seconds' not in base_record or 'skipped' in record:
+                continue
+            seconds = record.get('seconds')
+            if seconds is None or (seconds > base_record['seconds'] * (1 + tolerance)
+                                   and seconds - base_record['seconds'] >= min_seconds):
+                regressions.append({'size': size, 'stage': stage, 'baseline': base_record['seconds'],
+                                    'current': seconds})
+    return regressions
+
+
+def format_results(results, baseline=None):
+    # One line per size and stage, with the change against the baseline when there is one
+    lines = [f"{'species':>8}  {'stage':<22} {'seconds':>10} {'peak MiB':>9}  {'vs baseline':>11}"]
+    for size, size_run in results['sizes'].items():
+        if 'error' in size_run:
+            lines.append(f"{size:>8}  failed: {size_run['error']}")
+        base_stages = (baseline or {}).get('sizes', {}).get(size, {}).get('stages', {})
+        for stage, record in size_run.get('stages', {}).items():
+            if 'seconds' not in record:
+                lines.append(f"{size:>8}  {stage:<22} {record.get('skipped') or record.get('error')}")
+                continue
+            change = ''
+            base_seconds = base_stages.get(stage, {}).get('seconds')
+            if base_seconds:
+                change = f"{record['seconds'] / base_seconds - 1:+.0%}"
+            lines.append(f"{size:>8}  {stage:<22} {record['seconds']:>10.4f} {record['peak_rss_mb']:>9.1f}  {change:>11}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Times the data, tree, layout and rendering stages on synthetic datasets of growing size.")
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        help="Species counts (default: %s, or the sizes of the --check baseline)"
+                             % ' '.join(map(str, BENCHMARK_SIZES)))
+    parser.add_argument('--stages', nargs='+', choices=BENCHMARK_STAGES, help="Stages to run (default: all); a stage is skipped when the one producing its input is not run")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic datasets")
+    parser.add_argument('--output', help=f"Where to write the results (default: {BASELINE_FILE} "
+                                         "unless --check is given)")
+    parser.add_argument('--check', metavar='BASELINE',
+                        help="Compare against a baseline file and exit with status 1 on a regression")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown per stage as a fraction of the baseline time (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.check:
+        with open(args.check, encoding='utf-8') as f:
+            baseline = json.load(f)
+    sizes = args.sizes or ([int(size) for size in baseline['sizes']] if baseline else BENCHMARK_SIZES)
+    seed = baseline.get('seed', args.seed) if baseline and args.seed == 0 else args.seed
+
+    results = run_benchmark(sizes, seed, args.stages)
+    print(format_results(results, baseline))
+    output = args.output or (None if baseline else BASELINE_FILE)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+        print(f"Results written to {output}")
+    if baseline is None:
+        return 0
+
+    # Only what was asked for this time is compared; sizes and stages left out are not failures
+    checked = {'sizes': {}}
+    for size, base_run in baseline['sizes'].items():
+        if int(size) in sizes:
+            checked['sizes'][size] = dict(base_run, stages={
+                stage: record for stage, record in base_run.get('stages', {}).items()
+                if not args.stages or stage in args.stages})
+    regressions = find_regressions(checked, results, args.tolerance)
+    for regression in regressions:
+        if regression['current'] is None:
+            print(f"REGRESSION {regression['size']} species, {regression['stage']}: fails now "
+                  f"(baseline {regression['baseline']:.4f}s)")
+        else:
+            print(f"REGRESSION {regression['size']} species, {regression['stage']}: "
+                  f"{regression['current']:.4f}s vs {regression['baseline']:.4f}s baseline")
+    if not regressions:
+        print(f"No stage slower than the baseline by more than {args.tolerance:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
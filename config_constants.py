@@ -10,7 +10,35 @@ EDGE_WIDTH = 1
 # File Paths
 DEFAULT_DATA_FILE = "data_sample_dataset.csv"
 LOG_FILE = "app.log"
+CACHE_DIR = ".evolution_cache"
+SCENE_EXTENSION = ".e3ds"
+
+# Cache Constants
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+# Data Processing Constants
+STREAMING_THRESHOLD_BYTES = 256 * 1024 ** 2
+STREAMING_CHUNK_ROWS = 100000
+
+# Camera Constants
+FIELD_OF_VIEW = 45
+NEAR_PLANE = 0.1
+FAR_PLANE = 1000.0
+
+# Level of Detail Constants
+LOD_BUDGET = 20000  # Nodes plus cluster glyphs drawn per frame in cluster mode
+COUNT_LABEL_LIMIT = 64  # Cluster glyphs labelled with their node count
 
 # UI Constants
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
+TIME_SLIDER_STEPS = 1000  # Time slider positions across the data's time range
+
+# Event Dispatch Policies: event type -> (mode, interval in ms); see event_manager
+EVENT_POLICIES = {
+    'update_lod': ('coalesce', 0),  # Slider ticks: the last value of each event loop turn
+    'node_size': ('coalesce', 0),
+    'update_time': ('coalesce', 0),
+    'edge_filter': ('debounce', 150),  # Rebuilds the displayed edges
+    'search_query': ('throttle', 100),  # Completions while typing
+}
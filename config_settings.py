@@ -1,7 +1,43 @@
 # config_settings.py
 
+import copy
 import json
 
+DEFAULT_SETTINGS = {
+    "data_file": "data_sample_dataset.csv",
+    "visualization_params": {
+        "background_color": "#FFFFFF",
+        "node_color": "#FF5733",
+        "edge_color": "#C70039",
+        "node_size": 10,
+        "edge_width": 1
+    },
+    "distance_params": {
+        "parallel": False,
+        "workers": 0,
+        "tile_size": 512
+    },
+    "tree_params": {
+        "method": "neighbor_joining"
+    },
+    "layout_params": {
+        "method": "barnes_hut",
+        "seed": 42,
+        "iterations": 50,
+        "theta": 1.0
+    },
+    "cache_params": {
+        "enabled": True,
+        "directory": ".evolution_cache",
+        "max_bytes": 2147483648
+    },
+    "render_params": {
+        "max_fps": 60,
+        "lod_mode": "clusters",
+        "lod_budget": 20000
+    }
+}
+
 def load_settings():
     """
     Loads configuration settings from a JSON file.
@@ -9,17 +45,7 @@ def load_settings():
     Returns:
         dict: Configuration settings.
     """
-    default_settings = {
-        "data_file": "data_sample_dataset.csv",
-        "visualization_params": {
-            "background_color": "#FFFFFF",
-            "node_color": "#FF5733",
-            "edge_color": "#C70039",
-            "node_size": 10,
-            "edge_width": 1
-        }
-    }
-    
+    default_settings = copy.deepcopy(DEFAULT_SETTINGS)
     try:
         with open('config_settings.json', 'r', encoding='utf-8') as f:
             settings = json.load(f)
@@ -1,15 +1,28 @@
 # data_processor.py
 
+import csv
+import logging
+import os
+from functools import partial
+
+import numpy as np
 import pandas as pd
-from util_math import calculate_genetic_distance
-import igraph as ig
+from config_constants import STREAMING_THRESHOLD_BYTES, STREAMING_CHUNK_ROWS
+from mod_data_loader import (load_data, load_columnar, factorize, row_times, species_lifetimes,
+                             LifetimeAccumulator, SPECIES_COLUMN, MARKER_COLUMN, TIME_COLUMN, END_TIME_COLUMN,
+                             COLUMNS)
+from mod_distance_engine import (encode_markers, encode_marker_matrix, compute_distance_matrix,
+                                 DistanceMatrixView, MarkerAccumulator, merge_encodings, extend_distance_matrix)
+from mod_tracing import span
+from mod_tree_generator import complete_graph, distance_array
 
-def process_data(raw_data):
+def process_data(raw_data, distance_params=None):
     """
     Processes raw genetic and taxonomic data.
 
     Parameters:
         raw_data (list of dict): Raw data entries.
+        distance_params (dict, optional): Distance computation settings (serial or parallel tiles).
 
     Returns:
         dict: Processed data with computed genetic distances.
@@ -17,59 +30,240 @@ def process_data(raw_data):
     # Convert raw data to DataFrame for easier manipulation
     df = pd.DataFrame(raw_data)
     
-    # Example: Calculate genetic distance matrix
+    # Encode markers once per species, then compute all pairwise distances in batches
     # Assuming raw_data has 'species' and 'genetic_marker' columns
     species = df['species'].unique()
-    distance_matrix = {}
-    
-    for sp1 in species:
-        distance_matrix[sp1] = {}
-        markers1 = df[df['species'] == sp1]['genetic_marker'].tolist()
-        for sp2 in species:
-            markers2 = df[df['species'] == sp2]['genetic_marker'].tolist()
-            distance = calculate_genetic_distance(markers1, markers2)
-            distance_matrix[sp1][sp2] = distance
+    encoding = encode_markers(df['species'].to_numpy(), df['genetic_marker'].to_numpy(), species=species)
+    distances = compute_distance_matrix(encoding, distance_params)
     
     processed_data = {
         'species': species,
-        'distance_matrix': distance_matrix,
+        'distance_matrix': DistanceMatrixView(species, distances),
+        'distance_array': distances,
+        'encoding': encoding,
         'raw_dataframe': df
     }
     
     return processed_data
 
+def extend_processed_data(processed_data, raw_data, distance_params=None, progress=None):
+    """
+    Adds species to processed data, computing only their distances.
+
+    The new markers are merged into the stored encoding and only the new rows
+    and columns of the distance matrix are computed, instead of all pairs again.
+
+    Parameters:
+        processed_data (dict): Processed data with its 'encoding', as from process_data,
+            load_processed_data or an earlier call.
+        raw_data (list of dict): Rows of the new species, as from load_data; optional
+            'time' and 'end_time' columns give their lifetimes.
+        distance_params (dict, optional): Distance settings; 'tile_size' rows are computed at once.
+        progress (callable, optional): Called with the fraction of the new rows done.
+
+    Returns:
+        dict: New processed data over the old species followed by the new ones.
+    """
+    if processed_data.get('encoding') is None:
+        raise ValueError("Processed data has no marker encoding to extend")
+    df = pd.DataFrame(raw_data)
+    species_codes, new_species = factorize(df[SPECIES_COLUMN].to_numpy())
+    known = set(processed_data['species']) & set(new_species)
+    if known:
+        raise ValueError(f"Species already in the data: {', '.join(sorted(map(str, known))[:5])}")
+
+    added = encode_markers(df[SPECIES_COLUMN].to_numpy(), df[MARKER_COLUMN].to_numpy(), species=new_species)
+    encoding = merge_encodings(processed_data['encoding'], added)
+    distances = extend_distance_matrix(np.asarray(processed_data['distance_array'], dtype=np.float64), encoding,
+                                       (distance_params or {}).get('tile_size', 1024), progress)
+
+    old_times = processed_data.get('species_times')
+    times = row_times(*(df[column].to_numpy() if column in df else None for column in (TIME_COLUMN, END_TIME_COLUMN)))
+    species_times = None
+    if old_times is not None or times is not None:
+        # Species without any time stay unbounded
+        n_old = len(processed_data['species'])
+        species_times = np.tile([-np.inf, np.inf], (encoding.n_species, 1))
+        if old_times is not None:
+            species_times[:n_old] = old_times
+        if times is not None:
+            species_times[n_old:] = species_lifetimes(species_codes, len(new_species), times)
+
+    raw_dataframe = processed_data.get('raw_dataframe')
+    return {
+        'species': encoding.species,
+        'distance_matrix': DistanceMatrixView(encoding.species, distances),
+        'distance_array': distances,
+        'encoding': encoding,
+        'species_times': species_times,
+        'raw_dataframe': pd.concat([raw_dataframe, df], ignore_index=True) if raw_dataframe is not None else None
+    }
+
+def process_columnar(columnar, distance_params=None, progress=None):
+    """
+    Processes typed columns from mod_data_loader.load_columnar.
+
+    Parameters:
+        columnar (ColumnarData): Species codes and marker byte matrix.
+        distance_params (dict, optional): Distance computation settings.
+        progress (callable, optional): Called with the fraction of the distance matrix done.
+
+    Returns:
+        dict: Processed data as from process_data, with 'raw_dataframe' set to None
+        and 'species_times' holding the species lifetimes when the file has time columns.
+    """
+    if columnar.marker_text is not None:
+        # Markers outside ASCII go through the code-point encoder, as in process_data
+        encoding = encode_markers(columnar.species[columnar.species_codes], columnar.marker_text,
+                                  species=columnar.species)
+    else:
+        encoding = encode_marker_matrix(columnar.species, columnar.species_codes, columnar.markers,
+                                        columnar.lengths)
+    distances = compute_distance_matrix(encoding, distance_params, progress)
+    logging.info(f"Loaded {len(columnar)} markers in {columnar.timings}")
+    return {
+        'species': encoding.species,
+        'distance_matrix': DistanceMatrixView(encoding.species, distances),
+        'distance_array': distances,
+        'encoding': encoding,
+        'species_times': columnar.species_times(),
+        'raw_dataframe': None
+    }
+
+def compute_processed_data(file_path, distance_params=None, progress=None):
+    """
+    Loads and processes a data file, streaming large CSV files in chunks.
+
+    Parameters:
+        file_path (str): Path to the CSV or JSON data file.
+        distance_params (dict, optional): Distance computation settings.
+        progress (callable, optional): Called as progress(stage, fraction) for the 'load'
+            and 'distances' stages.
+
+    Returns:
+        dict: Processed data.
+    """
+    report = progress or (lambda stage, fraction: None)
+    report('load', 0.0)
+    if file_path.endswith('.csv') and os.path.getsize(file_path) >= STREAMING_THRESHOLD_BYTES:
+        return process_data_in_chunks(file_path, STREAMING_CHUNK_ROWS, distance_params, progress)
+    columnar = load_columnar(file_path)
+    report('load', 1.0)
+    return process_columnar(columnar, distance_params, partial(report, 'distances'))
+
+def load_processed_data(file_path, distance_params=None, data_cache=None, progress=None):
+    """
+    Loads and processes a data file, reusing cached results for unchanged files.
+
+    Parameters:
+        file_path (str): Path to the CSV or JSON data file.
+        distance_params (dict, optional): Distance computation settings.
+        data_cache (ProcessedDataCache, optional): Cache of processed data.
+        progress (callable, optional): Called as progress(stage, fraction) while the file is
+            loaded and the distances computed; an exception it raises aborts the load.
+
+    Returns:
+        dict: Processed data; 'raw_dataframe' is None when served from the cache.
+    """
+    if data_cache is None:
+        return compute_processed_data(file_path, distance_params, progress)
+
+    key = data_cache.key(file_path, distance_params)
+    processed_data = data_cache.load_processed(key, os.path.getsize(file_path))
+    if processed_data is None:
+        processed_data = compute_processed_data(file_path, distance_params, progress)
+        if len(processed_data['species']):
+            data_cache.store_processed(key, processed_data)
+        processed_data['fingerprint'] = key
+    return processed_data
+
 def generate_tree(processed_data):
-    species = processed_data['species']
-    edges = []
-    weights = []
-    for sp1 in species:
-        for sp2 in species:
-            if sp1 != sp2:
-                distance = processed_data['distance_matrix'][sp1][sp2]
-                edges.append((sp1, sp2))
-                weights.append(distance)
-    g = ig.Graph.TupleList(edges, directed=False)
-    g.es['weight'] = weights
-    return g
-
-def process_data_in_chunks(file_path, chunk_size=1000):
-    # Assuming data is in CSV format
-    chunks = pd.read_csv(file_path, chunksize=chunk_size)
-    for chunk in chunks:
-        # Process each chunk
-        process_chunk(chunk)
-
-def process_chunk(chunk):
-    # Implement the logic to process each chunk
-    # This could involve calculating distances, updating a global data structure, etc.
-    pass
+    # Legacy igraph export of the complete species graph, one weighted edge per species pair
+    species = list(processed_data['species'])
+    return complete_graph(species, distance_array(processed_data)).to_igraph()
+
+def process_data_in_chunks(file_path, chunk_size=100000, distance_params=None, progress=None):
+    """
+    Processes a CSV data file in bounded chunks without materialising all rows.
+
+    Parameters:
+        file_path (str): Path to the CSV data file.
+        chunk_size (int): Rows read per chunk.
+        distance_params (dict, optional): Distance computation settings.
+        progress (callable, optional): Called as progress(stage, fraction); the 'load' stage
+            reports the fraction of the file read after each chunk.
+
+    Returns:
+        dict: Processed data as from process_data, with 'raw_dataframe' set to None.
+    """
+    accumulator = MarkerAccumulator()
+    lifetimes = LifetimeAccumulator()
+    report = progress or (lambda stage, fraction: None)
+    file_size = max(os.path.getsize(file_path), 1)
+    with open(file_path, 'rb') as handle, span('load', streaming=True):
+        chunks = pd.read_csv(handle, chunksize=chunk_size, usecols=lambda column: column in COLUMNS,
+                             dtype=str, keep_default_na=False)
+        for chunk in chunks:
+            # Process each chunk
+            process_chunk(chunk, accumulator, lifetimes)
+            report('load', min(handle.tell() / file_size, 1.0))
+
+    encoding = accumulator.finalize()
+    distances = compute_distance_matrix(encoding, distance_params, partial(report, 'distances'))
+    return {
+        'species': encoding.species,
+        'distance_matrix': DistanceMatrixView(encoding.species, distances),
+        'distance_array': distances,
+        'encoding': encoding,
+        'species_times': lifetimes.finalize(encoding.n_species),
+        'raw_dataframe': None
+    }
+
+def process_chunk(chunk, accumulator, lifetimes=None):
+    """
+    Appends one chunk of rows to the per-species packed marker buffers.
+
+    Parameters:
+        chunk (pandas.DataFrame): Rows with 'species' and 'genetic_marker' columns, and
+            optionally 'time' and 'end_time'.
+        accumulator (MarkerAccumulator): Buffers being filled.
+        lifetimes (LifetimeAccumulator, optional): Species lifetimes being gathered.
+    """
+    species_codes = accumulator.add(chunk[SPECIES_COLUMN].to_numpy(), chunk[MARKER_COLUMN].to_numpy())
+    if lifetimes is not None:
+        lifetimes.add(species_codes, row_times(*(chunk[column].to_numpy() if column in chunk else None
+                                                 for column in (TIME_COLUMN, END_TIME_COLUMN))))
 
 def load_data_generator(file_path):
-    with open(file_path, 'r') as f:
+    """
+    Yields the rows of a CSV data file one at a time.
+
+    Parameters:
+        file_path (str): Path to the CSV data file.
+
+    Yields:
+        dict: Row keyed by the header fields.
+    """
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        fieldnames = next(csv.reader(f), None)
+        if fieldnames is None:
+            return
         for line in f:
-            yield process_line(line)
+            row = process_line(line, fieldnames)
+            if row is not None:
+                yield row
+
+def process_line(line, fieldnames):
+    """
+    Parses a single CSV line.
 
-def process_line(line):
-    # Implement the logic to process a single line of data
-    # This could involve parsing the line, extracting relevant information, etc.
-    pass
\ No newline at end of file
+    Parameters:
+        line (str): Line of the data file (fields may be quoted, but not span lines).
+        fieldnames (list of str): Header fields.
+
+    Returns:
+        dict or None: Row keyed by the header fields, or None for a blank line.
+    """
+    if not line.strip():
+        return None
+    return dict(zip(fieldnames, next(csv.reader([line]))))
@@ -1,14 +1,191 @@
 # In event_manager.py
-class EventManager:
+import logging
+import threading
+import time
+
+from PyQt5 import QtCore
+
+from mod_tracing import span
+
+# Dispatch policies: IMMEDIATE calls the listeners inside emit(); the others defer the call to
+# the Qt event loop and pass only the latest value emitted meanwhile
+IMMEDIATE = 'immediate'
+COALESCE = 'coalesce'  # Once, interval_ms after the first pending emit (0: the next event loop turn)
+DEBOUNCE = 'debounce'  # Once emits have stopped for interval_ms
+THROTTLE = 'throttle'  # At most once per interval_ms, the first emit at once and the last one at the end
+EVENT_POLICY_MODES = (IMMEDIATE, COALESCE, DEBOUNCE, THROTTLE)
+
+
+class EventStats:
+    """
+    Emit and dispatch counts of one event type, with listener time and latency.
+
+    Latency runs from the earliest emit a dispatch covers to the start of the
+    dispatch, so it includes the time values wait under a deferring policy.
+    """
+
     def __init__(self):
+        self.emitted = 0
+        self.dispatched = 0
+        self.errors = 0
+        self.listener_ns = 0
+        self.max_listener_ns = 0
+        self.latency_ns = 0
+        self.max_latency_ns = 0
+
+    def add_dispatch(self, latency, duration):
+        self.dispatched += 1
+        self.latency_ns += latency
+        self.max_latency_ns = max(self.max_latency_ns, latency)
+        self.listener_ns += duration
+        self.max_listener_ns = max(self.max_listener_ns, duration)
+
+    def summary(self):
+        """
+        Returns:
+            dict: 'emitted', 'dispatched', 'coalesced' (values replaced before dispatch),
+            'errors', and mean and maximum listener time and latency in milliseconds.
+        """
+        dispatched = max(self.dispatched, 1)
+        return {
+            'emitted': self.emitted,
+            'dispatched': self.dispatched,
+            'coalesced': max(self.emitted - self.dispatched, 0),
+            'errors': self.errors,
+            'mean_listener_ms': self.listener_ns / dispatched / 1e6,
+            'max_listener_ms': self.max_listener_ns / 1e6,
+            'mean_latency_ms': self.latency_ns / dispatched / 1e6,
+            'max_latency_ms': self.max_latency_ns / 1e6,
+        }
+
+
+class EventManager(QtCore.QObject):
+    """
+    Publish/subscribe event bus with per-event dispatch policies.
+
+    Listeners always run on the thread the manager lives on, normally the GUI
+    thread: emit() from any other thread is queued onto that thread's event
+    loop. Without a policy, emit() on that thread calls the listeners before
+    returning. Deferred policies need a running Qt event loop. A listener that
+    raises is logged and does not stop the others.
+    """
+
+    # Carries emits from other threads: event type, data and emit time
+    queued_emit = QtCore.pyqtSignal(object, object, object)
+
+    def __init__(self, policies=None):
+        """
+        Parameters:
+            policies (dict, optional): Event type -> (mode, interval_ms), see set_policy.
+        """
+        super().__init__()
         self.listeners = {}
+        self.policies = {}
+        self.pending = {}  # Event type -> (latest data, time of the earliest pending emit)
+        self.timers = {}
+        self.last_dispatch = {}  # Event type -> perf_counter_ns of its last dispatch, for throttling
+        self.stats = {}
+        self.lock = threading.Lock()
+        self.queued_emit.connect(self.emit_on_owner, QtCore.Qt.QueuedConnection)
+        for event_type, (mode, interval_ms) in (policies or {}).items():
+            self.set_policy(event_type, mode, interval_ms)
+
+    def set_policy(self, event_type, mode, interval_ms=0):
+        """
+        Parameters:
+            event_type (str): Event name.
+            mode (str): One of EVENT_POLICY_MODES.
+            interval_ms (int): Coalescing delay, quiet time or minimum spacing, by mode.
+        """
+        if mode not in EVENT_POLICY_MODES:
+            raise ValueError(f"Unknown event policy: {mode}")
+        self.flush(event_type)
+        if mode == IMMEDIATE:
+            self.policies.pop(event_type, None)
+        else:
+            self.policies[event_type] = (mode, int(interval_ms))
 
     def subscribe(self, event_type, listener):
-        if event_type not in self.listeners:
-            self.listeners[event_type] = []
-        self.listeners[event_type].append(listener)
+        with self.lock:
+            self.listeners[event_type] = self.listeners.get(event_type, []) + [listener]
+
+    def unsubscribe(self, event_type, listener):
+        with self.lock:
+            listeners = [existing for existing in self.listeners.get(event_type, []) if existing != listener]
+            self.listeners[event_type] = listeners
 
     def emit(self, event_type, data):
-        if event_type in self.listeners:
-            for listener in self.listeners[event_type]:
-                listener(data)
+        emitted = time.perf_counter_ns()
+        if QtCore.QThread.currentThread() is not self.thread():
+            self.queued_emit.emit(event_type, data, emitted)
+        else:
+            self.emit_on_owner(event_type, data, emitted)
+
+    def emit_on_owner(self, event_type, data, emitted):
+        self.event_stats(event_type).emitted += 1
+        policy = self.policies.get(event_type)
+        if policy is None:
+            self.dispatch(event_type, data, emitted)
+            return
+        mode, interval_ms = policy
+        first = self.pending.get(event_type, (None, emitted))[1]
+        self.pending[event_type] = (data, first)
+        timer = self.timer(event_type)
+        if mode == DEBOUNCE:
+            timer.start(interval_ms)
+        elif mode == COALESCE:
+            if not timer.isActive():
+                timer.start(interval_ms)
+        elif not timer.isActive():
+            # Throttle: a quiet event goes out at once, later ones wait out the interval
+            wait_ms = interval_ms - (emitted - self.last_dispatch.get(event_type, 0)) / 1e6
+            if wait_ms <= 0:
+                self.flush(event_type)
+            else:
+                timer.start(int(wait_ms) + 1)
+
+    def timer(self, event_type):
+        timer = self.timers.get(event_type)
+        if timer is None:
+            timer = self.timers[event_type] = QtCore.QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda: self.flush(event_type))
+        return timer
+
+    def flush(self, event_type=None):
+        """
+        Dispatches pending values now, for one event type or all of them.
+        """
+        for pending_type in ([event_type] if event_type is not None else list(self.pending)):
+            if pending_type in self.timers:
+                self.timers[pending_type].stop()
+            if pending_type in self.pending:
+                data, emitted = self.pending.pop(pending_type)
+                self.dispatch(pending_type, data, emitted)
+
+    def dispatch(self, event_type, data, emitted):
+        # Calls every listener with data; one listener raising does not stop the others
+        stats = self.event_stats(event_type)
+        started = time.perf_counter_ns()
+        self.last_dispatch[event_type] = started
+        with span(event_type, 'event'):
+            for listener in self.listeners.get(event_type, ()):
+                try:
+                    listener(data)
+                except Exception:
+                    stats.errors += 1
+                    logging.exception(f"Listener of {event_type} failed")
+        stats.add_dispatch(started - emitted, time.perf_counter_ns() - started)
+
+    def event_stats(self, event_type):
+        stats = self.stats.get(event_type)
+        if stats is None:
+            stats = self.stats[event_type] = EventStats()
+        return stats
+
+    def stats_summary(self):
+        """
+        Returns:
+            dict: Event type -> EventStats.summary().
+        """
+        return {event_type: stats.summary() for event_type, stats in self.stats.items()}
@@ -1,25 +1,43 @@
+import os
+import sys
+
+if "--headless" in sys.argv:
+    # Must precede the Qt and PyOpenGL imports: no display, and OpenGL through EGL for screenshots
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+
+import argparse
 import logging
 import traceback
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 import config_settings
-from mod_data_loader import load_data
-from data_processor import process_data
-from mod_tree_generator import generate_tree
+from data_processor import load_processed_data
+from mod_tree_generator import generate_tree, distance_array
+from mod_edge_index import EdgeIndex
+from mod_cache import layout_cache_from_settings, data_cache_from_settings
+from mod_scene import load_scene, save_scene
 from mod_visualization import Visualization
 from mod_ui import UserInterface
 from mod_interaction import Interaction
 from event_manager import EventManager
-import sys
+from mod_batch import run_batch
+from config_constants import EVENT_POLICIES
 from profiling import run_profiler, print_profiler_stats
+from mod_tracing import TRACER, TRACE_FILE
+
+# Values of --profile: stage spans and counters only, plus cProfile, or plus tracemalloc
+PROFILE_MODES = ('trace', 'cpu', 'memory')
 
 def setup_logging() -> None:
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 def load_and_process_data(settings: Dict[str, Any]) -> Any:
     try:
-        raw_data = load_data(settings['data_file'])
-        processed_data = process_data(raw_data)
+        data_cache = data_cache_from_settings(settings)
+        processed_data = load_processed_data(settings['data_file'], settings.get('distance_params'), data_cache)
+        if data_cache is not None:
+            logging.info(f"Processed data cache: {data_cache.stats()}")
         return processed_data
     except FileNotFoundError as e:
         logging.error(f"File not found: {e}")
@@ -29,11 +47,67 @@ def load_and_process_data(settings: Dict[str, Any]) -> Any:
         logging.error(f"Unexpected error: {e}\n{traceback.format_exc()}")
         raise
 
-def initialize_components(settings: Dict[str, Any], processed_data: Any) -> (Visualization, UserInterface, Interaction):
+def clear_caches(settings: Dict[str, Any]) -> None:
+    for cache in (layout_cache_from_settings(settings), data_cache_from_settings(settings)):
+        if cache is not None:
+            cache.invalidate()
+    logging.info("Caches cleared")
+
+def get_cli_option(flag: str) -> Optional[str]:
+    if flag in sys.argv[:-1]:
+        return sys.argv[sys.argv.index(flag) + 1]
+    return None
+
+def parse_size(value: str) -> tuple:
+    width, _, height = value.lower().partition('x')
+    return int(width), int(height)
+
+def run_headless(argv: List[str]) -> int:
+    # Batch mode without any window: load -> distances -> tree -> layout per file, scenes,
+    # optional offscreen screenshots and a JSON timing report per dataset
+    parser = argparse.ArgumentParser(prog='main_app.py --headless',
+                                     description='Precompute scenes for many data files without a GUI.')
+    parser.add_argument('files', nargs='+', help='CSV or JSON data files')
+    parser.add_argument('--output-dir', default='batch_output', help='directory for scenes, images and reports')
+    parser.add_argument('--workers', type=int, default=0, help='worker processes; 0 uses every CPU')
+    parser.add_argument('--screenshot', nargs='?', const='1280x960', type=parse_size, metavar='WIDTHxHEIGHT',
+                        help='also render an offscreen screenshot (default size 1280x960)')
+    args = parser.parse_args([arg for arg in argv if arg != '--headless'])
+
+    reports = run_batch(args.files, args.output_dir, config_settings.load_settings(), args.workers, args.screenshot)
+    failed = [report['name'] for report in reports if report['status'] != 'ok']
+    logging.info(f"Processed {len(reports) - len(failed)} of {len(reports)} datasets into {args.output_dir}")
+    if failed:
+        logging.error(f"Failed: {', '.join(failed)}")
+    return 1 if failed else 0
+
+def run_profiled(mode: str) -> None:
+    # Tracing is only switched on here, so normal runs skip every span; the heavy
+    # profilers (cProfile, tracemalloc) run only in their own modes
+    TRACER.enable(memory=(mode == 'memory'))
     try:
-        tree = generate_tree(processed_data)
-        event_manager = EventManager()
-        viz = Visualization(tree, settings, event_manager)
+        if mode == 'cpu':
+            run_profiler()
+        else:
+            main()
+    finally:
+        TRACER.save_chrome_trace(TRACE_FILE)
+        print(TRACER.format_summary())
+        print(f"Chrome trace written to {TRACE_FILE}")
+        if mode == 'cpu':
+            print_profiler_stats()
+
+def initialize_components(settings: Dict[str, Any], processed_data: Any, scene: Any = None) -> (Visualization, UserInterface, Interaction):
+    try:
+        event_manager = EventManager(EVENT_POLICIES)
+        if scene is not None:
+            viz = Visualization(None, settings, event_manager)
+            viz.set_scene(scene)
+        else:
+            tree = generate_tree(processed_data, settings.get('tree_params', {}).get('method'),
+                                 settings.get('layout_params'), layout_cache_from_settings(settings))
+            viz = Visualization(tree, settings, event_manager)
+            viz.set_edge_source(processed_data['species'], EdgeIndex.from_distances(distance_array(processed_data)))
         ui = UserInterface(settings, viz, event_manager)
         interaction = Interaction(viz, ui)
         return viz, ui, interaction
@@ -47,8 +121,17 @@ def main() -> None:
 
     try:
         settings = config_settings.load_settings()
-        processed_data = load_and_process_data(settings)
-        viz, ui, interaction = initialize_components(settings, processed_data)
+        scene_file = get_cli_option('--open-scene')
+        if scene_file:
+            viz, ui, interaction = initialize_components(settings, None, load_scene(scene_file))
+        else:
+            processed_data = load_and_process_data(settings)
+            viz, ui, interaction = initialize_components(settings, processed_data)
+
+        save_file = get_cli_option('--save-scene')
+        if save_file:
+            save_scene(save_file, viz.scene)
+            logging.info(f"Scene saved to {save_file}")
 
         ui.show()
         viz.run()
@@ -56,8 +139,14 @@ def main() -> None:
         logging.critical(f"Unhandled exception: {e}")
 
 if __name__ == "__main__":
-    if "--profile" in sys.argv:
-        run_profiler()
-        print_profiler_stats()
+    if "--headless" in sys.argv:
+        setup_logging()
+        sys.exit(run_headless(sys.argv[1:]))
+    elif "--clear-cache" in sys.argv:
+        setup_logging()
+        clear_caches(config_settings.load_settings())
+    elif "--profile" in sys.argv:
+        mode = get_cli_option('--profile')
+        run_profiled(mode if mode in PROFILE_MODES else 'trace')
     else:
         main()
\ No newline at end of file
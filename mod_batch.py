@@ -0,0 +1,171 @@
+# mod_batch.py
+
+import json
+import logging
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from data_processor import load_processed_data
+from mod_cache import layout_cache_from_settings, data_cache_from_settings
+from mod_scene import scene_from_graph, save_scene
+from mod_tree_generator import generate_tree
+from config_constants import SCENE_EXTENSION
+
+# Suffix of the per-dataset timing report
+REPORT_SUFFIX = '.timing.json'
+
+
+class StageTimer:
+    """
+    Wall-clock time per pipeline stage.
+
+    Passed as the progress callback of load_processed_data and generate_tree:
+    a stage starts with its first report and ends when the next one starts.
+    Stages served from a cache report nothing and are missing.
+    """
+
+    def __init__(self):
+        self.starts = []  # (stage, start time) in the order the stages ran
+        self.finished = None
+
+    def __call__(self, stage, fraction=0.0):
+        if not self.starts or self.starts[-1][0] != stage:
+            self.starts.append((stage, time.perf_counter()))
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def durations(self):
+        """
+        Returns:
+            dict: Stage -> seconds, in the order the stages ran.
+        """
+        ends = [start for _, start in self.starts[1:]] + [self.finished or time.perf_counter()]
+        return {stage: end - start for (stage, start), end in zip(self.starts, ends)}
+
+
+def output_names(file_paths):
+    """
+    Artifact base names: the file name without its extension, numbered when two inputs share one.
+
+    Returns:
+        list of str: One name per input file.
+    """
+    names = []
+    used = {}
+    for file_path in file_paths:
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        used[stem] = used.get(stem, 0) + 1
+        names.append(stem if used[stem] == 1 else f"{stem}-{used[stem]}")
+    return names
+
+
+def process_dataset(file_path, output_dir, settings, name=None, screenshot_size=None):
+    """
+    Runs load -> distances -> tree -> layout for one data file and exports the results.
+
+    Writes <name>.e3ds (the scene, with the layout) and, with screenshot_size,
+    <name>.png rendered offscreen. The timing report is returned and written
+    to <name>.timing.json even when a stage fails.
+
+    Parameters:
+        file_path (str): CSV or JSON data file.
+        output_dir (str): Directory for the artifacts.
+        settings (dict): Application settings; the caches they enable are used.
+        name (str, optional): Artifact base name. Defaults to the file name without extension.
+        screenshot_size (tuple, optional): (width, height) of the screenshot; None skips it.
+
+    Returns:
+        dict: Timing report: 'dataset', 'status' ('ok' or 'error'), 'timings' in seconds per
+        stage plus 'total', 'artifacts', sizes and, on failure, 'error' and 'traceback'.
+    """
+    name = name or os.path.splitext(os.path.basename(file_path))[0]
+    report = {'dataset': os.path.abspath(file_path), 'name': name, 'worker_pid': os.getpid(), 'artifacts': {}}
+    timer = StageTimer()
+    started = time.perf_counter()
+    try:
+        report['file_bytes'] = os.path.getsize(file_path)
+        timer('load')
+        processed_data = load_processed_data(file_path, settings.get('distance_params'),
+                                             data_cache_from_settings(settings), timer)
+        timer('tree')
+        tree = generate_tree(processed_data, settings.get('tree_params', {}).get('method'),
+                             settings.get('layout_params'), layout_cache_from_settings(settings), timer)
+        report['species'] = len(processed_data['species'])
+
+        timer('scene')
+        scene = scene_from_graph(tree)
+        report['nodes'], report['edges'] = scene.n_nodes, scene.n_edges
+        scene_path = os.path.join(output_dir, name + SCENE_EXTENSION)
+        save_scene(scene_path, scene)
+        report['artifacts']['scene'] = scene_path
+
+        if screenshot_size:
+            timer('screenshot')
+            from mod_offscreen import render_scene
+            image_path = os.path.join(output_dir, name + '.png')
+            render_scene(scene, settings, image_path, screenshot_size)
+            report['artifacts']['screenshot'] = image_path
+        report['status'] = 'ok'
+    except Exception as e:
+        report['status'] = 'error'
+        report['error'] = f"{type(e).__name__}: {e}"
+        report['traceback'] = traceback.format_exc()
+    timer.stop()
+    report['timings'] = timer.durations()
+    report['timings']['total'] = time.perf_counter() - started
+
+    report_path = os.path.join(output_dir, name + REPORT_SUFFIX)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4)
+    report['artifacts']['report'] = report_path
+    return report
+
+
+def run_batch(file_paths, output_dir, settings, workers=0, screenshot_size=None):
+    """
+    Processes many data files on a process pool, one dataset per task.
+
+    Workers are spawned rather than forked so each starts without the parent's
+    Qt or OpenGL state and binds PyOpenGL to EGL for offscreen screenshots.
+
+    Parameters:
+        file_paths (list of str): Data files.
+        output_dir (str): Directory for the artifacts and reports; created if missing.
+        settings (dict): Application settings.
+        workers (int): Worker processes; 0 uses every CPU, 1 runs in this process.
+        screenshot_size (tuple, optional): (width, height) of the screenshots; None skips them.
+
+    Returns:
+        list of dict: Timing reports in the order of file_paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    names = output_names(file_paths)
+    workers = min(workers or os.cpu_count() or 1, max(len(file_paths), 1))
+    reports = [None] * len(file_paths)
+    if workers == 1:
+        for i, (file_path, name) in enumerate(zip(file_paths, names)):
+            reports[i] = process_dataset(file_path, output_dir, settings, name, screenshot_size)
+            log_report(reports[i])
+        return reports
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {pool.submit(process_dataset, file_path, output_dir, settings, name, screenshot_size): i
+                   for i, (file_path, name) in enumerate(zip(file_paths, names))}
+        for future in as_completed(futures):
+            reports[futures[future]] = future.result()
+            log_report(reports[futures[future]])
+    return reports
+
+
+def log_report(report):
+    timings = ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in report['timings'].items())
+    if report['status'] == 'ok':
+        logging.info(f"{report['name']}: {report.get('species', 0)} species; {timings}")
+    else:
+        logging.error(f"{report['name']} failed: {report['error']} ({timings})")
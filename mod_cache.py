@@ -0,0 +1,460 @@
+# mod_cache.py
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from config_constants import CACHE_DIR, CACHE_MAX_BYTES
+from mod_distance_engine import DistanceMatrixView, MarkerEncoding, MarkerGroup
+from mod_graph import CompactGraph
+
+INDEX_FILE = "index.json"
+# Taken around every index read-modify-write, so processes sharing the directory merge their changes
+LOCK_FILE = "index.lock"
+# Temporary entry directories older than this are left over from crashed writers
+STALE_TEMP_SECONDS = 3600
+TEMP_SUFFIX = ".tmp"
+# CompactGraph arrays kept for a laid-out tree
+GRAPH_ARRAYS = ('name_offsets', 'name_data', 'internal', 'positions', 'edges', 'weights')
+
+
+def fingerprint_array(array):
+    """
+    Content hash of a NumPy array, including its shape and dtype.
+
+    Parameters:
+        array (numpy.ndarray): Array to hash.
+
+    Returns:
+        str: Hex digest.
+    """
+    array = np.ascontiguousarray(array)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{array.shape}{array.dtype.str}".encode('utf-8'))
+    digest.update(memoryview(array).cast('B'))
+    return digest.hexdigest()
+
+
+def fingerprint_names(names):
+    """
+    Content hash of an ordered sequence of names, e.g. the species of a distance matrix.
+
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for name in names:
+        digest.update(str(name).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def fingerprint_file(file_path, block_size=1 << 20):
+    """
+    Content hash of a file, read in blocks.
+
+    Parameters:
+        file_path (str): Path to the file.
+        block_size (int): Bytes read per block.
+
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Holds an exclusive lock on a file for the duration of the block, waiting for other holders.
+
+    Parameters:
+        path (str): Lock file, created if missing.
+    """
+    with open(path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.01)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def make_key(*parts):
+    """
+    Builds a cache key from JSON-serialisable parts.
+
+    Returns:
+        str: Hex digest of the parts.
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=20).hexdigest()
+
+
+class ArrayCache:
+    """
+    Directory of .npy entries with size-bounded LRU eviction.
+
+    Each entry is a sub-directory holding one .npy file per named array. Arrays
+    are opened with mmap so a hit costs little more than the file open.
+
+    Several processes may share the directory, e.g. batch workers: every
+    index change re-reads index.json under a lock file and writes it back
+    merged, entries are written to uniquely named temporary directories, and
+    entry directories the index does not track are swept on eviction.
+    Threads sharing one instance, such as a cancelled pipeline run and its
+    successor, are serialised by an instance lock.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.lock = threading.RLock()
+        self.index = self._load_index()
+
+    def _index_path(self):
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def _load_index(self):
+        try:
+            with open(self._index_path(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_index(self):
+        # Called with the lock held; a unique temporary file keeps concurrent writers apart
+        fd, temp_path = tempfile.mkstemp(prefix=INDEX_FILE + '.', suffix=TEMP_SUFFIX, dir=self.directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=4)
+        os.replace(temp_path, self._index_path())
+
+    @contextmanager
+    def _locked_index(self):
+        # Reloads the index under the lock file; changes made in the block are saved on exit
+        with self.lock, file_lock(os.path.join(self.directory, LOCK_FILE)):
+            self.index = self._load_index()
+            yield self.index
+            self._save_index()
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key)
+
+    @property
+    def total_bytes(self):
+        return sum(entry['bytes'] for entry in self.index.values())
+
+    def __contains__(self, key):
+        return key in self.index and os.path.isdir(self._entry_path(key))
+
+    def get(self, key):
+        """
+        Opens a cached entry.
+
+        Parameters:
+            key (str): Entry key.
+
+        Returns:
+            dict or None: Array name -> read-only memory-mapped array, or None on a miss.
+        """
+        with self._locked_index() as index:
+            if key not in self:
+                return None
+            entry = index[key]
+            try:
+                arrays = {
+                    name: np.load(os.path.join(self._entry_path(key), f"{name}.npy"), mmap_mode='r')
+                    for name in entry['arrays']
+                }
+            except (OSError, ValueError):
+                self._remove(key)
+                return None
+            entry['last_access'] = time.time()
+        return arrays
+
+    def put(self, key, arrays, meta=None):
+        """
+        Stores arrays under a key, replacing any previous entry, then evicts old entries.
+
+        Parameters:
+            key (str): Entry key.
+            arrays (dict): Array name -> numpy.ndarray. Object arrays are not supported.
+            meta (dict, optional): JSON-serialisable metadata kept in the index.
+        """
+        # The arrays are written outside the lock, then moved into place under it
+        temp_path = tempfile.mkdtemp(prefix=key + '.', suffix=TEMP_SUFFIX, dir=self.directory)
+        size = 0
+        try:
+            for name, array in arrays.items():
+                file_path = os.path.join(temp_path, f"{name}.npy")
+                np.save(file_path, np.ascontiguousarray(array), allow_pickle=False)
+                size += os.path.getsize(file_path)
+            with self._locked_index() as index:
+                self._remove(key)
+                os.replace(temp_path, self._entry_path(key))
+                index[key] = {
+                    'arrays': list(arrays),
+                    'bytes': size,
+                    'last_access': time.time(),
+                    'meta': meta or {},
+                }
+                self._evict()
+        finally:
+            shutil.rmtree(temp_path, ignore_errors=True)
+
+    def evict(self):
+        """
+        Removes least recently used entries until the cache fits in max_bytes, and
+        entry directories the index does not track.
+        """
+        with self._locked_index():
+            self._evict()
+
+    def _evict(self):
+        # Called with the lock held
+        by_age = sorted(self.index, key=lambda key: self.index[key]['last_access'])
+        while by_age and self.total_bytes > self.max_bytes:
+            self._remove(by_age.pop(0))
+        self._sweep()
+
+    def _sweep(self):
+        # Removes entry directories missing from the index, and temporary ones left by crashed writers
+        now = time.time()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if name in self.index or (name.endswith(TEMP_SUFFIX)
+                                          and now - os.path.getmtime(path) < STALE_TEMP_SECONDS):
+                    continue
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                elif name.endswith(TEMP_SUFFIX):
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def _remove(self, key):
+        # Called with the lock held
+        shutil.rmtree(self._entry_path(key), ignore_errors=True)
+        self.index.pop(key, None)
+
+    def invalidate(self, key=None):
+        """
+        Removes one entry, or every entry when key is None.
+
+        Parameters:
+            key (str, optional): Entry key.
+        """
+        with self._locked_index() as index:
+            for removed in (list(index) if key is None else [key]):
+                self._remove(removed)
+            if key is None:
+                self._sweep()
+
+
+class LayoutCache(ArrayCache):
+    """
+    Caches laid-out trees: node names, positions, edges and branch lengths.
+
+    Keys combine a content hash of the distance matrix with the tree method,
+    layout algorithm, seed and parameters, so any change misses the cache.
+    """
+
+    def key(self, fingerprint, tree_method, layout_params):
+        """
+        Parameters:
+            fingerprint (str): Content hash of the distance matrix.
+            tree_method (str): Tree construction method.
+            layout_params (dict): Layout method, seed and parameters.
+
+        Returns:
+            str: Cache key.
+        """
+        return make_key('layout', fingerprint, tree_method, layout_params)
+
+    def store_graph(self, key, G):
+        """
+        Stores a laid-out tree.
+
+        Parameters:
+            key (str): Cache key.
+            G (CompactGraph): Tree with positions.
+        """
+        self.put(key, {name: getattr(G, name) for name in GRAPH_ARRAYS},
+                 meta={'nodes': G.n_nodes, 'edges': G.n_edges})
+
+    def load_graph(self, key):
+        """
+        Opens a cached tree; its arrays are the memory-mapped cache files.
+
+        Returns:
+            CompactGraph or None: The tree, or None on a miss.
+        """
+        arrays = self.get(key)
+        if arrays is None:
+            return None
+        if set(arrays) != set(GRAPH_ARRAYS):
+            # Entry written in an older layout
+            self.invalidate(key)
+            return None
+        return CompactGraph((arrays['name_offsets'], arrays['name_data']), arrays['edges'], arrays['weights'],
+                            internal=arrays['internal'], positions=arrays['positions'])
+
+
+class ProcessedDataCache(ArrayCache):
+    """
+    Caches process_data results: the species index, the distance matrix and the marker encoding.
+
+    Keys combine the input file's content hash and size with the distance
+    settings that change the result; execution knobs such as the worker
+    count do not. Hits and misses are counted for stats().
+    """
+
+    # distance_params entries that change speed but not the distances
+    EXECUTION_PARAMS = ('parallel', 'workers', 'tile_size')
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        super().__init__(directory, max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.bytes_served = 0
+
+    def key(self, file_path, distance_params=None):
+        """
+        Parameters:
+            file_path (str): Input data file.
+            distance_params (dict, optional): Distance computation settings.
+
+        Returns:
+            str: Cache key.
+        """
+        metric_params = {name: value for name, value in (distance_params or {}).items()
+                         if name not in self.EXECUTION_PARAMS}
+        return make_key('processed', fingerprint_file(file_path), os.path.getsize(file_path), metric_params)
+
+    def load_processed(self, key, file_size=0):
+        """
+        Opens cached processed data.
+
+        Parameters:
+            key (str): Cache key.
+            file_size (int): Size of the input file, counted as saved on a hit.
+
+        Returns:
+            dict or None: Processed data with a memory-mapped 'distance_array', or None on a miss.
+        """
+        with self.lock:
+            arrays = self.get(key)
+            if arrays is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.bytes_saved += file_size
+            self.bytes_served += sum(array.nbytes for array in arrays.values())
+            meta = self.index[key]['meta']
+        species = arrays['species'].astype(object)
+        encoding = None
+        if 'alphabet' in meta:
+            groups = {length: MarkerGroup(length, arrays[f'marker_species_{length}'], arrays[f'markers_{length}'])
+                      for length in meta['marker_lengths']}
+            encoding = MarkerEncoding(species, meta['alphabet'], meta['bits'], groups)
+        return {
+            'species': species,
+            'distance_matrix': DistanceMatrixView(species, arrays['distances']),
+            'distance_array': arrays['distances'],
+            'encoding': encoding,
+            'species_times': arrays.get('times'),
+            'raw_dataframe': None,
+            'fingerprint': key,
+        }
+
+    def store_processed(self, key, processed_data):
+        """
+        Stores the species index, distance matrix, species lifetimes and marker encoding of processed data.
+        """
+        arrays = {
+            'species': np.array([str(sp) for sp in processed_data['species']]),
+            'distances': np.asarray(processed_data['distance_array'], dtype=np.float64),
+        }
+        meta = {'species': len(processed_data['species'])}
+        if processed_data.get('species_times') is not None:
+            arrays['times'] = np.asarray(processed_data['species_times'], dtype=np.float64)
+        encoding = processed_data.get('encoding')
+        if encoding is not None:
+            # Kept so the cached data can be extended with extend_processed_data
+            for length, group in encoding.groups.items():
+                arrays[f'marker_species_{length}'] = group.species_codes
+                arrays[f'markers_{length}'] = group.packed
+            meta.update(alphabet=list(encoding.alphabet), bits=encoding.bits, marker_lengths=sorted(encoding.groups))
+        self.put(key, arrays, meta=meta)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit and miss counts, hit rate, input bytes not re-parsed
+            ('bytes_saved') and cached bytes served from disk ('bytes_served').
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'bytes_saved': self.bytes_saved,
+                'bytes_served': self.bytes_served,
+                'entries': len(self.index),
+                'total_bytes': self.total_bytes,
+            }
+
+
+def layout_cache_from_settings(settings):
+    """
+    Creates the layout cache described by the 'cache_params' settings, or None when disabled.
+    """
+    cache_params = settings.get('cache_params', {})
+    if not cache_params.get('enabled', True):
+        return None
+    return LayoutCache(os.path.join(cache_params.get('directory', CACHE_DIR), 'layouts'),
+                       cache_params.get('max_bytes', CACHE_MAX_BYTES))
+
+
+def data_cache_from_settings(settings):
+    """
+    Creates the processed-data cache described by the 'cache_params' settings, or None when disabled.
+    """
+    cache_params = settings.get('cache_params', {})
+    if not cache_params.get('enabled', True):
+        return None
+    return ProcessedDataCache(os.path.join(cache_params.get('directory', CACHE_DIR), 'processed'),
+                              cache_params.get('max_bytes', CACHE_MAX_BYTES))
@@ -2,7 +2,31 @@
 
 import csv
 import json
+import time
 
+import numpy as np
+
+from mod_tracing import traced
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
+SPECIES_COLUMN = 'species'
+MARKER_COLUMN = 'genetic_marker'
+# Optional numeric columns: when a species appears and, if it does, goes extinct (e.g. an era number)
+TIME_COLUMN = 'time'
+END_TIME_COLUMN = 'end_time'
+COLUMNS = (SPECIES_COLUMN, MARKER_COLUMN, TIME_COLUMN, END_TIME_COLUMN)
+
+@traced('load')
 def load_data(file_path):
     """
     Loads data from a CSV or JSON file.
@@ -28,3 +52,394 @@ def load_data(file_path):
     except Exception as e:
         print(f"Error loading data: {e}")
     return data
+
+
+class ColumnarData:
+    """
+    Typed, column-oriented view of a marker data file.
+
+    Attributes:
+        species (numpy.ndarray): Species names in order of first appearance.
+        species_codes (numpy.ndarray): Index into species for every row (int32).
+        markers (numpy.ndarray or None): (n_rows, max_length) uint8 matrix of ASCII marker bytes,
+            zero padded; None when marker_text holds the markers.
+        lengths (numpy.ndarray or None): Marker length of every row (int32); None with marker_text.
+        timings (dict): Seconds spent per loading phase.
+        times (numpy.ndarray or None): (n_rows, 2) float64 time and end time of every
+            row, NaN where missing; None when the file has neither column.
+        marker_text (numpy.ndarray or None): Marker strings as an object array, kept instead of
+            the byte matrix when some marker is not ASCII.
+    """
+
+    def __init__(self, species, species_codes, markers, lengths, timings=None, times=None, marker_text=None):
+        self.species = species
+        self.species_codes = species_codes
+        self.markers = markers
+        self.lengths = lengths
+        self.timings = timings or {}
+        self.times = times
+        self.marker_text = marker_text
+
+    def __len__(self):
+        return len(self.species_codes)
+
+    @property
+    def nbytes(self):
+        if self.marker_text is not None:
+            return self.species_codes.nbytes + self.marker_text.nbytes
+        return self.species_codes.nbytes + self.markers.nbytes + self.lengths.nbytes
+
+    def species_times(self):
+        """
+        Lifetime of every species: from its earliest time to its latest end time.
+
+        Returns:
+            numpy.ndarray or None: (n_species, 2) float64 [start, end]; -inf / inf where
+            no row gives one. None when the file has no time columns.
+        """
+        if self.times is None:
+            return None
+        return species_lifetimes(self.species_codes, len(self.species), self.times)
+
+    def marker_strings(self):
+        """
+        Returns:
+            list of str: The markers decoded back to strings.
+        """
+        if self.marker_text is not None:
+            return list(self.marker_text)
+        return matrix_strings(self.markers, self.lengths)
+
+
+def marker_matrix(markers):
+    """
+    Packs marker strings into a fixed-width byte matrix.
+
+    Parameters:
+        markers (sequence of str): Genetic markers.
+
+    Returns:
+        tuple: ((n, max_length) uint8 matrix, int32 lengths).
+    """
+    try:
+        fixed = np.asarray(markers, dtype=np.bytes_)
+    except UnicodeEncodeError as e:
+        raise ValueError(f"Genetic markers must be ASCII: {e}")
+    if fixed.dtype.itemsize == 0 or not len(fixed):
+        return np.zeros((len(fixed), 0), dtype=np.uint8), np.zeros(len(fixed), dtype=np.int32)
+    lengths = np.char.str_len(fixed).astype(np.int32)
+    matrix = fixed.view(np.uint8).reshape(len(fixed), fixed.dtype.itemsize)
+    return matrix, lengths
+
+
+def matrix_strings(matrix, lengths):
+    # Inverse of marker_matrix
+    return [bytes(row[:length]).decode('ascii') for row, length in zip(matrix, lengths)]
+
+
+def text_markers(marker_values):
+    # Markers that are not all ASCII, kept as strings for the code-point encoder
+    text = np.empty(len(marker_values), dtype=object)
+    text[:] = [str(marker) for marker in marker_values]
+    return text
+
+
+def numeric_column(values):
+    """
+    Parses optional numbers; missing or malformed values become NaN.
+
+    Returns:
+        numpy.ndarray: float64 values.
+    """
+    if pd is not None:
+        return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+    parsed = np.full(len(values), np.nan)
+    for i, value in enumerate(values):
+        try:
+            parsed[i] = float(value)
+        except (TypeError, ValueError):
+            pass
+    return parsed
+
+
+def species_lifetimes(species_codes, n_species, times):
+    """
+    Parameters:
+        species_codes (numpy.ndarray): Species index of every row.
+        n_species (int): Number of species.
+        times (numpy.ndarray): (n_rows, 2) time and end time of every row, NaN where missing.
+
+    Returns:
+        numpy.ndarray: (n_species, 2) float64 [earliest time, latest end time]; -inf / inf where
+        no row gives one.
+    """
+    start = np.full(n_species, np.inf)
+    end = np.full(n_species, -np.inf)
+    np.fmin.at(start, species_codes, times[:, 0])
+    np.fmax.at(end, species_codes, times[:, 1])
+    start[start == np.inf] = -np.inf
+    end[end == -np.inf] = np.inf
+    return np.column_stack([start, end])
+
+
+class LifetimeAccumulator:
+    """
+    Species lifetimes gathered chunk by chunk, as species_lifetimes computes them in one go.
+
+    Attributes:
+        start (numpy.ndarray): Earliest time per species seen so far; inf where none.
+        end (numpy.ndarray): Latest end time per species seen so far; -inf where none.
+        timed (bool): Whether any chunk had a time column.
+    """
+
+    def __init__(self):
+        self.start = np.zeros(0)
+        self.end = np.zeros(0)
+        self.timed = False
+
+    def add(self, species_codes, times):
+        """
+        Parameters:
+            species_codes (numpy.ndarray): Species index of every row of the chunk.
+            times (numpy.ndarray or None): (n_rows, 2) row times from row_times; None when the chunk has none.
+        """
+        if times is None:
+            return
+        self.timed = True
+        n_species = int(species_codes.max()) + 1 if len(species_codes) else 0
+        if n_species > len(self.start):
+            grow = n_species - len(self.start)
+            self.start = np.concatenate([self.start, np.full(grow, np.inf)])
+            self.end = np.concatenate([self.end, np.full(grow, -np.inf)])
+        np.fmin.at(self.start, species_codes, times[:, 0])
+        np.fmax.at(self.end, species_codes, times[:, 1])
+
+    def finalize(self, n_species):
+        """
+        Returns:
+            numpy.ndarray or None: (n_species, 2) lifetimes as from species_lifetimes, or None
+            when no chunk had a time column.
+        """
+        if not self.timed:
+            return None
+        start = np.full(n_species, -np.inf)
+        end = np.full(n_species, np.inf)
+        start[:len(self.start)] = np.where(self.start == np.inf, -np.inf, self.start)
+        end[:len(self.end)] = np.where(self.end == -np.inf, np.inf, self.end)
+        return np.column_stack([start, end])
+
+
+def row_times(time_values, end_values):
+    # (n_rows, 2) time columns, or None when the file has neither
+    if time_values is None and end_values is None:
+        return None
+    n_rows = len(time_values if time_values is not None else end_values)
+    return np.column_stack([numeric_column(values) if values is not None else np.full(n_rows, np.nan)
+                            for values in (time_values, end_values)])
+
+
+def factorize(values):
+    """
+    Converts values to categorical codes in order of first appearance.
+
+    Returns:
+        tuple: (int32 codes, object array of categories).
+    """
+    if pd is not None:
+        codes, categories = pd.factorize(np.asarray(values, dtype=object))
+        return codes.astype(np.int32), np.asarray(categories, dtype=object)
+    index = {}
+    codes = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.int32, count=len(values))
+    categories = np.empty(len(index), dtype=object)
+    categories[:] = list(index)
+    return codes, categories
+
+
+def iter_json_array(file_obj, block_size=1 << 16):
+    """
+    Yields the elements of a top-level JSON array without loading the whole document.
+
+    Parameters:
+        file_obj (file): Text file positioned at the start of the array.
+        block_size (int): Characters read per refill.
+
+    Yields:
+        object: Each decoded array element.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+
+    def refill():
+        nonlocal buffer, position, eof
+        block = file_obj.read(block_size)
+        eof = not block
+        buffer = buffer[position:] + block
+        position = 0
+
+    def skip(characters):
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in characters:
+                position += 1
+            if position < len(buffer) or eof:
+                return
+            refill()
+
+    skip(' \t\r\n')
+    if position >= len(buffer) or buffer[position] != '[':
+        raise ValueError("JSON data must be an array of records.")
+    position += 1
+    while True:
+        skip(' \t\r\n,')
+        if position >= len(buffer):
+            raise ValueError("Unterminated JSON array.")
+        if buffer[position] == ']':
+            return
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+            # A number cut off at the block boundary also decodes, so require a delimiter after it
+            complete = eof or (end < len(buffer) and buffer[end] in ' \t\r\n,]')
+        except json.JSONDecodeError:
+            complete = False
+        if not complete:
+            if eof:
+                raise ValueError("Malformed JSON record.")
+            refill()
+            continue
+        position = end
+        yield element
+
+
+def load_columnar_csv(file_path, timings):
+    start = time.perf_counter()
+    if pd is not None:
+        # The pyarrow engine needs the optional columns named up front
+        with open(file_path, 'r', encoding='utf-8', newline='') as csvfile:
+            header = next(csv.reader(csvfile), [])
+        frame = pd.read_csv(file_path, usecols=[column for column in COLUMNS if column in header],
+                            dtype=str, keep_default_na=False, engine=CSV_ENGINE)
+        species_values = frame[SPECIES_COLUMN].to_numpy()
+        marker_values = frame[MARKER_COLUMN].to_numpy()
+        time_values, end_values = (frame[column].to_numpy() if column in frame else None
+                                   for column in (TIME_COLUMN, END_TIME_COLUMN))
+    else:
+        species_values, marker_values = [], []
+        time_values = end_values = None
+        with open(file_path, 'r', encoding='utf-8', newline='') as csvfile:
+            reader = csv.DictReader(csvfile)
+            if TIME_COLUMN in (reader.fieldnames or []):
+                time_values = []
+            if END_TIME_COLUMN in (reader.fieldnames or []):
+                end_values = []
+            for row in reader:
+                species_values.append(row[SPECIES_COLUMN])
+                marker_values.append(row[MARKER_COLUMN])
+                if time_values is not None:
+                    time_values.append(row[TIME_COLUMN])
+                if end_values is not None:
+                    end_values.append(row[END_TIME_COLUMN])
+    timings['read'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    species_codes, species = factorize(species_values)
+    timings['factorize'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    try:
+        markers, lengths = marker_matrix(marker_values)
+        marker_text = None
+    except ValueError:
+        markers = lengths = None
+        marker_text = text_markers(marker_values)
+    times = row_times(time_values, end_values)
+    timings['encode'] = time.perf_counter() - start
+    return ColumnarData(species, species_codes, markers, lengths, timings, times, marker_text)
+
+
+def load_columnar_json(file_path, timings, batch_rows=65536):
+    species_index = {}
+    code_batches, marker_batches, length_batches = [], [], []
+    codes, markers = [], []
+    time_values, end_values = [], []
+    has_times = False
+    parse_time = encode_time = 0.0
+    text_batches = None  # Marker strings per batch, from the first batch that is not ASCII on
+
+    def flush():
+        nonlocal codes, markers, encode_time, text_batches
+        start = time.perf_counter()
+        if text_batches is None:
+            try:
+                matrix, lengths = marker_matrix(markers)
+                marker_batches.append(matrix)
+                length_batches.append(lengths)
+            except ValueError:
+                text_batches = [matrix_strings(*batch) for batch in zip(marker_batches, length_batches)]
+        if text_batches is not None:
+            text_batches.append(markers)
+        code_batches.append(np.array(codes, dtype=np.int32))
+        codes, markers = [], []
+        encode_time += time.perf_counter() - start
+
+    start = time.perf_counter()
+    with open(file_path, 'r', encoding='utf-8') as jsonfile:
+        for record in iter_json_array(jsonfile):
+            codes.append(species_index.setdefault(record[SPECIES_COLUMN], len(species_index)))
+            markers.append(record[MARKER_COLUMN])
+            time_values.append(record.get(TIME_COLUMN))
+            end_values.append(record.get(END_TIME_COLUMN))
+            has_times = has_times or TIME_COLUMN in record or END_TIME_COLUMN in record
+            if len(markers) >= batch_rows:
+                parse_time += time.perf_counter() - start
+                flush()
+                start = time.perf_counter()
+    parse_time += time.perf_counter() - start
+    flush()
+
+    start = time.perf_counter()
+    marker_text = lengths = matrix = None
+    if text_batches is not None:
+        marker_text = text_markers([marker for batch in text_batches for marker in batch])
+    else:
+        width = max(matrix.shape[1] for matrix in marker_batches)
+        matrix = np.zeros((sum(len(batch) for batch in marker_batches), width), dtype=np.uint8)
+        row = 0
+        for batch in marker_batches:
+            matrix[row:row + len(batch), :batch.shape[1]] = batch
+            row += len(batch)
+        lengths = np.concatenate(length_batches)
+    species = np.empty(len(species_index), dtype=object)
+    species[:] = list(species_index)
+    times = row_times(time_values, end_values) if has_times else None
+    timings['parse'] = parse_time
+    timings['encode'] = encode_time + time.perf_counter() - start
+    return ColumnarData(species, np.concatenate(code_batches), matrix, lengths, timings, times, marker_text)
+
+
+@traced('load')
+def load_columnar(file_path):
+    """
+    Loads a CSV or JSON marker file into typed columns.
+
+    CSV files are read with the pandas pyarrow engine when pyarrow is installed,
+    otherwise the pandas C engine (or the csv module without pandas). JSON
+    files must hold an array of records and are parsed incrementally.
+
+    Parameters:
+        file_path (str): Path to the data file.
+
+    Returns:
+        ColumnarData: Species codes, marker byte matrix (or the marker strings when some are
+        not ASCII) and per-phase timings.
+    """
+    timings = {}
+    if file_path.endswith('.csv'):
+        data = load_columnar_csv(file_path, timings)
+    elif file_path.endswith('.json'):
+        data = load_columnar_json(file_path, timings)
+    else:
+        raise ValueError("Unsupported file format. Use CSV or JSON.")
+    timings['total'] = sum(timings.values())
+    return data
@@ -0,0 +1,663 @@
+# mod_distance_engine.py
+
+import multiprocessing
+import os
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from mod_tracing import span
+
+# Fixed 2-bit codes for nucleotide markers
+NUCLEOTIDE_CODES = {'A': 0, 'C': 1, 'G': 2, 'T': 3}
+
+
+class MarkerGroup:
+    """
+    Markers of one length, encoded once and ordered by species.
+
+    Attributes:
+        length (int): Number of symbols in every marker of the group.
+        species_codes (numpy.ndarray): Species index of every marker (int32).
+        packed (numpy.ndarray): Encoded markers, one row per marker (uint8).
+            With a 2-bit alphabet four symbols share a byte.
+    """
+
+    def __init__(self, length, species_codes, packed):
+        self.length = length
+        self.species_codes = species_codes
+        self.packed = packed
+
+    def __len__(self):
+        return len(self.species_codes)
+
+
+class MarkerEncoding:
+    """
+    Genetic markers of every species, grouped by marker length.
+
+    Attributes:
+        species (numpy.ndarray): Species names; position is the species index.
+        alphabet (list of str): Symbols in code order.
+        bits (int): Bits per symbol (2 for nucleotides, otherwise 8 or 16).
+        groups (dict): Marker length -> MarkerGroup.
+    """
+
+    def __init__(self, species, alphabet, bits, groups):
+        self.species = species
+        self.alphabet = alphabet
+        self.bits = bits
+        self.groups = groups
+
+    @property
+    def n_species(self):
+        return len(self.species)
+
+    @property
+    def nbytes(self):
+        return sum(group.packed.nbytes + group.species_codes.nbytes for group in self.groups.values())
+
+    def codes(self, length):
+        """
+        Returns the unpacked symbol codes of a marker group.
+
+        Parameters:
+            length (int): Marker length of the group.
+
+        Returns:
+            numpy.ndarray: Symbol codes with shape (n_markers, length).
+        """
+        group = self.groups[length]
+        return unpack_codes(group.packed, length, self.bits)
+
+
+def pack_codes(codes, bits):
+    """
+    Packs symbol codes so that a 2-bit alphabet uses four symbols per byte.
+
+    Parameters:
+        codes (numpy.ndarray): Symbol codes with shape (n, length).
+        bits (int): Bits per symbol.
+
+    Returns:
+        numpy.ndarray: Packed codes (uint8 for 2 and 8 bits, uint16 for 16).
+    """
+    if bits == 16:
+        return codes.astype(np.uint16)
+    if bits == 8:
+        return codes.astype(np.uint8)
+    n, length = codes.shape
+    padded = np.zeros((n, -(-length // 4) * 4), dtype=np.uint8)
+    padded[:, :length] = codes
+    quads = padded.reshape(n, -1, 4)
+    return (quads[:, :, 0] << 6) | (quads[:, :, 1] << 4) | (quads[:, :, 2] << 2) | quads[:, :, 3]
+
+
+def unpack_codes(packed, length, bits):
+    """
+    Reverses pack_codes.
+
+    Parameters:
+        packed (numpy.ndarray): Packed codes.
+        length (int): Number of symbols per marker.
+        bits (int): Bits per symbol.
+
+    Returns:
+        numpy.ndarray: Symbol codes with shape (n, length).
+    """
+    if bits != 2:
+        return packed[:, :length]
+    shifts = np.array([6, 4, 2, 0], dtype=np.uint8)
+    codes = (packed[:, :, None] >> shifts) & 0b11
+    return codes.reshape(len(packed), -1)[:, :length]
+
+
+def build_alphabet(markers):
+    """
+    Chooses the symbol alphabet and code width for a set of markers.
+
+    Parameters:
+        markers (iterable of str): Marker strings.
+
+    Returns:
+        tuple: (alphabet as list of str, bits per symbol).
+    """
+    symbols = set()
+    for marker in markers:
+        symbols.update(marker)
+    if symbols <= NUCLEOTIDE_CODES.keys():
+        return list(NUCLEOTIDE_CODES), 2
+    alphabet = sorted(symbols)
+    return alphabet, 8 if len(alphabet) <= 256 else 16
+
+
+def encode_strings(markers, length, alphabet):
+    """
+    Converts equal-length marker strings to symbol codes.
+
+    Parameters:
+        markers (list of str): Markers, all of the given length.
+        length (int): Marker length.
+        alphabet (list of str): Symbols in code order.
+
+    Returns:
+        numpy.ndarray: Symbol codes with shape (len(markers), length).
+    """
+    if length == 0:
+        return np.zeros((len(markers), 0), dtype=np.uint16)
+    points = np.array(markers, dtype=f'U{length}').view(np.uint32).reshape(len(markers), length)
+    alphabet_points = np.array([ord(symbol) for symbol in alphabet], dtype=np.uint32)
+    order = np.argsort(alphabet_points)
+    return order[np.searchsorted(alphabet_points[order], points)].astype(np.uint16)
+
+
+def encode_markers(species_values, marker_values, species=None):
+    """
+    Encodes markers once, grouped per species and per marker length.
+
+    Parameters:
+        species_values (sequence): Species name of every row.
+        marker_values (sequence of str): Genetic marker of every row.
+        species (sequence, optional): Species order to use. Defaults to order of first appearance.
+
+    Returns:
+        MarkerEncoding: Encoded markers.
+    """
+    species_values = np.asarray(species_values, dtype=object)
+    marker_values = [str(marker) for marker in marker_values]
+    if species is None:
+        _, first = np.unique(species_values, return_index=True)
+        species = species_values[np.sort(first)]
+    species = np.asarray(species, dtype=object)
+    index = {name: i for i, name in enumerate(species)}
+    species_codes = np.fromiter((index[name] for name in species_values), dtype=np.int32, count=len(species_values))
+
+    alphabet, bits = build_alphabet(marker_values)
+    lengths = np.fromiter((len(marker) for marker in marker_values), dtype=np.int64, count=len(marker_values))
+
+    groups = {}
+    for length in np.unique(lengths):
+        rows = np.flatnonzero(lengths == length)
+        rows = rows[np.argsort(species_codes[rows], kind='stable')]
+        codes = encode_strings([marker_values[i] for i in rows], int(length), alphabet)
+        groups[int(length)] = MarkerGroup(int(length), species_codes[rows], pack_codes(codes, bits))
+    return MarkerEncoding(species, alphabet, bits, groups)
+
+
+def encode_marker_matrix(species, species_codes, markers, lengths):
+    """
+    Encodes markers given as a fixed-width byte matrix (see mod_data_loader.load_columnar).
+
+    Produces the same encoding as encode_markers for ASCII markers, without
+    creating a Python string per marker.
+
+    Parameters:
+        species (sequence): Species names; position is the species index.
+        species_codes (numpy.ndarray): Species index of every row.
+        markers (numpy.ndarray): (n_rows, width) uint8 marker bytes.
+        lengths (numpy.ndarray): Marker length of every row.
+
+    Returns:
+        MarkerEncoding: Encoded markers.
+    """
+    species = np.asarray(species, dtype=object)
+    species_codes = np.asarray(species_codes, dtype=np.int32)
+    present = np.zeros(256, dtype=bool)
+    for length in np.unique(lengths):
+        rows = lengths == length
+        present[np.unique(markers[rows, :length])] = True
+    symbols = [chr(byte) for byte in np.flatnonzero(present)]
+    if set(symbols) <= NUCLEOTIDE_CODES.keys():
+        alphabet, bits = list(NUCLEOTIDE_CODES), 2
+    else:
+        alphabet, bits = symbols, 8
+    lookup = np.zeros(256, dtype=np.uint8)
+    lookup[[ord(symbol) for symbol in alphabet]] = np.arange(len(alphabet))
+
+    groups = {}
+    for length in np.unique(lengths):
+        rows = np.flatnonzero(lengths == length)
+        rows = rows[np.argsort(species_codes[rows], kind='stable')]
+        codes = lookup[markers[rows, :length]]
+        groups[int(length)] = MarkerGroup(int(length), species_codes[rows], pack_codes(codes, bits))
+    return MarkerEncoding(species, alphabet, bits, groups)
+
+
+class MarkerAccumulator:
+    """
+    Builds a MarkerEncoding incrementally from chunks of rows.
+
+    Markers are packed as soon as they arrive and appended to growable per-length
+    buffers, so memory follows the encoded size rather than the raw rows. The
+    alphabet starts as 2-bit nucleotides and widens (re-coding stored markers
+    once) when another symbol appears.
+    """
+
+    def __init__(self):
+        self.species_index = {}
+        self.alphabet = list(NUCLEOTIDE_CODES)
+        self.bits = 2
+        self.buffers = {}
+        self.n_markers = 0
+
+    @property
+    def nbytes(self):
+        return sum(packed[:size].nbytes + codes[:size].nbytes for packed, codes, size in self.buffers.values())
+
+    def _widen(self, symbols):
+        new_symbols = sorted(symbols - set(self.alphabet))
+        if not new_symbols:
+            return
+        self.alphabet.extend(new_symbols)
+        bits = 8 if len(self.alphabet) <= 256 else 16
+        if bits == self.bits:
+            return
+        for length, (packed, codes, size) in self.buffers.items():
+            recoded = pack_codes(unpack_codes(packed[:size], length, self.bits), bits)
+            self.buffers[length] = (recoded, codes, size)
+        self.bits = bits
+
+    def _append(self, length, packed, species_codes):
+        if length not in self.buffers:
+            self.buffers[length] = (np.empty((0, packed.shape[1]), dtype=packed.dtype), np.empty(0, dtype=np.int32), 0)
+        buffer, codes, size = self.buffers[length]
+        needed = size + len(packed)
+        if needed > len(buffer):
+            capacity = max(needed, 2 * len(buffer), 1024)
+            grown = np.empty((capacity, packed.shape[1]), dtype=packed.dtype)
+            grown[:size] = buffer[:size]
+            grown_codes = np.empty(capacity, dtype=np.int32)
+            grown_codes[:size] = codes[:size]
+            buffer, codes = grown, grown_codes
+        buffer[size:needed] = packed
+        codes[size:needed] = species_codes
+        self.buffers[length] = (buffer, codes, needed)
+
+    def add(self, species_values, marker_values):
+        """
+        Encodes and appends one chunk of rows.
+
+        Parameters:
+            species_values (sequence): Species name of every row.
+            marker_values (sequence of str): Genetic marker of every row.
+
+        Returns:
+            numpy.ndarray: Species index of every row (int32).
+        """
+        markers = [str(marker) for marker in marker_values]
+        symbols = set(''.join(markers))
+        if not symbols <= set(self.alphabet):
+            self._widen(symbols)
+
+        species_index = self.species_index
+        species_codes = np.fromiter(
+            (species_index.setdefault(name, len(species_index)) for name in species_values),
+            dtype=np.int32, count=len(markers))
+        lengths = np.fromiter((len(marker) for marker in markers), dtype=np.int64, count=len(markers))
+        for length in np.unique(lengths):
+            rows = np.flatnonzero(lengths == length)
+            codes = encode_strings([markers[i] for i in rows], int(length), self.alphabet)
+            self._append(int(length), pack_codes(codes, self.bits), species_codes[rows])
+        self.n_markers += len(markers)
+        return species_codes
+
+    def finalize(self):
+        """
+        Returns:
+            MarkerEncoding: The accumulated markers, grouped per species.
+        """
+        species = np.empty(len(self.species_index), dtype=object)
+        species[:] = list(self.species_index)
+        groups = {}
+        for length, (packed, codes, size) in sorted(self.buffers.items()):
+            order = np.argsort(codes[:size], kind='stable')
+            groups[length] = MarkerGroup(length, codes[:size][order], packed[:size][order])
+        return MarkerEncoding(species, list(self.alphabet), self.bits, groups)
+
+
+def merge_encodings(encoding, added):
+    """
+    Appends the species of one encoding after those of another.
+
+    Existing codes stay valid because new symbols go to the end of the
+    alphabet; the existing markers are only re-packed when the new symbols
+    widen the code, as in MarkerAccumulator.
+
+    Parameters:
+        encoding (MarkerEncoding): Existing markers.
+        added (MarkerEncoding): Markers of species not in encoding.
+
+    Returns:
+        MarkerEncoding: Species of encoding followed by those of added.
+    """
+    alphabet = list(encoding.alphabet) + sorted(set(added.alphabet) - set(encoding.alphabet))
+    bits = encoding.bits
+    if len(alphabet) > len(encoding.alphabet):
+        bits = max(bits, 8 if len(alphabet) <= 256 else 16)
+    lookup = np.array([alphabet.index(symbol) for symbol in added.alphabet], dtype=np.uint16)
+
+    def codes(group, source_bits):
+        if not group.length:
+            return np.zeros((len(group), 0), dtype=np.uint16)
+        return unpack_codes(group.packed, group.length, source_bits)
+
+    groups = {}
+    for length in sorted(set(encoding.groups) | set(added.groups)):
+        packed, species_codes = [], []
+        if length in encoding.groups:
+            group = encoding.groups[length]
+            packed.append(group.packed if bits == encoding.bits else pack_codes(codes(group, encoding.bits), bits))
+            species_codes.append(group.species_codes)
+        if length in added.groups:
+            group = added.groups[length]
+            packed.append(pack_codes(lookup[codes(group, added.bits)], bits))
+            species_codes.append(group.species_codes + encoding.n_species)
+        groups[length] = MarkerGroup(length, np.concatenate(species_codes).astype(np.int32), np.concatenate(packed))
+    species = np.concatenate([np.asarray(encoding.species, dtype=object), np.asarray(added.species, dtype=object)])
+    return MarkerEncoding(species, alphabet, bits, groups)
+
+
+def species_profiles(encoding, length, batch_size=65536):
+    """
+    Counts, per species, how often each symbol occurs at each marker position.
+
+    Parameters:
+        encoding (MarkerEncoding): Encoded markers.
+        length (int): Marker length of the group to profile.
+        batch_size (int): Markers unpacked at once, bounding temporary memory.
+
+    Returns:
+        tuple: (profiles with shape (n_species, length * alphabet size), marker count per species).
+    """
+    group = encoding.groups[length]
+    n_species = encoding.n_species
+    n_symbols = len(encoding.alphabet)
+    counts = np.bincount(group.species_codes, minlength=n_species).astype(np.float64)
+    width = length * n_symbols
+    profiles = np.zeros(n_species * width, dtype=np.float64)
+    if length == 0:
+        return profiles.reshape(n_species, 0), counts
+    offsets = np.arange(length, dtype=np.int64) * n_symbols
+    for start in range(0, len(group), batch_size):
+        rows = slice(start, start + batch_size)
+        codes = unpack_codes(group.packed[rows], length, encoding.bits)
+        flat = group.species_codes[rows, None].astype(np.int64) * width + offsets + codes
+        profiles += np.bincount(flat.ravel(), minlength=n_species * width)
+    return profiles.reshape(n_species, width), counts
+
+
+def prepare_profiles(encoding):
+    """
+    Builds the per-length species profiles used by the distance kernels.
+
+    Parameters:
+        encoding (MarkerEncoding): Encoded markers.
+
+    Returns:
+        list of tuple: (length, profiles, counts) for every marker length.
+    """
+    return [(length, *species_profiles(encoding, length)) for length in sorted(encoding.groups)]
+
+
+def distance_block(profiles, rows, cols):
+    """
+    Computes mean Hamming distances between two sets of species.
+
+    The sum of Hamming distances over all marker pairs of two species equals
+    n1 * n2 * length minus the number of matching symbols, and the matches are
+    the dot product of the two species profiles. Markers of unequal length are
+    never compared, matching util_math.calculate_genetic_distance.
+
+    Parameters:
+        profiles (list of tuple): Output of prepare_profiles.
+        rows (slice or numpy.ndarray): Species indices of the block rows.
+        cols (slice or numpy.ndarray): Species indices of the block columns.
+
+    Returns:
+        numpy.ndarray: Distance block; inf where no markers can be compared.
+    """
+    total = None
+    pairs = None
+    for length, profile, counts in profiles:
+        pair_counts = np.outer(counts[rows], counts[cols])
+        block = pair_counts * length
+        if length:
+            block -= profile[rows] @ profile[cols].T
+        total = block if total is None else total + block
+        pairs = pair_counts if pairs is None else pairs + pair_counts
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(pairs > 0, total / np.where(pairs > 0, pairs, 1), np.inf)
+
+
+def pairwise_distance_matrix(encoding, batch_size=1024, progress=None):
+    """
+    Computes the mean Hamming distance between every pair of species.
+
+    Parameters:
+        encoding (MarkerEncoding): Encoded markers.
+        batch_size (int): Number of matrix rows computed per batch.
+        progress (callable, optional): Called with the fraction of rows done after each batch.
+
+    Returns:
+        numpy.ndarray: Symmetric (n_species, n_species) float64 distance matrix.
+    """
+    n_species = encoding.n_species
+    profiles = prepare_profiles(encoding)
+    result = np.empty((n_species, n_species), dtype=np.float64)
+    for start in range(0, n_species, batch_size):
+        rows = slice(start, min(start + batch_size, n_species))
+        result[rows] = distance_block(profiles, rows, slice(None))
+        if progress is not None:
+            progress(rows.stop / n_species)
+    return result
+
+
+def extend_distance_matrix(distances, encoding, batch_size=1024, progress=None):
+    """
+    Grows a distance matrix to the species appended to its encoding.
+
+    Only the rows and columns of the new species are computed; the existing
+    block is copied as it is.
+
+    Parameters:
+        distances (numpy.ndarray): (n_old, n_old) distances between the first n_old species of encoding.
+        encoding (MarkerEncoding): Markers of every species, the new ones last (see merge_encodings).
+        batch_size (int): Number of new rows computed per batch.
+        progress (callable, optional): Called with the fraction of new rows done after each batch.
+
+    Returns:
+        numpy.ndarray: Symmetric (n_species, n_species) float64 distance matrix.
+    """
+    n_old, n_species = len(distances), encoding.n_species
+    with span('distances', species=n_species, added=n_species - n_old):
+        profiles = prepare_profiles(encoding)
+        result = np.empty((n_species, n_species), dtype=np.float64)
+        result[:n_old, :n_old] = distances
+        for start in range(n_old, n_species, batch_size):
+            rows = slice(start, min(start + batch_size, n_species))
+            block = distance_block(profiles, rows, slice(None))
+            result[rows] = block
+            result[:n_old, rows] = block[:, :n_old].T
+            if progress is not None:
+                progress((rows.stop - n_old) / (n_species - n_old))
+    return result
+
+
+def _share_array(array):
+    """
+    Copies an array into a new shared-memory block.
+
+    Returns:
+        tuple: (SharedMemory, numpy.ndarray view onto the block).
+    """
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    shared[...] = array
+    return block, shared
+
+
+# Per-process state of the tile workers, set up once by _attach_tile_worker
+_tile_worker = {}
+
+
+def _attach_tile_worker(result_spec, profile_specs):
+    blocks = []
+
+    def attach(name, shape):
+        block = shared_memory.SharedMemory(name=name)
+        blocks.append(block)
+        return np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+
+    _tile_worker['result'] = attach(*result_spec)
+    _tile_worker['profiles'] = [
+        (length, attach(profile_name, profile_shape), attach(counts_name, counts_shape))
+        for length, profile_name, profile_shape, counts_name, counts_shape in profile_specs
+    ]
+    _tile_worker['blocks'] = blocks
+
+
+def _compute_tile(tile):
+    row_start, row_stop, col_start, col_stop = tile
+    rows = slice(row_start, row_stop)
+    cols = slice(col_start, col_stop)
+    block = distance_block(_tile_worker['profiles'], rows, cols)
+    result = _tile_worker['result']
+    result[rows, cols] = block
+    if col_start != row_start:
+        result[cols, rows] = block.T
+
+
+def upper_triangle_tiles(n_species, tile_size):
+    """
+    Splits an n x n symmetric matrix into tiles on or above the diagonal.
+
+    Parameters:
+        n_species (int): Matrix size.
+        tile_size (int): Tile edge length.
+
+    Returns:
+        list of tuple: (row_start, row_stop, col_start, col_stop) per tile.
+    """
+    tiles = []
+    for row_start in range(0, n_species, tile_size):
+        row_stop = min(row_start + tile_size, n_species)
+        for col_start in range(row_start, n_species, tile_size):
+            tiles.append((row_start, row_stop, col_start, min(col_start + tile_size, n_species)))
+    return tiles
+
+
+def parallel_distance_matrix(encoding, workers=0, tile_size=512, progress=None):
+    """
+    Computes the distance matrix on a process pool.
+
+    Species profiles and the result live in shared memory; workers compute the
+    upper-triangle tiles and write each tile and its mirror straight into the
+    result, so no distances are pickled back to the parent.
+
+    Parameters:
+        encoding (MarkerEncoding): Encoded markers.
+        workers (int): Number of worker processes; 0 uses every CPU.
+        tile_size (int): Tile edge length in species.
+        progress (callable, optional): Called with the fraction of tiles done; an exception
+            it raises cancels the tiles not yet started.
+
+    Returns:
+        numpy.ndarray: Symmetric (n_species, n_species) float64 distance matrix.
+    """
+    n_species = encoding.n_species
+    workers = workers or os.cpu_count() or 1
+    tiles = upper_triangle_tiles(n_species, tile_size)
+    if workers == 1 or len(tiles) <= 1:
+        return pairwise_distance_matrix(encoding, batch_size=tile_size, progress=progress)
+
+    blocks = []
+    try:
+        profile_specs = []
+        for length, profile, counts in prepare_profiles(encoding):
+            profile_block, _ = _share_array(profile)
+            counts_block, _ = _share_array(counts)
+            blocks.extend([profile_block, counts_block])
+            profile_specs.append((length, profile_block.name, profile.shape, counts_block.name, counts.shape))
+        result_block = shared_memory.SharedMemory(create=True, size=max(n_species * n_species * 8, 1))
+        blocks.append(result_block)
+        result = np.ndarray((n_species, n_species), dtype=np.float64, buffer=result_block.buf)
+
+        # Spawned, not forked: this runs on the GUI's pipeline thread, and forking a threaded process can deadlock
+        with ProcessPoolExecutor(max_workers=min(workers, len(tiles)), mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_attach_tile_worker,
+                                 initargs=((result_block.name, result.shape), profile_specs)) as pool:
+            chunksize = max(1, len(tiles) // (workers * 4))
+            try:
+                for done, _ in enumerate(pool.map(_compute_tile, tiles, chunksize=chunksize), 1):
+                    if progress is not None:
+                        progress(done / len(tiles))
+            except BaseException:
+                pool.shutdown(cancel_futures=True)
+                raise
+        distances = result.copy()
+        del result
+        return distances
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def compute_distance_matrix(encoding, distance_params=None, progress=None):
+    """
+    Computes the distance matrix with the mode chosen in the settings.
+
+    Parameters:
+        encoding (MarkerEncoding): Encoded markers.
+        distance_params (dict, optional): 'parallel', 'workers' and 'tile_size' settings.
+        progress (callable, optional): Called with the fraction of the matrix done.
+
+    Returns:
+        numpy.ndarray: Symmetric (n_species, n_species) float64 distance matrix.
+    """
+    distance_params = distance_params or {}
+    tile_size = distance_params.get('tile_size', 512)
+    parallel = distance_params.get('parallel', False)
+    with span('distances', species=encoding.n_species, parallel=parallel):
+        if parallel:
+            return parallel_distance_matrix(encoding, distance_params.get('workers', 0), tile_size, progress)
+        return pairwise_distance_matrix(encoding, batch_size=tile_size, progress=progress)
+
+
+class DistanceMatrixView(Mapping):
+    """
+    Read-only dict-of-dicts view over a distance array.
+
+    Supports distance_matrix[sp1][sp2] lookups without materialising S x S Python objects.
+    """
+
+    def __init__(self, species, distances):
+        self.species = species
+        self.distances = distances
+        self.index = {name: i for i, name in enumerate(species)}
+
+    def __getitem__(self, name):
+        return _DistanceRow(self, self.index[name])
+
+    def __iter__(self):
+        return iter(self.species)
+
+    def __len__(self):
+        return len(self.species)
+
+
+class _DistanceRow(Mapping):
+    def __init__(self, view, row):
+        self.view = view
+        self.row = row
+
+    def __getitem__(self, name):
+        return float(self.view.distances[self.row, self.view.index[name]])
+
+    def __iter__(self):
+        return iter(self.view.species)
+
+    def __len__(self):
+        return len(self.view.species)
@@ -0,0 +1,220 @@
+# mod_edge_index.py
+
+import numpy as np
+
+EDGE_FILTER_MODES = ('all', 'threshold', 'knn', 'mst')
+# Neighbors kept per node for the k-nearest filter
+MAX_NEIGHBORS = 16
+# Rows of the distance matrix processed at once
+BLOCK_ROWS = 1024
+# Sorted pairs whose row and column are derived at once
+PAIR_BLOCK = 1 << 20
+
+
+def minimum_spanning_tree(distances):
+    """
+    Prim's algorithm on a dense distance matrix, O(S^2).
+
+    Species with no finite distance to the rest start new components, so the
+    result is a spanning forest.
+
+    Parameters:
+        distances (numpy.ndarray): (S, S) symmetric distances; inf means not comparable.
+
+    Returns:
+        tuple: ((n, 2) int64 edges, (n,) float64 weights).
+    """
+    n = len(distances)
+    in_tree = np.zeros(n, dtype=bool)
+    best = np.full(n, np.inf)
+    parent = np.full(n, -1, dtype=np.int64)
+    for _ in range(n):
+        candidates = np.where(in_tree, np.inf, best)
+        u = int(np.argmin(candidates))
+        if not np.isfinite(candidates[u]):
+            # Nothing reachable: the first species outside the tree starts a new component
+            u = int(np.argmin(in_tree))
+        in_tree[u] = True
+        row = distances[u]
+        closer = ~in_tree & (row < best)
+        best[closer] = row[closer]
+        parent[closer] = u
+    children = np.flatnonzero(parent >= 0)
+    edges = np.column_stack([parent[children], children])
+    return edges, best[children]
+
+
+def nearest_neighbors(distances, k):
+    """
+    The k nearest other species of every species.
+
+    Parameters:
+        distances (numpy.ndarray): (S, S) distances.
+        k (int): Neighbors per species.
+
+    Returns:
+        numpy.ndarray: (S, k) int64 neighbor indices, closest first; -1 where fewer
+        than k species have a finite distance.
+    """
+    n = len(distances)
+    k = min(k, n - 1)
+    neighbors = np.full((n, max(k, 0)), -1, dtype=np.int64)
+    if k <= 0:
+        return neighbors
+    for start in range(0, n, BLOCK_ROWS):
+        block = np.array(distances[start:start + BLOCK_ROWS], dtype=np.float64)
+        rows = np.arange(len(block))
+        block[rows, start + rows] = np.inf
+        nearest = np.argpartition(block, k - 1, axis=1)[:, :k]
+        nearest_distances = np.take_along_axis(block, nearest, axis=1)
+        order = np.argsort(nearest_distances, axis=1, kind='stable')
+        nearest = np.take_along_axis(nearest, order, axis=1)
+        nearest[~np.isfinite(np.take_along_axis(nearest_distances, order, axis=1))] = -1
+        neighbors[start:start + len(block)] = nearest
+    return neighbors
+
+
+def sorted_pairs(distances, block_pairs=PAIR_BLOCK):
+    """
+    Every comparable species pair, by increasing distance.
+
+    The upper triangle is copied once into condensed float32 weights and
+    sorted there. Rows and columns are derived from the sorted condensed
+    positions block by block, so no S^2 int64 row/column arrays are built.
+
+    Parameters:
+        distances (numpy.ndarray): (S, S) symmetric distances; inf means not comparable.
+        block_pairs (int): Pairs converted to rows and columns at once.
+
+    Returns:
+        tuple: ((E, 2) uint32 pairs, (E,) float32 weights).
+    """
+    n = len(distances)
+    # Condensed position of the first pair of every row
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.arange(n - 1, -1, -1))
+    condensed = np.empty(int(offsets[-1]), dtype=np.float32)
+    for row in range(n - 1):
+        condensed[offsets[row]:offsets[row + 1]] = distances[row, row + 1:]
+    # inf and NaN sort last
+    order = np.argsort(condensed)
+    count = int(np.isfinite(condensed).sum())
+    weights = condensed[order[:count]]
+    pairs = np.empty((count, 2), dtype=np.uint32)
+    for start in range(0, count, block_pairs):
+        positions = order[start:min(start + block_pairs, count)]
+        # Inverse of the condensed offset, corrected for float rounding
+        rows = (n - 2 - np.floor(np.sqrt(4.0 * n * (n - 1) - 7 - 8.0 * positions) / 2 - 0.5)).astype(np.int64)
+        rows -= offsets[rows] > positions
+        rows += offsets[rows + 1] <= positions
+        pairs[start:start + len(positions), 0] = rows
+        pairs[start:start + len(positions), 1] = positions - offsets[rows] + rows + 1
+    return pairs, weights
+
+
+class EdgeIndex:
+    """
+    Precomputed display filters over the pairwise species distances.
+
+    Holds every comparable species pair sorted by distance, the k-nearest
+    neighbor graph sorted by neighbor rank and the minimum spanning tree.
+    'Edges below d' and 'k nearest per node' are then a binary search plus a
+    slice of a sorted array, so moving a slider never rebuilds anything.
+    """
+
+    def __init__(self, pairs, weights, knn_pairs, knn_weights, knn_ranks, mst_pairs, mst_weights):
+        self.pairs = pairs
+        self.weights = weights
+        self.knn_pairs = knn_pairs
+        self.knn_weights = knn_weights
+        self.knn_ranks = knn_ranks
+        self.mst_pairs = mst_pairs
+        self.mst_weights = mst_weights
+
+    @classmethod
+    def from_distances(cls, distances, max_neighbors=MAX_NEIGHBORS, progress=None):
+        """
+        Builds the index from a species distance matrix.
+
+        Takes seconds and memory on the order of the matrix for thousands of
+        species, so it belongs on a worker thread, next to the tree build.
+
+        Parameters:
+            distances (numpy.ndarray): (S, S) symmetric distances; inf means not comparable.
+            max_neighbors (int): Largest k served by nearest().
+            progress (callable, optional): Called with the fraction done after each part.
+
+        Returns:
+            EdgeIndex: The index; node indices refer to rows of the matrix.
+        """
+        report = progress or (lambda fraction: None)
+        distances = np.asarray(distances, dtype=np.float64)
+        n = len(distances)
+
+        # All comparable pairs, by increasing distance
+        pairs, weights = sorted_pairs(distances)
+        report(0.5)
+
+        # k-nearest graph: an undirected edge gets the better of its two neighbor ranks
+        neighbors = nearest_neighbors(distances, max_neighbors)
+        source = np.repeat(np.arange(n), neighbors.shape[1])
+        target = neighbors.reshape(-1)
+        ranks = np.tile(np.arange(1, neighbors.shape[1] + 1), n)
+        valid = target >= 0
+        lo = np.minimum(source[valid], target[valid])
+        hi = np.maximum(source[valid], target[valid])
+        ranks = ranks[valid]
+        keys = lo * n + hi
+        order = np.lexsort((ranks, keys))
+        first = np.r_[True, keys[order][1:] != keys[order][:-1]] if len(order) else np.zeros(0, dtype=bool)
+        unique = order[first]
+        by_rank = unique[np.argsort(ranks[unique], kind='stable')]
+        knn_pairs = np.column_stack([lo[by_rank], hi[by_rank]]).astype(np.uint32)
+        report(0.7)
+
+        mst_pairs, mst_weights = minimum_spanning_tree(distances)
+        report(1.0)
+        return cls(pairs, weights, knn_pairs, distances[lo[by_rank], hi[by_rank]], ranks[by_rank],
+                   mst_pairs.astype(np.uint32), mst_weights)
+
+    @property
+    def max_neighbors(self):
+        return int(self.knn_ranks.max()) if len(self.knn_ranks) else 0
+
+    def weight_range(self):
+        """
+        Returns:
+            tuple: (smallest, largest) pairwise distance, or (0.0, 0.0) without pairs.
+        """
+        if not len(self.weights):
+            return 0.0, 0.0
+        return float(self.weights[0]), float(self.weights[-1])
+
+    def below(self, distance):
+        """
+        Pairs at most the given distance apart, in O(log E).
+
+        Returns:
+            tuple: ((n, 2) uint32 pairs, (n,) weights), views into the index.
+        """
+        count = np.searchsorted(self.weights, distance, side='right')
+        return self.pairs[:count], self.weights[:count]
+
+    def nearest(self, k):
+        """
+        Edges from every node to its k nearest neighbors, in O(log E).
+
+        Returns:
+            tuple: ((n, 2) uint32 pairs, (n,) weights), views into the index.
+        """
+        count = np.searchsorted(self.knn_ranks, k, side='right')
+        return self.knn_pairs[:count], self.knn_weights[:count]
+
+    def backbone(self):
+        """
+        Minimum spanning tree (forest) edges.
+
+        Returns:
+            tuple: ((S - components, 2) uint32 pairs, weights).
+        """
+        return self.mst_pairs, self.mst_weights
@@ -0,0 +1,114 @@
+# mod_frame_scheduler.py
+
+import time
+from collections import deque
+
+import numpy as np
+from PyQt5 import QtCore
+
+# Number of recent frames kept for the frame-time percentiles
+STATS_WINDOW = 240
+
+
+class FrameTimeStats:
+    """
+    Rolling window of frame durations.
+    """
+
+    def __init__(self, window=STATS_WINDOW):
+        self.durations = deque(maxlen=window)
+        self.frames = 0
+
+    def add(self, seconds):
+        self.durations.append(seconds)
+        self.frames += 1
+
+    def reset(self):
+        self.durations.clear()
+        self.frames = 0
+
+    def summary(self):
+        """
+        Returns:
+            dict: Total frame count and, over the window, the mean, p50, p95, p99
+            and maximum frame time in milliseconds.
+        """
+        durations = np.array(self.durations) * 1000.0
+        if not len(durations):
+            durations = np.zeros(1)
+        p50, p95, p99 = np.percentile(durations, [50, 95, 99])
+        return {
+            'frames': self.frames,
+            'window': len(self.durations),
+            'mean_ms': float(durations.mean()),
+            'p50_ms': float(p50),
+            'p95_ms': float(p95),
+            'p99_ms': float(p99),
+            'max_ms': float(durations.max()),
+        }
+
+
+class FrameScheduler(QtCore.QObject):
+    """
+    Repaints a widget only when something has changed.
+
+    Callers mark the view dirty with request_frame(). Requests arriving before
+    the frame is painted are coalesced into a single widget.update(), and with
+    max_fps set, frames start at least 1 / max_fps seconds apart. When nothing
+    is pending the scheduler is idle: no timer runs and nothing is repainted.
+    The widget brackets its paint with begin_frame() and end_frame(), which
+    also feed the frame-time statistics.
+    """
+
+    def __init__(self, widget, max_fps=0, stats_window=STATS_WINDOW):
+        super().__init__(widget)
+        self.widget = widget
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.dirty = set()
+        self.scheduled = False
+        self.requests = 0
+        self.last_frame_start = None
+        self.frame_start = None
+        self.stats = FrameTimeStats(stats_window)
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.widget.update)
+
+    @property
+    def idle(self):
+        return not self.scheduled and not self.dirty
+
+    def request_frame(self, reason='view'):
+        """
+        Marks the view dirty and schedules a repaint unless one is already pending.
+
+        Parameters:
+            reason (str): What changed, e.g. 'view', 'hover' or 'data'; returned by begin_frame.
+        """
+        self.requests += 1
+        self.dirty.add(reason)
+        if self.scheduled:
+            return
+        self.scheduled = True
+        delay = 0.0
+        if self.min_interval and self.last_frame_start is not None:
+            delay = max(0.0, self.min_interval - (time.perf_counter() - self.last_frame_start))
+        self.timer.start(int(delay * 1000 + 0.5))
+
+    def begin_frame(self):
+        """
+        Starts timing a frame and clears the pending requests.
+
+        Returns:
+            set: Reasons requested since the previous frame; empty for repaints Qt triggered itself.
+        """
+        self.frame_start = self.last_frame_start = time.perf_counter()
+        reasons, self.dirty = self.dirty, set()
+        self.scheduled = False
+        self.timer.stop()
+        return reasons
+
+    def end_frame(self):
+        if self.frame_start is not None:
+            self.stats.add(time.perf_counter() - self.frame_start)
+            self.frame_start = None
@@ -0,0 +1,365 @@
+# mod_graph.py
+
+import networkx as nx
+import numpy as np
+
+DEFAULT_ATTRIBUTE = 'default'
+
+
+def encode_names(names):
+    """
+    Packs strings into an offsets array and one UTF-8 byte blob.
+
+    Returns:
+        tuple: (uint64 offsets of length len(names) + 1, uint8 data).
+    """
+    encoded = [str(name).encode('utf-8') for name in names]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    np.cumsum([len(name) for name in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+def decode_names(name_offsets, name_data):
+    """
+    Returns:
+        list of str: The names packed by encode_names.
+    """
+    data = bytes(name_data)
+    offsets = np.asarray(name_offsets).tolist()
+    return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+
+def unbounded_times(count):
+    """
+    Returns:
+        numpy.ndarray: (count, 2) float32 [-inf, inf] lifetimes.
+    """
+    times = np.empty((count, 2), dtype=np.float32)
+    times[:, 0] = -np.inf
+    times[:, 1] = np.inf
+    return times
+
+
+class CompactGraph:
+    """
+    Undirected graph held as arrays: integer node ids, an edge list and one array per attribute.
+
+    Node i is described by row i of every node array and edge e by row e of
+    every edge array, the same layout a Scene uses, so neither direction of
+    that conversion copies. Adjacency is a CSR index built from the edge list
+    on first use. Names are packed into one UTF-8 blob and looked up through
+    a dict that is also built on first use. The pipeline works on this class
+    end to end; networkx and igraph graphs are converted at its boundaries.
+
+    Attributes:
+        name_offsets (numpy.ndarray): (n_nodes + 1,) uint64 offsets into name_data.
+        name_data (numpy.ndarray): UTF-8 bytes of all node names.
+        edges (numpy.ndarray): (n_edges, 2) int32 node id pairs.
+        weights (numpy.ndarray): (n_edges,) float64 edge weights (branch lengths).
+        internal (numpy.ndarray): (n_nodes,) uint8, 1 for inferred ancestors.
+        positions (numpy.ndarray or None): (n_nodes, 3) float32 positions, None before layout.
+        attribute_codes (numpy.ndarray): (n_nodes,) uint16 index into attribute_names.
+        attribute_names (list of str): Attribute string table; code 0 is DEFAULT_ATTRIBUTE.
+        node_times (numpy.ndarray): (n_nodes, 2) float32 [start, end] lifetime; -inf/inf when unbounded.
+        edge_times (numpy.ndarray or None): (n_edges, 2) float32 lifetimes; None means an edge
+            exists while both its nodes do.
+    """
+
+    def __init__(self, names, edges, weights=None, internal=None, positions=None, attribute_codes=None,
+                 attribute_names=None, node_times=None, edge_times=None):
+        """
+        Parameters:
+            names (sequence or tuple): Node names in id order, or an already encoded
+                (name_offsets, name_data) pair.
+            edges (array-like): (n_edges, 2) node id pairs.
+            weights (array-like, optional): Edge weights; 1.0 if None.
+            Other parameters set the attributes of the same name and default to
+            leaves, no positions, the default attribute and unbounded lifetimes.
+        """
+        if isinstance(names, tuple):
+            self.name_offsets, self.name_data = names
+        else:
+            self.name_offsets, self.name_data = encode_names(names)
+        n = len(self.name_offsets) - 1
+        self.edges = np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+        m = len(self.edges)
+        self.weights = np.ones(m) if weights is None else np.asarray(weights, dtype=np.float64)
+        self.internal = np.zeros(n, dtype=np.uint8) if internal is None else np.asarray(internal, dtype=np.uint8)
+        self.positions = None if positions is None else np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        self.attribute_codes = (np.zeros(n, dtype=np.uint16) if attribute_codes is None
+                                else np.asarray(attribute_codes, dtype=np.uint16))
+        self.attribute_names = list(attribute_names or [DEFAULT_ATTRIBUTE])
+        self.node_times = unbounded_times(n) if node_times is None else np.asarray(node_times, dtype=np.float32)
+        self.edge_times = None if edge_times is None else np.asarray(edge_times, dtype=np.float32)
+        self._csr = None
+        self._index = None
+
+    @property
+    def n_nodes(self):
+        return len(self.name_offsets) - 1
+
+    @property
+    def n_edges(self):
+        return len(self.edges)
+
+    def __len__(self):
+        return self.n_nodes
+
+    def __contains__(self, name):
+        return name in self.index()
+
+    @property
+    def nbytes(self):
+        """
+        Bytes held by the graph's arrays, including the CSR index once built.
+        """
+        arrays = [self.name_offsets, self.name_data, self.edges, self.weights, self.internal,
+                  self.attribute_codes, self.node_times]
+        arrays += [array for array in (self.positions, self.edge_times) if array is not None]
+        arrays += list(self._csr or ())
+        return sum(array.nbytes for array in arrays)
+
+    def node_name(self, node):
+        start, stop = self.name_offsets[node], self.name_offsets[node + 1]
+        return bytes(self.name_data[start:stop]).decode('utf-8')
+
+    def node_names(self):
+        """
+        Returns:
+            list of str: Every node name, in id order.
+        """
+        return decode_names(self.name_offsets, self.name_data)
+
+    def index(self):
+        # Name -> node id, built on first use
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.node_names())}
+        return self._index
+
+    def node_id(self, name):
+        return self.index()[name]
+
+    def csr(self):
+        """
+        Returns:
+            tuple: (indptr, neighbors, edge ids): the neighbors of node i and the edges
+            leading to them are neighbors[indptr[i]:indptr[i + 1]] and edge ids[...] alike,
+            in edge list order.
+        """
+        if self._csr is None:
+            m = self.n_edges
+            ends = np.concatenate([self.edges[:, 0], self.edges[:, 1]])
+            order = np.argsort(ends, kind='stable')
+            indptr = np.zeros(self.n_nodes + 1, dtype=np.int64)
+            np.cumsum(np.bincount(ends, minlength=self.n_nodes), out=indptr[1:])
+            neighbors = np.concatenate([self.edges[:, 1], self.edges[:, 0]])[order].astype(np.int32)
+            edge_ids = (order % max(m, 1)).astype(np.int32)
+            self._csr = (indptr, neighbors, edge_ids)
+        return self._csr
+
+    def neighbors(self, node):
+        indptr, neighbors, _ = self.csr()
+        return neighbors[indptr[node]:indptr[node + 1]]
+
+    def degrees(self):
+        return np.diff(self.csr()[0])
+
+    def root(self):
+        """
+        The root the tree builders imply: the last internal node, else the highest-degree node.
+        """
+        internal = np.flatnonzero(self.internal)
+        if len(internal):
+            return int(internal[-1])
+        return int(np.argmax(self.degrees()))
+
+    def preorder(self, root):
+        """
+        Depth-first traversal from root, visiting neighbors in edge list order.
+
+        Returns:
+            tuple: (preorder node ids, parent of each node, edge to the parent), the last two
+            (n_nodes,) int64 with -1 for the root and for nodes root cannot reach.
+        """
+        indptr, neighbors, edge_ids = (array.tolist() for array in self.csr())
+        parent = [-1] * self.n_nodes
+        parent_edge = [-1] * self.n_nodes
+        seen = [False] * self.n_nodes
+        seen[root] = True
+        order = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            # Pushed in reverse so the first neighbor is visited first
+            for k in range(indptr[node + 1] - 1, indptr[node] - 1, -1):
+                child = neighbors[k]
+                if not seen[child]:
+                    seen[child] = True
+                    parent[child] = node
+                    parent_edge[child] = edge_ids[k]
+                    stack.append(child)
+        return (np.array(order, dtype=np.int64), np.array(parent, dtype=np.int64),
+                np.array(parent_edge, dtype=np.int64))
+
+    def lifetimes(self):
+        """
+        Returns:
+            numpy.ndarray: (n_edges, 2) float32 edge lifetimes, by default the overlap of
+            the lifetimes of both ends.
+        """
+        if self.edge_times is not None:
+            return self.edge_times
+        times = self.node_times
+        return np.column_stack([np.maximum(times[self.edges[:, 0], 0], times[self.edges[:, 1], 0]),
+                                np.minimum(times[self.edges[:, 0], 1], times[self.edges[:, 1], 1])])
+
+    def with_positions(self, positions):
+        """
+        Returns:
+            CompactGraph: A graph sharing every array with this one except the positions.
+        """
+        graph = self.copy(deep=False)
+        graph.positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        return graph
+
+    def copy(self, deep=True):
+        copy = np.copy if deep else (lambda array: array)
+        graph = CompactGraph(
+            (copy(self.name_offsets), copy(self.name_data)), copy(self.edges), copy(self.weights),
+            internal=copy(self.internal),
+            positions=None if self.positions is None else copy(self.positions),
+            attribute_codes=copy(self.attribute_codes), attribute_names=self.attribute_names,
+            node_times=copy(self.node_times),
+            edge_times=None if self.edge_times is None else copy(self.edge_times),
+        )
+        if not deep:
+            graph._csr, graph._index = self._csr, self._index
+        return graph
+
+    def subgraph(self, keep):
+        """
+        Parameters:
+            keep (numpy.ndarray): (n_nodes,) boolean mask of the nodes to keep.
+
+        Returns:
+            CompactGraph: The kept nodes, renumbered in order, and the edges between them.
+        """
+        keep = np.asarray(keep, dtype=bool)
+        new_ids = np.cumsum(keep) - 1
+        kept_edges = keep[self.edges[:, 0]] & keep[self.edges[:, 1]]
+        names = [name for name, kept in zip(self.node_names(), keep.tolist()) if kept]
+        return CompactGraph(
+            names, new_ids[self.edges[kept_edges]], self.weights[kept_edges],
+            internal=self.internal[keep],
+            positions=None if self.positions is None else self.positions[keep],
+            attribute_codes=self.attribute_codes[keep], attribute_names=self.attribute_names,
+            node_times=self.node_times[keep],
+            edge_times=None if self.edge_times is None else self.edge_times[kept_edges],
+        )
+
+    def remove_nodes(self, names):
+        # Subgraph without the named nodes; unknown names are ignored
+        keep = np.ones(self.n_nodes, dtype=bool)
+        index = self.index()
+        keep[[index[name] for name in names if name in index]] = False
+        return self.subgraph(keep)
+
+    @classmethod
+    def from_networkx(cls, G, weight='weight'):
+        """
+        Converts a networkx graph, reading the node attributes 'pos', 'internal', 'attribute',
+        'start_time' and 'end_time' and the edge attributes weight, 'start_time' and 'end_time'.
+
+        Returns:
+            CompactGraph: Nodes in G's node order, edges in G's edge order.
+        """
+        nodes = list(G.nodes())
+        index = {node: i for i, node in enumerate(nodes)}
+        attribute_index = {DEFAULT_ATTRIBUTE: 0}
+        attribute_codes = [attribute_index.setdefault(data.get('attribute', DEFAULT_ATTRIBUTE), len(attribute_index))
+                           for _, data in G.nodes(data=True)]
+        positions = None
+        if any('pos' in data for _, data in G.nodes(data=True)):
+            positions = np.array([data.get('pos', (0.0, 0.0, 0.0)) for _, data in G.nodes(data=True)],
+                                 dtype=np.float32).reshape(-1, 3)
+        edge_data = list(G.edges(data=True))
+        graph = cls(
+            nodes, [(index[u], index[v]) for u, v, _ in edge_data],
+            [data.get(weight, 1.0) for _, _, data in edge_data],
+            internal=[bool(data.get('internal', False)) for _, data in G.nodes(data=True)],
+            positions=positions,
+            attribute_codes=attribute_codes,
+            attribute_names=list(attribute_index),
+            node_times=np.array([(data.get('start_time', -np.inf), data.get('end_time', np.inf))
+                                 for _, data in G.nodes(data=True)], dtype=np.float32).reshape(-1, 2),
+        )
+        if any('start_time' in data or 'end_time' in data for _, _, data in edge_data):
+            edge_times = graph.lifetimes().copy()
+            for i, (_, _, data) in enumerate(edge_data):
+                if 'start_time' in data or 'end_time' in data:
+                    edge_times[i] = (data.get('start_time', -np.inf), data.get('end_time', np.inf))
+            graph.edge_times = edge_times
+        graph._index = index if all(isinstance(node, str) for node in nodes) else None
+        return graph
+
+    def to_networkx(self):
+        """
+        Builds a networkx graph for code that still needs one.
+
+        Returns:
+            networkx.Graph: Nodes with 'internal', 'pos' when laid out, 'attribute' when not
+            the default and finite 'start_time'/'end_time'; edges with 'weight'.
+        """
+        names = self.node_names()
+        G = nx.Graph()
+        for i, name in enumerate(names):
+            attrs = {'internal': bool(self.internal[i])}
+            if self.positions is not None:
+                attrs['pos'] = self.positions[i]
+            attribute = self.attribute_names[self.attribute_codes[i]]
+            if attribute != DEFAULT_ATTRIBUTE:
+                attrs['attribute'] = attribute
+            start, end = self.node_times[i].tolist()
+            if np.isfinite(start):
+                attrs['start_time'] = start
+            if np.isfinite(end):
+                attrs['end_time'] = end
+            G.add_node(name, **attrs)
+        G.add_weighted_edges_from(
+            (names[u], names[v], weight) for (u, v), weight in zip(self.edges.tolist(), self.weights.tolist())
+        )
+        if self.edge_times is not None:
+            for (u, v), (start, end) in zip(self.edges.tolist(), self.edge_times.tolist()):
+                G.edges[names[u], names[v]].update(start_time=start, end_time=end)
+        return G
+
+    @classmethod
+    def from_igraph(cls, g, weight='weight'):
+        """
+        Converts an igraph graph; node names come from the 'name' vertex attribute, else the ids.
+        """
+        names = g.vs['name'] if 'name' in g.vs.attributes() else [str(i) for i in range(g.vcount())]
+        weights = g.es[weight] if weight in g.es.attributes() else None
+        return cls(names, g.get_edgelist(), weights)
+
+    def to_igraph(self):
+        """
+        Returns:
+            igraph.Graph: Undirected graph with a 'name' vertex and a 'weight' edge attribute.
+        """
+        import igraph as ig
+        g = ig.Graph(n=self.n_nodes, edges=self.edges.tolist(), directed=False)
+        g.vs['name'] = self.node_names()
+        g.es['weight'] = self.weights.tolist()
+        return g
+
+
+def as_compact_graph(G):
+    """
+    Returns:
+        CompactGraph or None: G itself if already compact or None, else G converted from networkx.
+    """
+    if G is None or isinstance(G, CompactGraph):
+        return G
+    return CompactGraph.from_networkx(G)
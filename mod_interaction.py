@@ -1,9 +1,18 @@
 # mod_interaction.py
 
+from PyQt5 import QtWidgets
+from mod_pipeline import PipelineRunner
+from mod_cache import layout_cache_from_settings, data_cache_from_settings
+from mod_scene import load_scene, save_scene
+from config_constants import SCENE_EXTENSION
+
 class Interaction:
     def __init__(self, visualization, ui):
         self.viz = visualization
         self.ui = ui
+        self.data_cache = data_cache_from_settings(ui.settings)
+        self.layout_cache = layout_cache_from_settings(ui.settings)
+        self.pipeline = PipelineRunner(ui)
         self.connect_signals()
     
     def connect_signals(self):
@@ -13,6 +22,16 @@ class Interaction:
         self.ui.reset_view_button.clicked.connect(self.reset_view)
         # load data button
         self.ui.load_data_button.clicked.connect(self.load_data)
+        self.ui.save_scene_button.clicked.connect(self.save_scene)
+        # Background loading
+        self.ui.cancel_load_button.clicked.connect(self.pipeline.cancel)
+        self.pipeline.progress.connect(self.ui.show_load_progress)
+        self.pipeline.preview.connect(self.show_loaded)
+        self.pipeline.finished.connect(self.finish_load)
+        self.pipeline.failed.connect(self.load_failed)
+        self.pipeline.cancelled.connect(self.ui.end_load_progress)
+        # Stop the running load and drop queued ones when the application quits
+        QtWidgets.QApplication.instance().aboutToQuit.connect(self.pipeline.shutdown)
 
         
         # Rotation buttons
@@ -35,22 +54,50 @@ class Interaction:
         self.viz,
         "Open Data File",
         "",
-        "CSV Files (*.csv);;JSON Files (*.json)",
+        f"CSV Files (*.csv);;JSON Files (*.json);;Scene Files (*{SCENE_EXTENSION})",
         options=options
     )
+        if not file_name:
+            return
+        if not file_name.endswith(SCENE_EXTENSION):
+            # Loading, distances, tree building and layout run in the background;
+            # the current tree keeps rendering until the new one is ready
+            self.pipeline.start(file_name, self.ui.settings, self.data_cache, self.layout_cache)
+            self.ui.show_load_progress('load', 0.0)
+            return
         try:
-            raw_data = load_data(file_name)
-            processed_data = process_data(raw_data)
-            tree = generate_tree(processed_data)
-            self.viz.update_tree(tree)
+            self.pipeline.cancel()
+            self.viz.set_scene(load_scene(file_name))
         except Exception as e:
-            QtWidgets.QMessageBox.critical(self.viz, "Error", f"Failed to load data:\n{e}")
+            self.load_failed(str(e))
+
+    def show_loaded(self, result):
+        # Swaps in a pipeline result (also its coarse preview) in one step
+        self.viz.update_tree(result['tree'])
+        self.viz.set_edge_source(result['species'], result['edge_index'])
+
+    def finish_load(self, result):
+        self.ui.end_load_progress()
+        self.show_loaded(result)
 
+    def load_failed(self, message):
+        self.ui.end_load_progress()
+        QtWidgets.QMessageBox.critical(self.viz, "Error", f"Failed to load data:\n{message}")
+
+    def save_scene(self):
+        file_name, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self.viz, "Save Scene", "", f"Scene Files (*{SCENE_EXTENSION})")
+        if not file_name or self.viz.scene is None:
+            return
+        if not file_name.endswith(SCENE_EXTENSION):
+            file_name += SCENE_EXTENSION
+        try:
+            save_scene(file_name, self.viz.scene)
+        except OSError as e:
+            QtWidgets.QMessageBox.critical(self.viz, "Error", f"Failed to save scene:\n{e}")
 
     def reset_view(self):
-        self.viz.zoom = -100
-        self.viz.rotation = [0, 0, 0]
-        self.viz.update()
+        self.viz.reset_view()
     
     def rotate_view(self, axis, angle):
         """
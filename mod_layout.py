@@ -0,0 +1,589 @@
+# mod_layout.py
+
+import inspect
+
+import networkx as nx
+import numpy as np
+
+from mod_graph import CompactGraph
+from mod_tracing import span
+
+DEFAULT_LAYOUT = 'barnes_hut'
+
+
+def graph_arrays(G, weight='weight'):
+    """
+    Converts a graph to index arrays for the layout kernels.
+
+    Parameters:
+        G (CompactGraph or networkx.Graph): Graph to lay out.
+        weight (str): Edge attribute holding the edge weight; a CompactGraph has only its weights.
+
+    Returns:
+        tuple: (node list, (n_edges, 2) int64 edge index array, edge weights).
+    """
+    if isinstance(G, CompactGraph):
+        return G.node_names(), G.edges.astype(np.int64), G.weights
+    nodes = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = np.array([(index[u], index[v]) for u, v in G.edges()], dtype=np.int64).reshape(-1, 2)
+    weights = np.array([data.get(weight, 1.0) for _, _, data in G.edges(data=True)], dtype=np.float64)
+    return nodes, edges, weights
+
+
+def initial_positions(nodes, init_pos, rng):
+    """
+    Builds starting positions, keeping given ones and placing the rest at random.
+
+    Parameters:
+        nodes (list): Node order.
+        init_pos (dict or numpy.ndarray, optional): Existing positions by node, or an (n, 3) array.
+        rng (numpy.random.Generator): Random source for unplaced nodes.
+
+    Returns:
+        tuple: (positions as (n, 3) float64 array, boolean mask of nodes that had a position).
+    """
+    n = len(nodes)
+    positions = rng.uniform(-1, 1, size=(n, 3))
+    known = np.zeros(n, dtype=bool)
+    if init_pos is None:
+        return positions, known
+    if isinstance(init_pos, np.ndarray):
+        positions[:] = init_pos
+        known[:] = True
+        return positions, known
+    for i, node in enumerate(nodes):
+        if node in init_pos:
+            positions[i] = init_pos[node]
+            known[i] = True
+    if known.any() and not known.all():
+        # Place new nodes inside the bounding box of the existing ones
+        lo = positions[known].min(axis=0)
+        hi = positions[known].max(axis=0)
+        positions[~known] = lo + (hi - lo) * rng.random(((~known).sum(), 3))
+    return positions, known
+
+
+def rescale(positions, scale=1.0):
+    """
+    Centers positions and scales them into [-scale, scale], like networkx.rescale_layout.
+    """
+    positions = positions - positions.mean(axis=0)
+    extent = np.abs(positions).max()
+    if extent > 0:
+        positions *= scale / extent
+    return positions
+
+
+def morton_codes(cells):
+    """
+    Interleaves integer cell coordinates into 3D Morton (Z-order) codes.
+
+    Parameters:
+        cells (numpy.ndarray): (n, 3) integer coordinates below 2**21.
+
+    Returns:
+        numpy.ndarray: uint64 codes.
+    """
+    def spread(x):
+        x = x.astype(np.uint64) & np.uint64(0x1FFFFF)
+        x = (x | x << np.uint64(32)) & np.uint64(0x1F00000000FFFF)
+        x = (x | x << np.uint64(16)) & np.uint64(0x1F0000FF0000FF)
+        x = (x | x << np.uint64(8)) & np.uint64(0x100F00F00F00F00F)
+        x = (x | x << np.uint64(4)) & np.uint64(0x10C30C30C30C30C3)
+        x = (x | x << np.uint64(2)) & np.uint64(0x1249249249249249)
+        return x
+    return (spread(cells[:, 0]) << np.uint64(2)) | (spread(cells[:, 1]) << np.uint64(1)) | spread(cells[:, 2])
+
+
+class Octree:
+    """
+    Linear octree over a point set, stored level by level as sorted Morton-code cells.
+
+    Attributes:
+        order (numpy.ndarray): Point indices sorted by Morton code.
+        levels (list of dict): Per level 'keys', 'start', 'count', 'com' (center of mass),
+            'size' (cell edge length) and the 'child_start'/'child_stop' ranges into the next level.
+    """
+
+    def __init__(self, positions, max_depth=10):
+        self.positions = positions
+        self.max_depth = max_depth
+        self.lo = positions.min(axis=0)
+        self.size = max(float((positions.max(axis=0) - self.lo).max()), 1e-12) * (1 + 1e-9)
+        codes = self.cell_codes(positions)
+        self.order = np.argsort(codes, kind='stable')
+        self.codes = codes[self.order]
+        sorted_positions = positions[self.order]
+
+        self.levels = []
+        for level in range(max_depth + 1):
+            keys_all = self.codes >> np.uint64(3 * (max_depth - level))
+            start = np.flatnonzero(np.r_[True, keys_all[1:] != keys_all[:-1]])
+            count = np.diff(np.r_[start, len(keys_all)])
+            sums = np.add.reduceat(sorted_positions, start, axis=0) if len(start) else np.zeros((0, 3))
+            self.levels.append({
+                'keys': keys_all[start],
+                'start': start,
+                'count': count,
+                'com': sums / count[:, None],
+                'size': self.size / (1 << level),
+            })
+        for level in range(max_depth):
+            parent_keys = self.levels[level + 1]['keys'] >> np.uint64(3)
+            keys = self.levels[level]['keys']
+            self.levels[level]['child_start'] = np.searchsorted(parent_keys, keys, side='left')
+            self.levels[level]['child_stop'] = np.searchsorted(parent_keys, keys, side='right')
+
+    def cell_codes(self, positions):
+        # Morton codes of the deepest cells holding the positions, clamped into the tree's cube
+        side = 1 << self.max_depth
+        return morton_codes(np.clip(((positions - self.lo) / self.size * side).astype(np.int64), 0, side - 1))
+
+    def contains(self, level, cells, codes):
+        # Whether each deepest-cell code lies inside the paired cell of the given level
+        shift = np.uint64(3 * (self.max_depth - level))
+        return (codes >> shift) == self.levels[level]['keys'][cells]
+
+
+def expand_pairs(points, starts, stops):
+    """
+    Pairs every point with each child in its [start, stop) cell range.
+
+    Returns:
+        tuple: (repeated point indices, child cell indices).
+    """
+    counts = stops - starts
+    points = np.repeat(points, counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return points, np.repeat(starts, counts) + offsets
+
+
+def repulsive_displacement(tree, k, theta=1.0, queries=None, cutoff=None):
+    """
+    Approximates the all-pairs repulsion k^2 / d with the Barnes-Hut criterion.
+
+    Cells far enough away (size / distance < theta) act as a single mass at their
+    center of mass; the traversal is vectorised over (point, cell) pairs per level.
+
+    Parameters:
+        tree (Octree): Octree over the current positions.
+        k (float): Optimal distance.
+        theta (float): Opening angle; 0 means exact.
+        queries (numpy.ndarray, optional): (q, 3) points that are not in the tree, to compute
+            the repulsion of all tree points on instead of the tree points' own.
+        cutoff (float, optional): Only points closer than this repel.
+
+    Returns:
+        numpy.ndarray: (n, 3) displacement in the original point order, or (q, 3) for queries.
+    """
+    if queries is None:
+        sorted_positions = tree.positions[tree.order]
+        codes = tree.codes
+    else:
+        sorted_positions = np.asarray(queries, dtype=np.float64)
+        codes = tree.cell_codes(sorted_positions)
+    n = len(sorted_positions)
+    displacement = np.zeros((n, 3))
+    points = np.arange(n)
+    cells = np.zeros(n, dtype=np.int64)
+    theta2 = theta * theta
+    for level, cell_data in enumerate(tree.levels):
+        last = level == tree.max_depth
+        count = cell_data['count'][cells]
+        delta = sorted_positions[points] - cell_data['com'][cells]
+        distance2 = (delta * delta).sum(axis=1)
+        if cutoff is not None:
+            # Cells with no point that can be within the cutoff are skipped
+            reach = cutoff + np.where(count > 1, cell_data['size'] * 3 ** 0.5, 0.0)
+            near = distance2 <= reach * reach
+            points, cells, count, delta, distance2 = points[near], cells[near], count[near], delta[near], distance2[near]
+        mass = count.astype(np.float64)
+        inside = tree.contains(level, cells, codes[points])
+        if queries is not None:
+            # An outside point has no leaf of its own to skip, so every single point and deepest cell counts
+            accept = (count == 1) | last | (~inside & (cell_data['size'] ** 2 < theta2 * distance2))
+        else:
+            # Cells holding the point are opened; far cells and single-point leaves act as one mass
+            accept = ~inside & ((count == 1) | (cell_data['size'] ** 2 < theta2 * distance2) | last)
+        if last and queries is None:
+            # Coincident points sharing a deepest cell repel from the rest of that cell
+            shared = inside & (count > 1)
+            if shared.any():
+                mass[shared] -= 1
+                delta[shared] = (delta[shared] * count[shared, None]) / mass[shared, None]
+                distance2[shared] = (delta[shared] * delta[shared]).sum(axis=1)
+                accept |= shared
+
+        scale = k * k * mass[accept] / np.maximum(distance2[accept], 1e-18)
+        for axis in range(3):
+            displacement[:, axis] += np.bincount(points[accept], weights=scale * delta[accept, axis], minlength=n)
+
+        opened = ~accept & (count > 1)
+        if last or not opened.any():
+            break
+        points, cells = expand_pairs(points[opened], cell_data['child_start'][cells[opened]],
+                                     cell_data['child_stop'][cells[opened]])
+    if queries is not None:
+        return displacement
+    result = np.empty_like(displacement)
+    result[tree.order] = displacement
+    return result
+
+
+def attractive_displacement(positions, edges, k, strengths):
+    """
+    Spring attraction d^2 / k along every edge, scaled per edge.
+
+    Returns:
+        numpy.ndarray: (n, 3) displacement.
+    """
+    displacement = np.zeros_like(positions)
+    if not len(edges):
+        return displacement
+    delta = positions[edges[:, 0]] - positions[edges[:, 1]]
+    distance = np.sqrt((delta * delta).sum(axis=1))
+    force = (distance * strengths / k)[:, None] * delta
+    for axis in range(3):
+        displacement[:, axis] -= np.bincount(edges[:, 0], weights=force[:, axis], minlength=len(positions))
+        displacement[:, axis] += np.bincount(edges[:, 1], weights=force[:, axis], minlength=len(positions))
+    return displacement
+
+
+def barnes_hut_layout(G, seed=42, init_pos=None, iterations=50, theta=1.0, k=None, temperature=None,
+                      weight=None, scale=1.0, fixed=None, max_depth=10, progress=None):
+    """
+    Force-directed 3D layout with Barnes-Hut octree repulsion, O(n log n) per iteration.
+
+    Parameters:
+        G (CompactGraph or networkx.Graph): Graph to lay out.
+        seed (int): Seed for the random starting positions.
+        init_pos (dict or numpy.ndarray, optional): Existing positions to warm-start from.
+        iterations (int): Number of cooling iterations.
+        theta (float): Barnes-Hut opening angle.
+        k (float, optional): Optimal distance. Defaults to (volume / n) ** (1/3).
+        temperature (float, optional): Initial maximum step. Defaults to a tenth of the
+            layout extent, or a hundredth when every node is warm-started.
+        weight (str, optional): Edge attribute used as spring strength; uniform if None.
+        scale (float): Half-width of the returned layout; None keeps the raw coordinates.
+        fixed (iterable, optional): Nodes that keep their starting position.
+        max_depth (int): Octree depth.
+        progress (callable, optional): Called with the fraction of iterations done after each one.
+
+    Returns:
+        dict or numpy.ndarray: Node -> position of shape (3,), or for a CompactGraph
+        an (n_nodes, 3) array in node id order.
+    """
+    rng = np.random.default_rng(seed)
+    nodes, edges, weights = graph_arrays(G, weight or 'weight')
+    n = len(nodes)
+    if n == 0:
+        return layout_result(G, nodes, np.zeros((0, 3)))
+    positions, known = initial_positions(nodes, init_pos, rng)
+    if n == 1:
+        return layout_result(G, nodes, np.zeros((1, 3)) if scale is not None else positions)
+
+    strengths = weights if weight else np.ones(len(edges))
+    extent = max(float(np.ptp(positions, axis=0).max()), 1e-9)
+    if k is None:
+        k = extent / n ** (1 / 3)
+    if temperature is None:
+        temperature = extent * (0.01 if known.all() else 0.1)
+    movable = np.ones(n, dtype=bool)
+    if fixed is not None:
+        fixed = set(fixed)
+        movable = np.array([node not in fixed for node in nodes])
+
+    for step in range(iterations):
+        tree = Octree(positions, max_depth)
+        displacement = repulsive_displacement(tree, k, theta)
+        displacement += attractive_displacement(positions, edges, k, strengths)
+        length = np.sqrt((displacement * displacement).sum(axis=1))
+        limited = np.minimum(length, temperature * (1 - step / iterations)) / np.maximum(length, 1e-12)
+        positions += (displacement * limited[:, None]) * movable[:, None]
+        if progress is not None:
+            progress((step + 1) / iterations)
+
+    if scale is not None and fixed is None:
+        positions = rescale(positions, scale)
+    return layout_result(G, nodes, positions)
+
+
+def layout_result(G, nodes, positions):
+    # Layouts of a CompactGraph stay an array in node id order; networkx graphs get a dict
+    if isinstance(G, CompactGraph):
+        return np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    return dict(zip(nodes, positions))
+
+
+def place_unplaced(positions, placed, edges, scale, rng):
+    """
+    Places nodes without a position next to their placed neighbors.
+
+    Each pass puts the unplaced neighbors of placed nodes at the mean of those
+    neighbors plus a little jitter, so new nodes spread outward from the
+    existing layout. Nodes no placed node reaches go to random points inside it.
+
+    Parameters:
+        positions (numpy.ndarray): (n, 3) positions, updated in place.
+        placed (numpy.ndarray): (n,) boolean mask of nodes whose position is known.
+        edges (numpy.ndarray): (n_edges, 2) node index pairs.
+        scale (float): Size of the jitter.
+        rng (numpy.random.Generator): Random source.
+
+    Returns:
+        numpy.ndarray: positions.
+    """
+    placed = placed.copy()
+    while not placed.all():
+        known = placed[edges]
+        reach = np.concatenate([edges[known[:, 0] & ~known[:, 1]], edges[known[:, 1] & ~known[:, 0]][:, ::-1]])
+        if not len(reach):
+            lo, hi = ((positions[placed].min(axis=0), positions[placed].max(axis=0)) if placed.any()
+                      else (-np.ones(3), np.ones(3)))
+            positions[~placed] = lo + (hi - lo) * rng.random(((~placed).sum(), 3))
+            break
+        sums = np.zeros_like(positions)
+        counts = np.zeros(len(positions))
+        np.add.at(sums, reach[:, 1], positions[reach[:, 0]])
+        np.add.at(counts, reach[:, 1], 1)
+        new = counts > 0
+        positions[new] = sums[new] / counts[new, None] + rng.normal(scale=0.1 * scale, size=(new.sum(), 3))
+        placed |= new
+    return positions
+
+
+def relax_layout(G, movable, seed=42, iterations=30, theta=1.0, k=None, temperature=None, cutoff=None,
+                 max_depth=10, progress=None):
+    """
+    Force-directed relaxation of part of a laid-out graph; every other node stays where it is.
+
+    Repulsion is local: with the rest of the layout frozen, the far-field push
+    of all other nodes would no longer be balanced, so only nodes within the
+    cutoff repel. The fixed nodes' octree is built once and each iteration
+    only visits cells near the movable nodes, so the cost grows with the
+    number of movable nodes rather than with the graph. A frozen layout is
+    rarely at equilibrium, so the default temperature is low: movable nodes
+    settle near where they start instead of being pushed out of a crowd.
+    Movable nodes without a position start next to their placed neighbors.
+
+    Parameters:
+        G (CompactGraph): Laid-out graph; rows of G.positions that are not finite count as unplaced.
+        movable (numpy.ndarray): (n_nodes,) boolean mask of the nodes to move; unplaced nodes always move.
+        seed (int): Seed for the jitter given to newly placed nodes.
+        iterations (int): Number of cooling iterations.
+        theta (float): Barnes-Hut opening angle.
+        k (float, optional): Optimal distance. Defaults to (volume / n) ** (1/3), as in barnes_hut_layout.
+        temperature (float, optional): Initial maximum step. Defaults to a tenth of k.
+        cutoff (float, optional): Range of the repulsion. Defaults to 3 * k.
+        max_depth (int): Octree depth.
+        progress (callable, optional): Called with the fraction of iterations done after each one.
+
+    Returns:
+        numpy.ndarray: (n_nodes, 3) positions in node id order; fixed nodes keep theirs exactly.
+    """
+    rng = np.random.default_rng(seed)
+    positions = np.array(G.positions, dtype=np.float64).reshape(-1, 3)
+    n = len(positions)
+    placed = np.isfinite(positions).all(axis=1)
+    movable = np.asarray(movable, dtype=bool) | ~placed
+    edges = G.edges.astype(np.int64)
+    if k is None:
+        extent = float(np.ptp(positions[placed], axis=0).max()) if placed.sum() > 1 else 1.0
+        k = max(extent, 1e-9) / n ** (1 / 3)
+    positions = place_unplaced(positions, placed, edges, k, rng)
+    moving = np.flatnonzero(movable)
+    if not len(moving):
+        return positions
+
+    temperature = k / 10 if temperature is None else temperature
+    cutoff = 3 * k if cutoff is None else cutoff
+    fixed_tree = Octree(positions[~movable], max_depth) if not movable.all() else None
+    local_edges = edges[movable[edges[:, 0]] | movable[edges[:, 1]]]
+    strengths = np.ones(len(local_edges))
+    for step in range(iterations):
+        points = positions[moving]
+        displacement = attractive_displacement(positions, local_edges, k, strengths)[moving]
+        if fixed_tree is not None:
+            displacement += repulsive_displacement(fixed_tree, k, theta, queries=points, cutoff=cutoff)
+        if len(moving) > 1:
+            displacement += repulsive_displacement(Octree(points, max_depth), k, theta, cutoff=cutoff)
+        length = np.sqrt((displacement * displacement).sum(axis=1))
+        limited = np.minimum(length, temperature * (1 - step / iterations)) / np.maximum(length, 1e-12)
+        positions[moving] += displacement * limited[:, None]
+        if progress is not None:
+            progress((step + 1) / iterations)
+    return positions
+
+
+def find_root(G):
+    """
+    Picks the root of a tree: the last internal node added by the tree builders, else the highest-degree node.
+    """
+    if isinstance(G, CompactGraph):
+        return G.node_name(G.root())
+    internal = [node for node, flag in G.nodes(data='internal') if flag]
+    if internal:
+        return internal[-1]
+    return max(G.degree, key=lambda item: item[1])[0]
+
+
+def fibonacci_sphere(n):
+    """
+    Returns n unit vectors spread evenly over the sphere, in a spiral order.
+    """
+    i = np.arange(n) + 0.5
+    polar = np.arccos(1 - 2 * i / max(n, 1))
+    azimuth = np.pi * (1 + 5 ** 0.5) * i
+    return np.column_stack([np.cos(azimuth) * np.sin(polar), np.sin(azimuth) * np.sin(polar), np.cos(polar)])
+
+
+def rigid_transform(source, target):
+    """
+    Finds the rotation and translation mapping source points onto target points (Kabsch).
+
+    Returns:
+        tuple: (3x3 rotation, translation) such that source @ rotation + translation ~ target.
+    """
+    source_center = source.mean(axis=0)
+    target_center = target.mean(axis=0)
+    u, _, vt = np.linalg.svd((source - source_center).T @ (target - target_center))
+    if np.linalg.det(u @ vt) < 0:
+        u[:, -1] *= -1
+    rotation = u @ vt
+    return rotation, target_center - source_center @ rotation
+
+
+def radial_layout(G, seed=42, init_pos=None, root=None, weight=None, scale=1.0, progress=None):
+    """
+    Deterministic 3D radial tree layout in linear time.
+
+    Leaves are visited depth-first and spread over a sphere in that order, so
+    each subtree covers a contiguous patch of directions. Internal nodes point
+    at the mean direction of their leaves, and the distance from the root is
+    the depth in edges or, with a weight attribute, the summed branch length.
+
+    Parameters:
+        G (CompactGraph or networkx.Graph): Tree to lay out; other graphs use their DFS tree.
+        seed (int): Unused; accepted so all layouts share one signature.
+        init_pos (dict or numpy.ndarray, optional): Existing positions; the result is rigidly
+            aligned onto them so a recomputed layout does not jump.
+        root (optional): Root node. Defaults to find_root.
+        weight (str, optional): Edge attribute used as branch length.
+        scale (float): Half-width of the returned layout; None keeps the raw coordinates.
+        progress (callable, optional): Unused; the layout is a single linear pass.
+
+    Returns:
+        dict or numpy.ndarray: Node -> position of shape (3,), or for a CompactGraph
+        an (n_nodes, 3) array in node id order.
+    """
+    nodes, root_index, preorder, parent, branch = tree_arrays(G, root, weight)
+    n = len(nodes)
+    if n == 0:
+        return layout_result(G, nodes, np.zeros((0, 3)))
+
+    has_child = np.zeros(n, dtype=bool)
+    has_child[parent[parent >= 0]] = True
+    leaves = preorder[~has_child[preorder]]
+
+    directions = np.zeros((n, 3))
+    directions[leaves] = fibonacci_sphere(len(leaves))
+    for node in preorder[::-1]:
+        if parent[node] >= 0:
+            directions[parent[node]] += directions[node]
+    norms = np.linalg.norm(directions, axis=1)
+    directions /= np.where(norms > 0, norms, 1)[:, None]
+
+    radius = np.zeros(n)
+    for node in preorder[1:]:
+        radius[node] = radius[parent[node]] + branch[node]
+    positions = directions * radius[:, None]
+    positions[root_index] = 0.0
+
+    if scale is not None:
+        positions = rescale(positions, scale)
+    if init_pos is not None:
+        if isinstance(init_pos, np.ndarray):
+            mask = np.ones(n, dtype=bool)
+            target = init_pos
+        else:
+            mask = np.array([node in init_pos for node in nodes])
+            target = np.array([init_pos[node] for node in nodes if node in init_pos])
+        if mask.sum() >= 3:
+            rotation, translation = rigid_transform(positions[mask], target)
+            positions = positions @ rotation + translation
+    return layout_result(G, nodes, positions)
+
+
+def tree_arrays(G, root=None, weight=None):
+    """
+    One depth-first pass from the root over a tree.
+
+    Parameters:
+        G (CompactGraph or networkx.Graph): Tree.
+        root (optional): Root node. Defaults to find_root.
+        weight (str, optional): Edge attribute used as branch length; 1 per edge if None.
+
+    Returns:
+        tuple: (node list, root index, preorder indices, parent index per node (-1 for the
+        root), branch length to the parent per node).
+    """
+    if isinstance(G, CompactGraph):
+        nodes = G.node_names()
+        if not nodes:
+            return nodes, -1, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+        root_index = G.root() if root is None else G.node_id(root)
+        preorder, parent, parent_edge = G.preorder(root_index)
+        branch = np.where(parent_edge >= 0, G.weights[parent_edge], 1.0) if weight else np.ones(len(nodes))
+        return nodes, root_index, preorder, parent, branch
+
+    nodes = list(G.nodes())
+    n = len(nodes)
+    if n == 0:
+        return nodes, -1, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+    index = {node: i for i, node in enumerate(nodes)}
+    root = find_root(G) if root is None else root
+    parent = np.full(n, -1, dtype=np.int64)
+    branch = np.ones(n)
+    preorder = [index[root]]
+    for u, v in nx.dfs_edges(G, root):
+        parent[index[v]] = index[u]
+        if weight:
+            branch[index[v]] = G.edges[u, v].get(weight, 1.0)
+        preorder.append(index[v])
+    return nodes, index[root], np.array(preorder, dtype=np.int64), parent, branch
+
+
+LAYOUTS = {
+    'barnes_hut': barnes_hut_layout,
+    'radial': radial_layout,
+}
+
+
+def compute_layout(G, method=None, seed=42, init_pos=None, **params):
+    """
+    Computes 3D node positions with a registered layout algorithm.
+
+    Parameters:
+        G (CompactGraph or networkx.Graph): Graph to lay out.
+        method (str, optional): Key of LAYOUTS. Defaults to DEFAULT_LAYOUT.
+        seed (int): Random seed.
+        init_pos (dict or numpy.ndarray, optional): Existing positions to warm-start from.
+        **params: Algorithm-specific parameters; those the algorithm does not take are
+            ignored, so one settings block can serve every method.
+
+    Returns:
+        dict or numpy.ndarray: Node -> position of shape (3,), or for a CompactGraph
+        an (n_nodes, 3) array in node id order.
+    """
+    method = method or DEFAULT_LAYOUT
+    if method not in LAYOUTS:
+        raise ValueError(f"Unknown layout method: {method}")
+    with span('layout', method=method, nodes=len(G)):
+        return LAYOUTS[method](G, seed=seed, init_pos=init_pos, **layout_options(method, params))
+
+
+def layout_options(method, params):
+    # The subset of params the layout function of method accepts
+    accepted = inspect.signature(LAYOUTS[method]).parameters
+    return {name: value for name, value in params.items() if name in accepted}
@@ -0,0 +1,129 @@
+# mod_offscreen.py
+
+import ctypes
+import math
+import os
+
+# Without a display Qt draws offscreen and PyOpenGL must bind to EGL (Mesa) rather than GLX;
+# both are read when the libraries are first imported
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+
+import numpy as np
+from OpenGL import EGL, platform
+
+from config_constants import FIELD_OF_VIEW
+from mod_renderer import NODE_RADIUS_SCALE
+
+# EGL_PLATFORM_SURFACELESS_MESA: renders without any window system
+SURFACELESS_PLATFORM = 0x31DD
+# Screenshot size when none is given
+SCREENSHOT_SIZE = (1280, 960)
+# Empty space around the scene when it is framed for a screenshot
+FRAME_MARGIN = 1.1
+
+
+class OffscreenContext:
+    """
+    An OpenGL context on an EGL pbuffer, current on the calling thread while open.
+
+    The pbuffer is the default framebuffer, so anything drawn can be read back
+    with glReadPixels.
+    """
+
+    def __init__(self, width, height):
+        if not type(platform.PLATFORM).__name__.startswith('EGL'):
+            raise RuntimeError("PyOpenGL was loaded for another platform; set PYOPENGL_PLATFORM=egl "
+                               "before OpenGL is first imported")
+        self.display = self.open_display()
+        attributes = [EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT, EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8,
+                      EGL.EGL_BLUE_SIZE, 8, EGL.EGL_ALPHA_SIZE, 8, EGL.EGL_DEPTH_SIZE, 24,
+                      EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT, EGL.EGL_NONE]
+        config = EGL.EGLConfig()
+        count = EGL.EGLint()
+        if not EGL.eglChooseConfig(self.display, (EGL.EGLint * len(attributes))(*attributes),
+                                   ctypes.pointer(config), 1, ctypes.pointer(count)) or not count.value:
+            raise RuntimeError("No EGL configuration supports offscreen OpenGL rendering")
+        size = (EGL.EGLint * 5)(EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE)
+        self.surface = EGL.eglCreatePbufferSurface(self.display, config, size)
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        self.context = EGL.eglCreateContext(self.display, config, EGL.EGL_NO_CONTEXT, None)
+        if not self.surface or not self.context:
+            raise RuntimeError("Could not create an EGL pbuffer context")
+        EGL.eglMakeCurrent(self.display, self.surface, self.surface, self.context)
+
+    @staticmethod
+    def open_display():
+        # Mesa's surfaceless platform first, then whatever the default display is
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        try:
+            from OpenGL.EGL.EXT.platform_base import eglGetPlatformDisplayEXT
+            display = eglGetPlatformDisplayEXT(SURFACELESS_PLATFORM, EGL.EGL_DEFAULT_DISPLAY, None)
+            if display and EGL.eglInitialize(display, ctypes.pointer(major), ctypes.pointer(minor)):
+                return display
+        except Exception:
+            pass
+        display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        if not display or not EGL.eglInitialize(display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise RuntimeError("EGL is not available for offscreen rendering")
+        return display
+
+    def close(self):
+        EGL.eglMakeCurrent(self.display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+        EGL.eglDestroyContext(self.display, self.context)
+        EGL.eglDestroySurface(self.display, self.surface)
+        EGL.eglTerminate(self.display)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def frame_scene(viz, scene):
+    """
+    Points the view at the scene's center from far enough away to see all of it.
+    """
+    if not scene.n_nodes:
+        return
+    positions = np.asarray(scene.positions, dtype=np.float64)
+    center = (positions.min(axis=0) + positions.max(axis=0)) / 2
+    radius = float(np.linalg.norm(positions - center, axis=1).max())
+    radius += viz.settings['visualization_params']['node_size'] * NODE_RADIUS_SCALE
+    viz.rotation = [0, 0, 0]
+    viz.pan = [-float(center[0]), -float(center[1])]
+    viz.zoom = -float(center[2]) - FRAME_MARGIN * radius / math.sin(math.radians(FIELD_OF_VIEW) / 2)
+
+
+def render_scene(scene, settings, file_name, size=SCREENSHOT_SIZE):
+    """
+    Renders a scene without a window and saves it as an image.
+
+    The scene goes through the same Visualization paint path as on screen,
+    with the view framed on the whole scene.
+
+    Parameters:
+        scene (Scene): Scene to draw.
+        settings (dict): Application settings.
+        file_name (str): Image path; the format follows the extension.
+        size (tuple): (width, height) in pixels.
+    """
+    from PyQt5.QtWidgets import QApplication
+    from event_manager import EventManager
+    from mod_visualization import Visualization
+
+    app = QApplication.instance() or QApplication([])
+    width, height = size
+    with OffscreenContext(width, height):
+        viz = Visualization(None, settings, EventManager())
+        viz.set_scene(scene)
+        viz.setFixedSize(width, height)
+        frame_scene(viz, scene)
+        viz.initializeGL()
+        viz.resizeGL(width, height)
+        viz.paintGL()
+        viz.save_screenshot(file_name)
+        viz.renderer.release()
+        viz.deleteLater()
+    app.processEvents()
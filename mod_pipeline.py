@@ -0,0 +1,185 @@
+# mod_pipeline.py
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from PyQt5 import QtCore
+
+from data_processor import load_processed_data
+from mod_edge_index import EdgeIndex
+from mod_tree_generator import generate_tree, distance_array
+
+PIPELINE_STAGES = ('load', 'distances', 'edges', 'tree', 'layout')
+# Threads in the pool: a cancelled run may still be inside a long NumPy call when the next one starts
+PIPELINE_WORKERS = 2
+# Smallest change in a stage's progress passed on, so tight loops do not flood the GUI event queue
+PROGRESS_STEP = 0.01
+
+
+class PipelineCancelled(Exception):
+    """
+    Raised inside a pipeline run by its next progress report after cancel().
+    """
+
+
+class PipelineRun:
+    """
+    One load -> distances -> edges -> tree -> layout run over a data file.
+
+    Every stage reports through progress(), which raises PipelineCancelled
+    once the run is cancelled, so cancelling takes effect at the next distance
+    batch, tree join or layout iteration. The listeners are called on the
+    thread executing run().
+    """
+
+    def __init__(self, file_path, settings, data_cache=None, layout_cache=None, on_progress=None, on_preview=None):
+        self.file_path = file_path
+        self.settings = settings
+        self.data_cache = data_cache
+        self.layout_cache = layout_cache
+        self.on_progress = on_progress
+        self.on_preview = on_preview
+        self.cancel_event = threading.Event()
+        self.reported = None  # Last (stage, fraction) passed to on_progress
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def progress(self, stage, fraction):
+        """
+        Parameters:
+            stage (str): One of PIPELINE_STAGES.
+            fraction (float): Part of the stage done, in [0, 1].
+        """
+        if self.cancelled:
+            raise PipelineCancelled(self.file_path)
+        if self.on_progress is None:
+            return
+        last = self.reported
+        if last is not None and last[0] == stage and fraction < 1.0 and fraction - last[1] < PROGRESS_STEP:
+            return
+        self.reported = (stage, fraction)
+        self.on_progress(stage, fraction)
+
+    def run(self):
+        """
+        Runs every stage; results are only returned, never shown, so the caller swaps them in.
+
+        Returns:
+            dict: 'tree' (CompactGraph with positions), 'species' and 'edge_index',
+            the EdgeIndex over the species distances behind the edge filters.
+        """
+        settings = self.settings
+        processed_data = load_processed_data(self.file_path, settings.get('distance_params'),
+                                             self.data_cache, self.progress)
+        species = list(processed_data['species'])
+        distances = distance_array(processed_data)
+        edge_index = EdgeIndex.from_distances(distances, progress=partial(self.progress, 'edges'))
+
+        preview = None
+        if self.on_preview is not None:
+            def preview(tree):
+                self.progress('layout', 0.0)
+                self.on_preview({'tree': tree, 'species': species, 'edge_index': edge_index})
+
+        tree = generate_tree(processed_data, settings.get('tree_params', {}).get('method'),
+                             settings.get('layout_params'), self.layout_cache, self.progress, preview)
+        self.progress('layout', 1.0)
+        return {'tree': tree, 'species': species, 'edge_index': edge_index}
+
+
+class PipelineRunner(QtCore.QObject):
+    """
+    Runs PipelineRun jobs on a thread pool and reports back on the GUI thread.
+
+    Only the latest run is reported: starting a run cancels the previous one
+    and signals of superseded runs are dropped. Until finished is emitted the
+    current tree stays on screen, and the result arrives whole in one slot
+    call, so the view swaps trees at once.
+    """
+
+    progress = QtCore.pyqtSignal(str, float)  # Stage and fraction of the stage done
+    preview = QtCore.pyqtSignal(object)  # Result dict with a coarsely laid-out tree
+    finished = QtCore.pyqtSignal(object)  # Result dict of PipelineRun.run
+    failed = QtCore.pyqtSignal(str)
+    cancelled = QtCore.pyqtSignal()
+
+    # Emitted on the worker threads together with the run they belong to
+    run_progress = QtCore.pyqtSignal(object, str, float)
+    run_preview = QtCore.pyqtSignal(object, object)
+    run_done = QtCore.pyqtSignal(object, object, object)
+
+    def __init__(self, parent=None, workers=PIPELINE_WORKERS):
+        super().__init__(parent)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pipeline')
+        self.current = None
+        self.run_progress.connect(self.forward_progress, QtCore.Qt.QueuedConnection)
+        self.run_preview.connect(self.forward_preview, QtCore.Qt.QueuedConnection)
+        self.run_done.connect(self.forward_done, QtCore.Qt.QueuedConnection)
+
+    @property
+    def busy(self):
+        return self.current is not None
+
+    def start(self, file_path, settings, data_cache=None, layout_cache=None):
+        """
+        Cancels the running pipeline, if any, and starts one for file_path.
+
+        Returns:
+            PipelineRun: The new run.
+        """
+        self.cancel()
+        run = PipelineRun(file_path, settings, data_cache, layout_cache,
+                          on_progress=lambda stage, fraction: self.run_progress.emit(run, stage, fraction),
+                          on_preview=lambda result: self.run_preview.emit(run, result))
+        self.current = run
+        future = self.executor.submit(run.run)
+        future.add_done_callback(lambda done: self.report_done(run, done))
+        return run
+
+    def report_done(self, run, future):
+        # Called on the worker thread, or on the calling one for a run dropped from the queue
+        if future.cancelled():
+            self.run_done.emit(run, None, PipelineCancelled(run.file_path))
+        else:
+            error = future.exception()
+            self.run_done.emit(run, None if error else future.result(), error)
+
+    def cancel(self):
+        # The worker stops at its next progress report; its result is ignored either way
+        if self.current is None:
+            return
+        self.current.cancel()
+        self.current = None
+        self.cancelled.emit()
+
+    def shutdown(self):
+        # The running worker stops at its next progress report; queued runs never start
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def forward_progress(self, run, stage, fraction):
+        if run is self.current:
+            self.progress.emit(stage, fraction)
+
+    def forward_preview(self, run, result):
+        if run is self.current:
+            self.preview.emit(result)
+
+    def forward_done(self, run, result, error):
+        if run is not self.current:
+            return
+        self.current = None
+        if isinstance(error, PipelineCancelled):
+            self.cancelled.emit()
+        elif error is not None:
+            logging.error(f"Loading {run.file_path} failed: {error!r}")
+            self.failed.emit(str(error))
+        else:
+            self.finished.emit(result)
@@ -0,0 +1,424 @@
+# mod_renderer.py
+
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+
+# Fraction of the configured node size used as the sphere radius in world units
+NODE_RADIUS_SCALE = 0.1
+HIGHLIGHT_COLOR = (1.0, 1.0, 0.0)
+HIGHLIGHT_SCALE = 1.5
+# Edges are drawn in this many line widths, up to 1 + MAX_EDGE_WIDTH_SCALE times the base width
+EDGE_WIDTH_BUCKETS = 6
+MAX_EDGE_WIDTH_SCALE = 5
+# Generic attribute slot of the per-node radius; slot 0 aliases gl_Vertex
+RADIUS_ATTRIBUTE = 1
+# Changed rows at most this far apart are re-uploaded with a single glBufferSubData:
+# one call costs about as much as copying a few hundred kilobytes more
+UPLOAD_GAP = 16384
+
+# Point sprites shaded as spheres lit from the viewer (GL_LIGHT0 sits at (0, 0, 1, 0))
+NODE_VERTEX_SHADER = """
+#version 120
+attribute float radius;
+uniform float point_scale;
+void main() {
+    vec4 eye = gl_ModelViewMatrix * gl_Vertex;
+    gl_Position = gl_ProjectionMatrix * eye;
+    gl_PointSize = max(2.0 * radius * point_scale / max(-eye.z, 1e-3), 1.0);
+    gl_FrontColor = gl_Color;
+}
+"""
+
+NODE_FRAGMENT_SHADER = """
+#version 120
+void main() {
+    vec2 p = gl_PointCoord * 2.0 - 1.0;
+    float r2 = dot(p, p);
+    if (r2 > 1.0) discard;
+    float diffuse = sqrt(1.0 - r2);
+    gl_FragColor = vec4(gl_Color.rgb * (0.25 + 0.75 * diffuse), gl_Color.a);
+}
+"""
+
+
+def node_colors(scene, color_for_attribute):
+    """
+    Per-node RGB colors from the scene's attribute table.
+
+    Parameters:
+        scene (Scene): Scene whose attribute_codes index attribute_names.
+        color_for_attribute (callable): Maps an attribute string to an (r, g, b) tuple.
+
+    Returns:
+        numpy.ndarray: (n_nodes, 3) float32 colors.
+    """
+    palette = np.array([color_for_attribute(attr) for attr in scene.attribute_names], dtype=np.float32).reshape(-1, 3)
+    return palette[np.asarray(scene.attribute_codes, dtype=np.intp)]
+
+
+def edge_style(positions, edges, branch_lengths, edge_width=1.0, buckets=EDGE_WIDTH_BUCKETS):
+    """
+    Precomputes edge styling: line segments grouped into line-width buckets.
+
+    Edges are shaded from blue (short branches) to black (the longest branch)
+    and drawn up to MAX_EDGE_WIDTH_SCALE times wider in proportion to their
+    branch length, quantised to a few widths so each bucket is one draw call.
+
+    Parameters:
+        positions (numpy.ndarray): (n_nodes, 3) node positions.
+        edges (numpy.ndarray): (n_edges, 2) node index pairs.
+        branch_lengths (numpy.ndarray): (n_edges,) edge weights.
+        edge_width (float): Width in pixels of the shortest branches.
+        buckets (int): Number of distinct line widths.
+
+    Returns:
+        tuple: ((2 * n_edges, 3) float32 positions, (2 * n_edges, 3) float32 colors,
+        list of (first vertex, vertex count, line width) per non-empty bucket,
+        (n_edges,) index of the input edge behind each drawn segment).
+    """
+    weights = np.asarray(branch_lengths, dtype=np.float32)
+    max_weight = weights.max() if len(weights) else 0.0
+    normalized = weights / max_weight if max_weight > 0 else np.zeros_like(weights)
+    bucket = np.minimum((normalized * buckets).astype(np.int64), buckets - 1)
+    order = np.argsort(bucket, kind='stable')
+
+    positions = np.asarray(positions, dtype=np.float32)
+    edges = np.asarray(edges, dtype=np.intp).reshape(-1, 2)[order]
+    vertices = positions[edges.reshape(-1)]
+    colors = np.zeros((len(weights), 3), dtype=np.float32)
+    colors[:, 2] = 1.0 - normalized[order]
+
+    counts = np.bincount(bucket, minlength=buckets)
+    firsts = np.cumsum(counts) - counts
+    ranges = [
+        (2 * int(first), 2 * int(count), edge_width * (1 + MAX_EDGE_WIDTH_SCALE * (b + 0.5) / buckets))
+        for b, (first, count) in enumerate(zip(firsts, counts)) if count
+    ]
+    return vertices, np.repeat(colors, 2, axis=0), ranges, order
+
+
+def rgba(colors, alpha=1.0):
+    """
+    Returns:
+        numpy.ndarray: (n, 4) contiguous float32 copy of (n, 3) or (n, 4) colors; alpha is
+        added to RGB colors.
+    """
+    colors = np.asarray(colors, dtype=np.float32)
+    if colors.shape[1] == 4:
+        return np.ascontiguousarray(colors)
+    result = np.full((len(colors), 4), alpha, dtype=np.float32)
+    result[:, :3] = colors
+    return result
+
+
+class SceneRenderer:
+    """
+    Retained-mode renderer for a Scene.
+
+    Node positions, colors and radii and the edge segments live in vertex
+    buffers uploaded once per scene; a frame is one draw call per edge width
+    bucket, one glDrawElements for the visible nodes, drawn as sphere-shaded
+    point sprites, and one glDrawArrays for the cluster glyphs standing in for
+    collapsed groups of nodes. Colors are RGBA and fragments with zero alpha
+    are dropped, so nodes and edges are hidden and shown in place by rewriting
+    their alpha. Without GLSL support nodes fall back to round fixed-size points.
+    All methods except __init__ need a current GL context.
+    """
+
+    def __init__(self):
+        self.program = None
+        self.buffers = {}
+        self.node_rgba = np.zeros((0, 4), dtype=np.float32)
+        self.edge_rgba = np.zeros((0, 4), dtype=np.float32)
+        self.n_nodes = 0
+        self.n_edge_vertices = 0
+        self.edge_buckets = []
+        self.edge_nodes = np.zeros((0, 2), dtype=np.intp)
+        self.edge_segments = np.zeros(0, dtype=np.intp)
+        self.edge_width = None
+        self.visible_edge_buckets = None
+        self.n_visible = 0
+        self.n_glyphs = 0
+        self.visible_key = None
+
+    def initialize(self):
+        """
+        Compiles the node shader program.
+        """
+        try:
+            program = glCreateProgram()
+            glAttachShader(program, shaders.compileShader(NODE_VERTEX_SHADER, GL_VERTEX_SHADER))
+            glAttachShader(program, shaders.compileShader(NODE_FRAGMENT_SHADER, GL_FRAGMENT_SHADER))
+            glBindAttribLocation(program, RADIUS_ATTRIBUTE, 'radius')
+            glLinkProgram(program)
+            if glGetProgramiv(program, GL_LINK_STATUS) != GL_TRUE:
+                raise RuntimeError(glGetProgramInfoLog(program))
+            self.program = program
+            self.point_scale_location = glGetUniformLocation(program, 'point_scale')
+        except (RuntimeError, GLError):
+            self.program = None
+
+    def _buffer(self, name, data, target=GL_ARRAY_BUFFER, usage=GL_STATIC_DRAW):
+        if name not in self.buffers:
+            self.buffers[name] = glGenBuffers(1)
+        glBindBuffer(target, self.buffers[name])
+        glBufferData(target, data.nbytes, data if data.nbytes else None, usage)
+        glBindBuffer(target, 0)
+
+    def upload(self, scene, colors, radius, edge_width=1.0):
+        """
+        Uploads a scene's vertex data.
+
+        Parameters:
+            scene (Scene): Scene to draw.
+            colors (numpy.ndarray): (n_nodes, 3) float32 node colors.
+            radius (float or numpy.ndarray): Node radius in world units, scalar or per node.
+            edge_width (float): Width in pixels of the shortest branches.
+        """
+        positions = np.ascontiguousarray(scene.positions, dtype=np.float32)
+        self.n_nodes = len(positions)
+        radii = np.broadcast_to(np.asarray(radius, dtype=np.float32), (self.n_nodes,))
+        self._buffer('node_positions', positions)
+        self.node_rgba = rgba(colors)
+        self._buffer('node_colors', self.node_rgba)
+        self._buffer('node_radii', np.ascontiguousarray(radii))
+        self.upload_edges(positions, scene.edges, scene.branch_lengths, edge_width)
+        self.set_visible(np.arange(self.n_nodes, dtype=np.uint32))
+        self.set_glyphs(np.zeros((0, 3)), np.zeros((0, 3)), np.zeros(0))
+
+    def upload_edges(self, positions, edges, branch_lengths, edge_width=1.0):
+        """
+        Restyles and uploads the edge buffers, e.g. after the edge width setting or
+        the displayed edge subset changed. Arguments are as for edge_style.
+        """
+        edge_positions, edge_colors, self.edge_buckets, order = edge_style(positions, edges, branch_lengths, edge_width)
+        self.edge_nodes = np.asarray(edges, dtype=np.intp).reshape(-1, 2)[order]
+        self.edge_segments = np.argsort(order)
+        self.n_edge_vertices = len(edge_positions)
+        self.edge_width = edge_width
+        self.edge_rgba = rgba(edge_colors)
+        # A subset of edges selected by set_visible refers to the old segments
+        self.visible_edge_buckets = None
+        self.visible_key = None
+        self._buffer('edge_positions', np.ascontiguousarray(edge_positions))
+        self._buffer('edge_colors', self.edge_rgba)
+
+    def set_visible(self, indices, key=None, connected_only=False):
+        """
+        Uploads the node index buffer drawn each frame.
+
+        Parameters:
+            indices (numpy.ndarray): uint32 indices of the nodes to draw.
+            key (hashable, optional): Identifies the selection, kept as visible_key.
+            connected_only (bool): Draw only the edges between two of these nodes
+                instead of every edge.
+        """
+        indices = np.ascontiguousarray(indices, dtype=np.uint32)
+        self._buffer('visible', indices, GL_ELEMENT_ARRAY_BUFFER, GL_DYNAMIC_DRAW)
+        self.n_visible = len(indices)
+        self.visible_key = key
+        self.visible_edge_buckets = None
+        if connected_only:
+            shown = np.zeros(self.n_nodes, dtype=bool)
+            shown[indices] = True
+            segments = np.flatnonzero(shown[self.edge_nodes].all(axis=1))
+            elements = (2 * segments[:, None] + np.arange(2)).astype(np.uint32).reshape(-1)
+            self._buffer('visible_edges', elements, GL_ELEMENT_ARRAY_BUFFER, GL_DYNAMIC_DRAW)
+            # Segments are sorted by bucket, so each bucket is still one contiguous range
+            self.visible_edge_buckets = []
+            for first, count, width in self.edge_buckets:
+                lo, hi = np.searchsorted(segments, [first // 2, (first + count) // 2])
+                if hi > lo:
+                    self.visible_edge_buckets.append((2 * int(lo), 2 * int(hi - lo), width))
+
+    def set_glyphs(self, positions, colors, radii):
+        """
+        Uploads the cluster glyphs, drawn like nodes after them.
+
+        Parameters:
+            positions (numpy.ndarray): (n, 3) glyph centers.
+            colors (numpy.ndarray): (n, 3) or (n, 4) colors.
+            radii (numpy.ndarray): (n,) radii in world units.
+        """
+        self._buffer('glyph_positions', np.ascontiguousarray(positions, dtype=np.float32), usage=GL_DYNAMIC_DRAW)
+        self._buffer('glyph_colors', rgba(colors), usage=GL_DYNAMIC_DRAW)
+        self._buffer('glyph_radii', np.ascontiguousarray(radii, dtype=np.float32), usage=GL_DYNAMIC_DRAW)
+        self.n_glyphs = len(positions)
+
+    def set_node_alpha(self, indices, alpha):
+        """
+        Rewrites node opacity in place; alpha 0 hides a node.
+
+        Parameters:
+            indices (numpy.ndarray or None): Node indices; None for every node.
+            alpha (float or numpy.ndarray): New alpha, scalar or one per index.
+        """
+        self._set_alpha('node_colors', self.node_rgba, indices, alpha)
+
+    def set_edge_alpha(self, indices, alpha):
+        """
+        Rewrites edge opacity in place; alpha 0 hides an edge.
+
+        Parameters:
+            indices (numpy.ndarray or None): Indices into the edges passed to upload_edges; None for every edge.
+            alpha (float or numpy.ndarray): New alpha, scalar or one per index.
+        """
+        if indices is None and np.ndim(alpha):
+            indices = np.arange(len(self.edge_segments))
+        if indices is not None:
+            indices = (2 * self.edge_segments[indices][:, None] + np.arange(2)).reshape(-1)
+            alpha = np.repeat(alpha, 2) if np.ndim(alpha) else alpha
+        self._set_alpha('edge_colors', self.edge_rgba, indices, alpha)
+
+    def _set_alpha(self, name, colors, rows, alpha):
+        if name not in self.buffers:
+            return
+        if rows is None:
+            colors[:, 3] = alpha
+            rows = np.arange(len(colors))
+        else:
+            rows = np.asarray(rows, dtype=np.intp)
+            colors[rows, 3] = alpha
+            rows = np.unique(rows)
+        if not len(rows):
+            return
+        # Only the changed rows go to the GPU, nearby ones merged into one upload
+        breaks = np.flatnonzero(np.diff(rows) > UPLOAD_GAP) + 1
+        starts, stops = rows[np.r_[0, breaks]], rows[np.r_[breaks - 1, len(rows) - 1]] + 1
+        glBindBuffer(GL_ARRAY_BUFFER, self.buffers[name])
+        for start, stop in zip(starts.tolist(), stops.tolist()):
+            glBufferSubData(GL_ARRAY_BUFFER, start * colors.strides[0], colors[start:stop])
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def _bind_array(self, name, size, client_state):
+        glBindBuffer(GL_ARRAY_BUFFER, self.buffers[name])
+        glEnableClientState(client_state)
+        if client_state == GL_VERTEX_ARRAY:
+            glVertexPointer(size, GL_FLOAT, 0, None)
+        else:
+            glColorPointer(size, GL_FLOAT, 0, None)
+
+    def _begin_nodes(self, point_size):
+        if self.program is None:
+            glPointSize(point_size)
+            glEnable(GL_POINT_SMOOTH)
+            return
+        glEnable(GL_VERTEX_PROGRAM_POINT_SIZE)
+        glEnable(GL_POINT_SPRITE)
+        glUseProgram(self.program)
+        viewport = glGetIntegerv(GL_VIEWPORT)
+        projection = glGetFloatv(GL_PROJECTION_MATRIX)
+        # Pixels per world unit at unit depth
+        glUniform1f(self.point_scale_location, 0.5 * viewport[3] * projection[1][1])
+
+    def _end_nodes(self):
+        if self.program is not None:
+            glUseProgram(0)
+
+    def _draw_points(self, prefix, point_size, count, elements=None):
+        self._begin_nodes(point_size)
+        self._bind_array(prefix + '_positions', 3, GL_VERTEX_ARRAY)
+        self._bind_array(prefix + '_colors', 4, GL_COLOR_ARRAY)
+        if self.program is not None:
+            glBindBuffer(GL_ARRAY_BUFFER, self.buffers[prefix + '_radii'])
+            glEnableVertexAttribArray(RADIUS_ATTRIBUTE)
+            glVertexAttribPointer(RADIUS_ATTRIBUTE, 1, GL_FLOAT, GL_FALSE, 0, None)
+        if elements is None:
+            glDrawArrays(GL_POINTS, 0, count)
+        else:
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.buffers[elements])
+            glDrawElements(GL_POINTS, count, GL_UNSIGNED_INT, None)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        if self.program is not None:
+            glDisableVertexAttribArray(RADIUS_ATTRIBUTE)
+        self._end_nodes()
+
+    def draw(self, point_size=4.0):
+        """
+        Draws the edges, the visible nodes and the cluster glyphs.
+
+        Parameters:
+            point_size (float): Node size in pixels when shaders are unavailable.
+        """
+        if not self.buffers:
+            return
+        glPushAttrib(GL_ENABLE_BIT | GL_POINT_BIT | GL_LINE_BIT | GL_CURRENT_BIT | GL_COLOR_BUFFER_BIT)
+        glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+        glDisable(GL_LIGHTING)
+        # Hidden elements have zero alpha
+        glEnable(GL_ALPHA_TEST)
+        glAlphaFunc(GL_GREATER, 0.0)
+        try:
+            if self.n_edge_vertices:
+                self._bind_array('edge_positions', 3, GL_VERTEX_ARRAY)
+                self._bind_array('edge_colors', 4, GL_COLOR_ARRAY)
+                if self.visible_edge_buckets is None:
+                    for first, count, width in self.edge_buckets:
+                        glLineWidth(width)
+                        glDrawArrays(GL_LINES, first, count)
+                else:
+                    glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.buffers['visible_edges'])
+                    for first, count, width in self.visible_edge_buckets:
+                        glLineWidth(width)
+                        glDrawElements(GL_LINES, count, GL_UNSIGNED_INT, ctypes.c_void_p(4 * first))
+                    glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+            if self.n_visible:
+                self._draw_points('node', point_size, self.n_visible, elements='visible')
+            if self.n_glyphs:
+                self._draw_points('glyph', point_size, self.n_glyphs)
+        finally:
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            glPopClientAttrib()
+            glPopAttrib()
+
+    def draw_node(self, index, color, radius, point_size=4.0):
+        """
+        Draws one node over the scene, e.g. the highlighted node.
+
+        Parameters:
+            index (int): Node index.
+            color (tuple): (r, g, b) color.
+            radius (float): Radius in world units.
+            point_size (float): Size in pixels when shaders are unavailable.
+        """
+        if not self.buffers or not 0 <= index < self.n_nodes:
+            return
+        glPushAttrib(GL_ENABLE_BIT | GL_POINT_BIT | GL_CURRENT_BIT)
+        glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+        glDisable(GL_LIGHTING)
+        try:
+            self._begin_nodes(point_size)
+            if self.program is not None:
+                glVertexAttrib1f(RADIUS_ATTRIBUTE, radius)
+            glColor3f(*color)
+            self._bind_array('node_positions', 3, GL_VERTEX_ARRAY)
+            glDrawArrays(GL_POINTS, index, 1)
+            self._end_nodes()
+        finally:
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            glPopClientAttrib()
+            glPopAttrib()
+
+    def release(self):
+        """
+        Deletes the GL buffers and program.
+        """
+        if self.buffers:
+            glDeleteBuffers(len(self.buffers), list(self.buffers.values()))
+        self.buffers = {}
+        if self.program is not None:
+            glDeleteProgram(self.program)
+            self.program = None
+        self.n_nodes = self.n_edge_vertices = self.n_visible = self.n_glyphs = 0
+        self.node_rgba = np.zeros((0, 4), dtype=np.float32)
+        self.edge_rgba = np.zeros((0, 4), dtype=np.float32)
+        self.edge_buckets = []
+        self.edge_nodes = np.zeros((0, 2), dtype=np.intp)
+        self.edge_segments = np.zeros(0, dtype=np.intp)
+        self.edge_width = None
+        self.visible_edge_buckets = None
+        self.visible_key = None
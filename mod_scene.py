@@ -0,0 +1,205 @@
+# mod_scene.py
+
+import json
+import mmap
+import struct
+
+import numpy as np
+
+from mod_graph import CompactGraph, as_compact_graph, decode_names, unbounded_times
+
+SCENE_MAGIC = b"E3DSCENE"
+SCENE_VERSION = 2
+# Every array starts on a 64-byte boundary so it can be mapped straight into a vertex buffer
+SCENE_ALIGNMENT = 64
+
+# Array name -> little-endian dtype stored in the file
+SCENE_ARRAYS = {
+    'positions': '<f4',
+    'edges': '<u4',
+    'branch_lengths': '<f4',
+    'attribute_codes': '<u2',
+    'internal': 'u1',
+    'name_offsets': '<u8',
+    'name_data': 'u1',
+    'node_times': '<f4',
+    'edge_times': '<f4',
+}
+
+
+class Scene:
+    """
+    Array-only snapshot of a laid-out tree, ready for the renderers.
+
+    Attributes:
+        positions (numpy.ndarray): (n_nodes, 3) float32 node positions.
+        edges (numpy.ndarray): (n_edges, 2) uint32 node index pairs.
+        branch_lengths (numpy.ndarray): (n_edges,) float32 edge weights.
+        attribute_codes (numpy.ndarray): (n_nodes,) uint16 index into attribute_names.
+        attribute_names (list of str): Attribute string table.
+        internal (numpy.ndarray): (n_nodes,) uint8, 1 for inferred ancestors.
+        name_offsets (numpy.ndarray): (n_nodes + 1,) uint64 offsets into name_data.
+        name_data (numpy.ndarray): UTF-8 bytes of all node names.
+        node_times (numpy.ndarray): (n_nodes, 2) float32 [start, end] lifetime; -inf/inf when unbounded.
+        edge_times (numpy.ndarray): (n_edges, 2) float32 [start, end] lifetime.
+    """
+
+    def __init__(self, positions, edges, branch_lengths, attribute_codes, attribute_names, internal,
+                 name_offsets, name_data, meta=None, node_times=None, edge_times=None):
+        self.positions = positions
+        self.edges = edges
+        self.branch_lengths = branch_lengths
+        self.attribute_codes = attribute_codes
+        self.attribute_names = attribute_names
+        self.internal = internal
+        self.name_offsets = name_offsets
+        self.name_data = name_data
+        self.meta = meta or {}
+        # Version 1 files and untimed graphs: everything exists at all times
+        self.node_times = node_times if node_times is not None else unbounded_times(len(positions))
+        self.edge_times = edge_times if edge_times is not None else unbounded_times(len(edges))
+
+    @property
+    def n_nodes(self):
+        return len(self.positions)
+
+    @property
+    def n_edges(self):
+        return len(self.edges)
+
+    def node_name(self, index):
+        """
+        Decodes the name of one node.
+        """
+        start, stop = self.name_offsets[index], self.name_offsets[index + 1]
+        return bytes(self.name_data[start:stop]).decode('utf-8')
+
+    def node_names(self):
+        """
+        Returns:
+            list of str: Every node name, in node index order.
+        """
+        return decode_names(self.name_offsets, self.name_data)
+
+    def to_compact(self):
+        """
+        Returns:
+            CompactGraph: The tree, sharing the scene's node arrays (memory-mapped for a loaded scene).
+        """
+        return CompactGraph((self.name_offsets, self.name_data), self.edges, self.branch_lengths,
+                            internal=self.internal, positions=self.positions,
+                            attribute_codes=self.attribute_codes, attribute_names=self.attribute_names,
+                            node_times=self.node_times, edge_times=self.edge_times)
+
+    def to_graph(self):
+        """
+        Rebuilds a networkx graph for code that still needs one.
+
+        Returns:
+            networkx.Graph: Nodes with 'pos', 'internal', 'attribute' and finite
+            'start_time'/'end_time'; edges with 'weight'.
+        """
+        graph = self.to_compact()
+        graph.edge_times = None  # Stored edge lifetimes are derived ones unless set explicitly
+        return graph.to_networkx()
+
+
+def scene_from_graph(G):
+    """
+    Converts a laid-out tree to a Scene.
+
+    Parameters:
+        G (CompactGraph or networkx.Graph): The tree. A networkx graph is converted with
+            CompactGraph.from_networkx, so its nodes carry 'pos' and optionally 'attribute',
+            'internal', 'start_time' and 'end_time', and its edges may carry 'start_time' and
+            'end_time' too; by default an edge exists while both its nodes do.
+
+    Returns:
+        Scene: The tree as arrays.
+    """
+    graph = as_compact_graph(G)
+    positions = graph.positions if graph.positions is not None else np.zeros((graph.n_nodes, 3))
+    return Scene(
+        positions=np.asarray(positions, dtype=np.float32),
+        edges=graph.edges.astype(np.uint32),
+        branch_lengths=graph.weights.astype(np.float32),
+        attribute_codes=graph.attribute_codes,
+        attribute_names=list(graph.attribute_names),
+        internal=graph.internal,
+        name_offsets=graph.name_offsets,
+        name_data=graph.name_data,
+        node_times=graph.node_times,
+        edge_times=np.asarray(graph.lifetimes(), dtype=np.float32),
+    )
+
+
+def save_scene(file_path, scene):
+    """
+    Writes a scene file.
+
+    Layout: magic, uint32 version, uint32 header length, JSON header, then each
+    array at a 64-byte aligned offset recorded in the header.
+
+    Parameters:
+        file_path (str): Destination path.
+        scene (Scene): Scene to write.
+    """
+    arrays = {name: np.ascontiguousarray(getattr(scene, name), dtype=dtype) for name, dtype in SCENE_ARRAYS.items()}
+    sections = {}
+    header = {'version': SCENE_VERSION, 'attribute_names': scene.attribute_names, 'meta': scene.meta,
+              'arrays': sections}
+    # The header size depends on the offsets, so lay out until it stops changing
+    header_bytes = b''
+    while True:
+        offset = align(len(SCENE_MAGIC) + 8 + len(header_bytes))
+        for name, array in arrays.items():
+            sections[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            offset = align(offset + array.nbytes)
+        encoded = json.dumps(header).encode('utf-8')
+        stable = len(encoded) == len(header_bytes)
+        header_bytes = encoded
+        if stable:
+            break
+
+    with open(file_path, 'wb') as f:
+        f.write(SCENE_MAGIC)
+        f.write(struct.pack('<II', SCENE_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.write(b'\0' * (sections[name]['offset'] - f.tell()))
+            f.write(array.tobytes())
+
+
+def align(offset):
+    return -(-offset // SCENE_ALIGNMENT) * SCENE_ALIGNMENT
+
+
+def load_scene(file_path):
+    """
+    Opens a scene file with mmap; every array is a read-only view into the mapping.
+
+    Parameters:
+        file_path (str): Scene file path.
+
+    Returns:
+        Scene: The mapped scene.
+    """
+    with open(file_path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapping[:len(SCENE_MAGIC)] != SCENE_MAGIC:
+        raise ValueError(f"Not a scene file: {file_path}")
+    version, header_length = struct.unpack_from('<II', mapping, len(SCENE_MAGIC))
+    if version > SCENE_VERSION:
+        raise ValueError(f"Unsupported scene version {version} (supported: {SCENE_VERSION})")
+    header_start = len(SCENE_MAGIC) + 8
+    header = json.loads(mapping[header_start:header_start + header_length].decode('utf-8'))
+
+    arrays = {}
+    for name, section in header['arrays'].items():
+        dtype = np.dtype(section['dtype'])
+        count = int(np.prod(section['shape'], dtype=np.int64))
+        if count == 0:
+            arrays[name] = np.empty(section['shape'], dtype=dtype)
+            continue
+        arrays[name] = np.frombuffer(mapping, dtype=dtype, count=count, offset=section['offset']).reshape(section['shape'])
+    return Scene(attribute_names=header['attribute_names'], meta=header.get('meta'), **arrays)
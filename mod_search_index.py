@@ -0,0 +1,186 @@
+# mod_search_index.py
+
+import re
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+# Candidates returned per query
+SEARCH_LIMIT = 20
+# Smallest trigram similarity (shared / union) a fuzzy match needs
+FUZZY_THRESHOLD = 0.3
+# Trigrams held by more names than this (word endings like 'us ') are too common to rank by,
+# and counting their postings would dominate the query time; fuzzy matching skips them
+STOP_GRAM_NAMES = 20000
+# Shared trigrams are counted with a sort below this many postings per name, with a dense bincount above
+DENSE_POSTINGS_RATIO = 1 / 16
+
+WORD_START = re.compile(r'(?<=[\s_\-.])\S')
+
+
+def normalize(text):
+    return ' '.join(str(text).casefold().split())
+
+
+def gram_codes(chars):
+    """
+    32-bit hashes of every character trigram.
+
+    Parameters:
+        chars (numpy.ndarray): uint32 code points.
+
+    Returns:
+        numpy.ndarray: uint64 hash of chars[i:i + 3] for every i.
+    """
+    c = chars.astype(np.uint64)
+    codes = (c[:-2] * np.uint64(0x9E3779B1)) ^ (c[1:-1] * np.uint64(0x85EBCA77)) ^ (c[2:] * np.uint64(0xC2B2AE3D))
+    return (codes ^ (codes >> np.uint64(32))) & np.uint64(0xFFFFFFFF)
+
+
+def padded_chars(texts):
+    # Two leading blanks and one trailing blank give short names and word starts their own trigrams;
+    # names are separated by NUL, which no trigram may span
+    joined = '\0'.join('  ' + text + ' ' for text in texts)
+    return np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32)
+
+
+class SearchIndex:
+    """
+    Prefix and typo-tolerant search over node names.
+
+    Prefix matching bisects two sorted key lists: the case-folded names and
+    every word inside them ('sapiens' finds 'Homo sapiens'). Fuzzy matching
+    uses an inverted index from character trigrams to the names holding
+    them, stored as one sorted array of trigram codes with offsets into a
+    flat array of name ids; a query scores only the names sharing its
+    trigrams. Both are built once per tree, with the trigrams computed
+    vectorised over all names at once.
+    """
+
+    def __init__(self, names):
+        self.names = [str(name) for name in names]
+        keys = [normalize(name) for name in self.names]
+
+        # Prefix index: full names, then words that do not start the name
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.name_keys = [keys[i] for i in order]
+        self.name_ids = np.array(order, dtype=np.int64)
+        words = [(key[match.start():], i) for i, key in enumerate(keys) for match in WORD_START.finditer(key)]
+        words.sort()
+        self.word_keys = [word for word, _ in words]
+        self.word_ids = np.array([i for _, i in words], dtype=np.int64)
+
+        # Trigram index: unique (trigram, name) pairs sorted by trigram
+        chars = padded_chars(keys)
+        owner = np.cumsum(chars == 0, dtype=np.uint64)
+        valid = (chars[:-2] != 0) & (chars[1:-1] != 0) & (chars[2:] != 0)
+        pairs = (gram_codes(chars)[valid] << np.uint64(32)) | owner[:-2][valid]
+        pairs.sort()
+        pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]] if len(pairs) else pairs
+        codes = pairs >> np.uint64(32)
+        self.gram_ids = (pairs & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.zeros(0, dtype=np.int64)
+        self.gram_codes = codes[starts]
+        self.gram_offsets = np.r_[starts, len(codes)]
+        self.gram_counts = np.bincount(self.gram_ids, minlength=len(keys))
+        sizes = np.diff(self.gram_offsets)
+        self.stop_grams = sizes > STOP_GRAM_NAMES
+        self.rare_counts = np.bincount(self.gram_ids[np.repeat(~self.stop_grams, sizes)], minlength=len(keys))
+
+    def __len__(self):
+        return len(self.names)
+
+    def prefix(self, query, limit=SEARCH_LIMIT):
+        """
+        Names starting with the query, then names with a word starting with it.
+
+        Parameters:
+            query (str): Text typed so far; case and repeated blanks are ignored.
+            limit (int): Most ids returned.
+
+        Returns:
+            list of int: Name ids, exact match first, each group in alphabetical order.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        found = []
+        seen = set()
+        for keys, ids in ((self.name_keys, self.name_ids), (self.word_keys, self.word_ids)):
+            lo = bisect_left(keys, query)
+            hi = bisect_right(keys, query + '\U0010ffff', lo)
+            # A name with several matching words shows up once
+            for i in ids[lo:min(hi, lo + limit * 2)].tolist():
+                if i not in seen:
+                    seen.add(i)
+                    found.append(i)
+                if len(found) == limit:
+                    return found
+        return found
+
+    def fuzzy(self, query, limit=SEARCH_LIMIT, threshold=FUZZY_THRESHOLD):
+        """
+        Names sharing most of their character trigrams with the query.
+
+        Parameters:
+            query (str): Text to match, typos allowed.
+            limit (int): Most matches returned.
+            threshold (float): Smallest similarity kept, in (0, 1].
+
+        Returns:
+            tuple: (int64 name ids, float64 similarities), best first; similarity is
+            shared trigrams over the trigrams of either string.
+        """
+        query = normalize(query)
+        none = np.zeros(0, dtype=np.int64), np.zeros(0)
+        if not query or not len(self.gram_codes):
+            return none
+        codes = np.unique(gram_codes(padded_chars([query])))
+        slots = np.minimum(np.searchsorted(self.gram_codes, codes), len(self.gram_codes) - 1)
+        slots = slots[self.gram_codes[slots] == codes]
+        if not len(slots):
+            return none
+        common = self.stop_grams[slots]
+        if common.all() and len(slots) == len(codes):
+            # Only common trigrams, e.g. a short generic query: rank by all of them
+            grams, counts = len(codes), self.gram_counts
+        else:
+            # Trigrams missing from the index still count towards the query's size
+            slots, grams, counts = slots[~common], len(codes) - int(common.sum()), self.rare_counts
+            if not len(slots):
+                return none
+        postings = np.concatenate([self.gram_ids[self.gram_offsets[s]:self.gram_offsets[s + 1]] for s in slots])
+
+        # Similarity s / (q + g - s) is at most s / q, so fewer shared trigrams cannot reach the threshold
+        needed = max(1, int(np.ceil(threshold * grams - 1e-9)))
+        if len(postings) > DENSE_POSTINGS_RATIO * len(self):
+            shared = np.bincount(postings, minlength=len(self))
+            ids = np.flatnonzero(shared >= needed)
+            shared = shared[ids]
+        else:
+            ids, shared = np.unique(postings, return_counts=True)
+            keep = shared >= needed
+            ids, shared = ids[keep].astype(np.int64), shared[keep]
+        scores = shared / (grams + counts[ids] - shared)
+        keep = scores >= threshold
+        ids, scores = ids[keep], scores[keep]
+        if len(ids) > limit:
+            best = np.argpartition(-scores, limit - 1)[:limit]
+            ids, scores = ids[best], scores[best]
+        # Ties go to the name with fewer trigrams, i.e. the closest in length
+        order = np.lexsort((self.gram_counts[ids], -scores))
+        return ids[order], scores[order]
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """
+        Ranked candidates for a search box: prefix matches, then fuzzy matches.
+
+        Returns:
+            list of str: Up to limit node names.
+        """
+        found = self.prefix(query, limit)
+        if len(found) < limit:
+            seen = set(found)
+            ids, _ = self.fuzzy(query, limit + len(found))
+            found += [i for i in ids.tolist() if i not in seen][:limit - len(found)]
+        return [self.names[i] for i in found]
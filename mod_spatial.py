@@ -0,0 +1,269 @@
+# mod_spatial.py
+
+import numpy as np
+
+from mod_layout import Octree
+
+# Cells with at most this many points are tested point by point instead of opened
+LEAF_SIZE = 64
+
+
+def range_indices(starts, counts):
+    """
+    Concatenates the integer ranges [start, start + count).
+
+    Returns:
+        numpy.ndarray: int64 indices.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(np.asarray(starts, dtype=np.int64), counts) + offsets
+
+
+def box_plane_bounds(center, extent, planes):
+    """
+    Smallest and largest signed distance of each box to each plane.
+
+    Parameters:
+        center (numpy.ndarray): (m, 3) box centers.
+        extent (numpy.ndarray): (m, 3) box half-sizes.
+        planes (numpy.ndarray): (p, 4) planes with unit normals.
+
+    Returns:
+        tuple: ((m, p) minimum distances, (m, p) maximum distances).
+    """
+    mid = center @ planes[:, :3].T + planes[:, 3]
+    spread = extent @ np.abs(planes[:, :3]).T
+    return mid - spread, mid + spread
+
+
+class VisibilityIndex:
+    """
+    Answers view-frustum and distance queries over fixed node positions.
+
+    Built on the Morton-ordered Octree used by the layout; each cell keeps the
+    tight bounding box of its points. A query walks the levels top-down over
+    the surviving cells only: cells entirely inside the view are emitted as a
+    whole index range, cells entirely outside are dropped, and straddling
+    cells are opened, or tested point by point once they are small. The cost
+    follows the number of visible points and boundary cells, not the scene size.
+    """
+
+    def __init__(self, positions, max_depth=8, leaf_size=LEAF_SIZE):
+        self.positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        self.leaf_size = leaf_size
+        self.tree = Octree(self.positions, max_depth) if len(self.positions) else None
+        # Per level: tight box center and half-size of every cell
+        self.bounds = []
+        if self.tree is not None:
+            self.sorted_positions = sorted_positions = self.positions[self.tree.order]
+            for level in self.tree.levels:
+                lo = np.minimum.reduceat(sorted_positions, level['start'], axis=0)
+                hi = np.maximum.reduceat(sorted_positions, level['start'], axis=0)
+                self.bounds.append(((lo + hi) / 2, (hi - lo) / 2))
+
+    def __len__(self):
+        return len(self.positions)
+
+    def query(self, planes=None, eye=None, max_distance=None, margin=0.0):
+        """
+        Finds the points inside the frustum and within max_distance of the eye.
+
+        Parameters:
+            planes (numpy.ndarray, optional): (p, 4) planes from util_math.frustum_planes.
+            eye (sequence, optional): Eye position for the distance test.
+            max_distance (float, optional): Maximum distance from the eye; no limit if None.
+            margin (float): Points this far outside a plane still count, e.g. the node radius.
+
+        Returns:
+            numpy.ndarray: uint32 indices of the visible points, in Morton order.
+        """
+        if self.tree is None:
+            return np.zeros(0, dtype=np.uint32)
+        use_distance = eye is not None and max_distance is not None
+        if use_distance:
+            eye = np.asarray(eye, dtype=np.float64)
+            max_distance2 = float(max_distance) ** 2
+        if planes is not None:
+            planes = np.asarray(planes, dtype=np.float64)
+
+        tree = self.tree
+        whole_starts, whole_counts = [], []
+        test_starts, test_counts = [], []
+        cells = np.zeros(1, dtype=np.int64)
+        for level, cell_data in enumerate(tree.levels):
+            center, extent = self.bounds[level][0][cells], self.bounds[level][1][cells]
+            outside = np.zeros(len(cells), dtype=bool)
+            inside = np.ones(len(cells), dtype=bool)
+            if planes is not None:
+                nearest, farthest = box_plane_bounds(center, extent, planes)
+                outside |= (farthest < -margin).any(axis=1)
+                inside &= (nearest >= -margin).all(axis=1)
+            if use_distance:
+                offset = np.abs(center - eye)
+                near2 = (np.maximum(offset - extent, 0) ** 2).sum(axis=1)
+                far2 = ((offset + extent) ** 2).sum(axis=1)
+                outside |= near2 >= max_distance2
+                inside &= far2 < max_distance2
+
+            start, count = cell_data['start'][cells], cell_data['count'][cells]
+            whole = inside & ~outside
+            whole_starts.append(start[whole])
+            whole_counts.append(count[whole])
+            partial = ~inside & ~outside
+            small = partial & ((count <= self.leaf_size) | (level == tree.max_depth))
+            test_starts.append(start[small])
+            test_counts.append(count[small])
+
+            opened = cells[partial & ~small]
+            if not len(opened):
+                break
+            cells = range_indices(cell_data['child_start'][opened],
+                                  cell_data['child_stop'][opened] - cell_data['child_start'][opened])
+
+        candidates = range_indices(np.concatenate(test_starts), np.concatenate(test_counts))
+        points = self.sorted_positions[candidates]
+        keep = np.ones(len(candidates), dtype=bool)
+        if planes is not None:
+            keep &= (points @ planes[:, :3].T + planes[:, 3] >= -margin).all(axis=1)
+        if use_distance:
+            keep &= ((points - eye) ** 2).sum(axis=1) < max_distance2
+
+        sorted_indices = np.concatenate([range_indices(np.concatenate(whole_starts), np.concatenate(whole_counts)),
+                                         candidates[keep]])
+        return tree.order[sorted_indices].astype(np.uint32)
+
+    def nearest(self, planes, eye, max_distance=None, margin=0.0):
+        """
+        Finds the visible point closest to the eye, e.g. the front-most node in a pick frustum.
+
+        The walk keeps an upper bound on the answer: any cell entirely inside the
+        frustum holds a hit no farther than its farthest corner, so cells whose
+        nearest corner lies beyond the bound are skipped. A pick frustum through
+        a dense cloud then opens only the cells near its front.
+
+        Parameters:
+            planes (numpy.ndarray): (p, 4) planes, typically of pick_matrix @ projection @ modelview.
+            eye (sequence): Eye position.
+            max_distance (float, optional): Maximum distance from the eye.
+            margin (float): Points this far outside a plane still count, e.g. the node radius.
+
+        Returns:
+            int or None: Index of the front-most point, or None if nothing is hit.
+        """
+        if self.tree is None:
+            return None
+        planes = np.asarray(planes, dtype=np.float64)
+        eye = np.asarray(eye, dtype=np.float64)
+        bound2 = np.inf if max_distance is None else float(max_distance) ** 2
+
+        tree = self.tree
+        test_starts, test_counts = [], []
+        cells = np.zeros(1, dtype=np.int64)
+        for level, cell_data in enumerate(tree.levels):
+            center, extent = self.bounds[level][0][cells], self.bounds[level][1][cells]
+            nearest, farthest = box_plane_bounds(center, extent, planes)
+            offset = np.abs(center - eye)
+            near2 = (np.maximum(offset - extent, 0) ** 2).sum(axis=1)
+            keep = (farthest >= -margin).all(axis=1) & (near2 < bound2)
+            inside = keep & (nearest >= -margin).all(axis=1)
+            if inside.any():
+                far2 = ((offset[inside] + extent[inside]) ** 2).sum(axis=1)
+                bound2 = min(bound2, float(far2.min()) * (1 + 1e-12))
+                keep &= near2 < bound2
+
+            start, count = cell_data['start'][cells], cell_data['count'][cells]
+            small = keep & ((count <= self.leaf_size) | (level == tree.max_depth))
+            test_starts.append(start[small])
+            test_counts.append(count[small])
+
+            opened = cells[keep & ~small]
+            if not len(opened):
+                break
+            cells = range_indices(cell_data['child_start'][opened],
+                                  cell_data['child_stop'][opened] - cell_data['child_start'][opened])
+
+        candidates = range_indices(np.concatenate(test_starts), np.concatenate(test_counts))
+        points = self.sorted_positions[candidates]
+        distance2 = ((points - eye) ** 2).sum(axis=1)
+        hit = (points @ planes[:, :3].T + planes[:, 3] >= -margin).all(axis=1) & (distance2 < bound2)
+        if not hit.any():
+            return None
+        return int(tree.order[candidates[hit][np.argmin(distance2[hit])]])
+
+    def cluster_cut(self, planes, eye, expand_size, budget, margin=0.0):
+        """
+        Chooses the cells drawn as single aggregate glyphs and the points drawn individually.
+
+        The octree cells form the cluster hierarchy. Starting from the root, a
+        cell is opened when its apparent size (bounding sphere radius over its
+        distance from the eye) exceeds expand_size, largest cells first, as long
+        as the number of drawn items (glyphs plus points) stays within budget.
+        Small cells open into their points. Cells outside the frustum are dropped,
+        and single-point cells are drawn as points. The work and the result are
+        bounded by the budget, whatever the number of points.
+
+        Parameters:
+            planes (numpy.ndarray): (p, 4) frustum planes.
+            eye (sequence): Eye position.
+            expand_size (float): Apparent size, in radians, above which a cell is opened.
+            budget (int): Maximum number of glyphs plus points.
+            margin (float): Points this far outside a plane still count, e.g. the node radius.
+
+        Returns:
+            tuple: (uint32 indices of the points drawn individually, dict of glyph
+            arrays 'start' and 'count' (range in Morton order), 'center' (center of
+            mass) and 'radius' (bounding sphere radius)).
+        """
+        glyphs = {'start': [], 'count': [], 'center': [], 'radius': []}
+        point_starts, point_counts = [], []
+        if self.tree is not None:
+            planes = np.asarray(planes, dtype=np.float64)
+            eye = np.asarray(eye, dtype=np.float64)
+            tree = self.tree
+            drawn = 0
+            cells = np.zeros(1, dtype=np.int64)
+            for level, cell_data in enumerate(tree.levels):
+                center, extent = self.bounds[level][0][cells], self.bounds[level][1][cells]
+                visible = (box_plane_bounds(center, extent, planes)[1] >= -margin).all(axis=1)
+                cells, center, extent = cells[visible], center[visible], extent[visible]
+                start, count = cell_data['start'][cells], cell_data['count'][cells]
+                radius = np.sqrt((extent ** 2).sum(axis=1))
+                size = radius / np.maximum(np.sqrt(((center - eye) ** 2).sum(axis=1)), 1e-12)
+
+                small = (count <= self.leaf_size) | (level == tree.max_depth)
+                children = np.where(small, count, 0)
+                if not small.all():
+                    children[~small] = cell_data['child_stop'][cells[~small]] - cell_data['child_start'][cells[~small]]
+                # Opening a cell replaces its glyph by its children or points; single points cost nothing
+                single = count == 1
+                cost = np.where(single, 0, children - 1)
+                wanted = np.flatnonzero(~single & (size > expand_size))
+                wanted = wanted[np.argsort(-size[wanted], kind='stable')]
+                remaining = budget - drawn - len(cells)
+                n_fit = int(np.searchsorted(np.cumsum(cost[wanted]), remaining, side='right'))
+                opened = np.zeros(len(cells), dtype=bool)
+                opened[wanted[:n_fit]] = True
+                opened |= single
+
+                as_points = opened & small
+                point_starts.append(start[as_points])
+                point_counts.append(count[as_points])
+                as_glyphs = ~opened
+                for key, values in (('start', start), ('count', count),
+                                    ('center', cell_data['com'][cells]), ('radius', radius)):
+                    glyphs[key].append(values[as_glyphs])
+                drawn += int(count[as_points].sum()) + int(as_glyphs.sum())
+
+                expanded = cells[opened & ~small]
+                if not len(expanded):
+                    break
+                cells = range_indices(cell_data['child_start'][expanded],
+                                      cell_data['child_stop'][expanded] - cell_data['child_start'][expanded])
+        if not point_starts:
+            return np.zeros(0, dtype=np.uint32), {key: np.zeros((0, 3) if key == 'center' else 0) for key in glyphs}
+        points = self.tree.order[range_indices(np.concatenate(point_starts), np.concatenate(point_counts))]
+        return points.astype(np.uint32), {key: np.concatenate(values) for key, values in glyphs.items()}
@@ -0,0 +1,94 @@
+# mod_synthetic.py
+
+import numpy as np
+import pandas as pd
+
+from mod_data_loader import SPECIES_COLUMN, MARKER_COLUMN, TIME_COLUMN
+from mod_graph import CompactGraph
+
+# Nucleotides the markers are drawn from
+BASES = np.frombuffer(b'ACGT', dtype=np.uint8)
+
+
+def synthetic_dataset(n_species, markers_per_species=2, marker_length=32, mutation_rate=0.05,
+                      marker_noise=0.01, seed=0):
+    """
+    Generates a species/marker dataset by evolving sequences down a random ancestry.
+
+    Every species descends from a uniformly chosen earlier one and differs
+    from it by point mutations, so the distances have tree structure like
+    real data. Each species is sampled markers_per_species times with a
+    little extra per-marker noise. The same arguments always give the same data.
+
+    Parameters:
+        n_species (int): Number of species.
+        markers_per_species (int): Marker rows per species.
+        marker_length (int): Bases per marker.
+        mutation_rate (float): Chance of each base changing from parent to child species.
+        marker_noise (float): Chance of each base changing between a species and one of its markers.
+        seed (int): Random seed.
+
+    Returns:
+        dict: 'species' (names), 'parents' (index of each species' ancestor, -1 for the root),
+        'times' (species origin times) and the rows: 'row_species', 'markers' and 'row_times'.
+    """
+    rng = np.random.default_rng(seed)
+    parents = np.full(n_species, -1, dtype=np.int64)
+    if n_species > 1:
+        parents[1:] = (rng.random(n_species - 1) * np.arange(1, n_species)).astype(np.int64)
+    depth = np.zeros(n_species, dtype=np.int64)
+    for i in range(1, n_species):
+        depth[i] = depth[parents[i]] + 1
+
+    # Sequences are filled one generation at a time, every parent before its children
+    sequences = np.empty((n_species, marker_length), dtype=np.uint8)
+    sequences[:1] = rng.integers(0, 4, (1, marker_length))
+    for level in range(1, int(depth.max(initial=0)) + 1):
+        members = np.flatnonzero(depth == level)
+        mutated = rng.random((len(members), marker_length)) < mutation_rate
+        sequences[members] = np.where(mutated, rng.integers(0, 4, mutated.shape), sequences[parents[members]])
+    times = depth + rng.random(n_species)
+    times[0] = 0.0
+
+    row_species = np.repeat(np.arange(n_species), markers_per_species)
+    noisy = rng.random((len(row_species), marker_length)) < marker_noise
+    rows = np.where(noisy, rng.integers(0, 4, noisy.shape), sequences[row_species])
+    markers = BASES[rows].view(f'S{marker_length}').ravel().astype(str)
+
+    return {
+        'species': np.array([f"Species {i}" for i in range(n_species)], dtype=object),
+        'parents': parents,
+        'times': times,
+        'row_species': row_species,
+        'markers': markers,
+        'row_times': times[row_species],
+    }
+
+
+def write_dataset(file_path, dataset):
+    """
+    Writes a synthetic dataset as a CSV file load_data and load_columnar read.
+
+    Parameters:
+        file_path (str): Output CSV path.
+        dataset (dict): As returned by synthetic_dataset.
+    """
+    pd.DataFrame({
+        SPECIES_COLUMN: dataset['species'][dataset['row_species']],
+        MARKER_COLUMN: dataset['markers'],
+        TIME_COLUMN: np.round(dataset['row_times'], 4),
+    }).to_csv(file_path, index=False)
+
+
+def ancestry_tree(dataset):
+    """
+    The tree the dataset was generated from: each species joined to its ancestor.
+
+    Useful where building a tree from the distances is too slow, since it
+    has the same size and shape as the reconstructed one.
+
+    Returns:
+        CompactGraph: Species nodes; edge weights are the generations between them.
+    """
+    children = np.flatnonzero(dataset['parents'] >= 0)
+    return CompactGraph(dataset['species'], np.column_stack([children, dataset['parents'][children]]))
@@ -0,0 +1,76 @@
+# mod_time_index.py
+
+import numpy as np
+
+
+class TimeIndex:
+    """
+    Sorted interval index over element lifetimes.
+
+    Element i exists during the closed interval [start_i, end_i]; -inf and inf
+    stand for "always". Element ids are kept sorted by start and by end, so
+    moving the current time from t0 to t1 only visits the elements whose start
+    or end lies between the two: a step costs O(log n + k) for k changes,
+    whatever the number of elements.
+    """
+
+    def __init__(self, intervals):
+        intervals = np.asarray(intervals, dtype=np.float64).reshape(-1, 2)
+        self.starts = intervals[:, 0]
+        self.ends = intervals[:, 1]
+        self.by_start = np.argsort(self.starts, kind='stable')
+        self.sorted_starts = self.starts[self.by_start]
+        self.by_end = np.argsort(self.ends, kind='stable')
+        self.sorted_ends = self.ends[self.by_end]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def time_range(self):
+        """
+        Returns:
+            tuple or None: (earliest, latest) finite start or end time, or None when
+            no element has a finite time.
+        """
+        times = np.concatenate([self.sorted_starts, self.sorted_ends])
+        times = times[np.isfinite(times)]
+        if not len(times):
+            return None
+        return float(times.min()), float(times.max())
+
+    def active(self, time):
+        """
+        Parameters:
+            time (float or None): Current time; None means every element.
+
+        Returns:
+            numpy.ndarray: Boolean mask of the elements existing at that time.
+        """
+        if time is None:
+            return np.ones(len(self), dtype=bool)
+        return (self.starts <= time) & (self.ends >= time)
+
+    def delta(self, t0, t1):
+        """
+        Elements that appear and disappear when the current time moves from t0 to t1.
+
+        Returns:
+            tuple: (int64 ids existing at t1 but not at t0, int64 ids existing at t0 but not at t1).
+        """
+        if t1 >= t0:
+            # Started in (t0, t1] and not yet ended; ended in [t0, t1) after starting by t0
+            lo, hi = np.searchsorted(self.sorted_starts, [t0, t1], side='right')
+            appearing = self.by_start[lo:hi]
+            appearing = appearing[self.ends[appearing] >= t1]
+            lo, hi = np.searchsorted(self.sorted_ends, [t0, t1], side='left')
+            disappearing = self.by_end[lo:hi]
+            disappearing = disappearing[self.starts[disappearing] <= t0]
+        else:
+            # Ended in [t1, t0) after starting by t1; started in (t1, t0] and still there at t0
+            lo, hi = np.searchsorted(self.sorted_ends, [t1, t0], side='left')
+            appearing = self.by_end[lo:hi]
+            appearing = appearing[self.starts[appearing] <= t1]
+            lo, hi = np.searchsorted(self.sorted_starts, [t1, t0], side='right')
+            disappearing = self.by_start[lo:hi]
+            disappearing = disappearing[self.ends[disappearing] >= t0]
+        return appearing, disappearing
@@ -0,0 +1,274 @@
+# mod_tracing.py
+
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+# Span events kept for the Chrome trace; the summary counts every span regardless
+TRACE_EVENT_LIMIT = 500000
+# Allocation sites listed per tracemalloc snapshot
+SNAPSHOT_TOP = 10
+# Spans of this category take a tracemalloc snapshot when they end, if memory tracing is on
+STAGE_CATEGORY = 'stage'
+# Allocations of the tracer itself and of module imports are left out of snapshots
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+)
+TRACE_FILE = 'profile_trace.json'
+
+
+class NullSpan:
+    """
+    The span handed out while tracing is off: entering and leaving it does nothing.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    """
+    A timed region on one thread, recorded by its tracer when it ends.
+    """
+
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start', 'memory')
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.memory = tracemalloc.get_traced_memory()[0] if self.tracer.memory else None
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        if self.memory is not None:
+            self.args['memory_delta_kb'] = (tracemalloc.get_traced_memory()[0] - self.memory) / 1024
+        if exc_info[0] is not None:
+            self.args['error'] = exc_info[0].__name__
+        self.tracer.record(self, end)
+        if self.memory is not None and self.category == STAGE_CATEGORY:
+            self.tracer.snapshot(self.name)
+        return False
+
+
+class Tracer:
+    """
+    Collects spans, counters and memory snapshots from any thread.
+
+    Tracing is off until enable() is called; span() then returns the shared
+    NULL_SPAN, so instrumented code pays one attribute check per span. Times
+    come from the monotonic perf_counter_ns clock. With memory tracing,
+    tracemalloc runs, every span records the traced memory it left allocated,
+    and spans of the 'stage' category end with a snapshot of the top
+    allocation sites.
+    """
+
+    def __init__(self, event_limit=TRACE_EVENT_LIMIT):
+        self.enabled = False
+        self.memory = False
+        self.events = deque(maxlen=event_limit)
+        self.totals = {}  # Span name -> [calls, total ns, max ns]
+        self.counters = {}
+        self.snapshots = []  # (label, [(allocation site, KiB, blocks)])
+        self.last_snapshot = None  # Snapshot the next one is compared to
+        self.thread_names = {}  # Thread ident -> name, taken while the thread is alive
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter_ns()
+        self.started_tracemalloc = False
+
+    def enable(self, memory=False):
+        """
+        Parameters:
+            memory (bool): Also trace Python allocations with tracemalloc, which slows everything down.
+        """
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+        self.memory = memory
+        self.enabled = True
+        if memory:
+            self.last_snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+    def disable(self):
+        self.enabled = False
+        self.memory = False
+        self.last_snapshot = None
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+    def reset(self):
+        with self.lock:
+            self.events.clear()
+            self.totals.clear()
+            self.counters.clear()
+            self.snapshots.clear()
+            self.thread_names.clear()
+            self.origin = time.perf_counter_ns()
+
+    def span(self, name, category=STAGE_CATEGORY, **args):
+        """
+        Parameters:
+            name (str): Span name, e.g. 'load' or 'frame'.
+            category (str): Grouping shown in the trace viewer.
+            **args: Values attached to the span, e.g. sizes.
+
+        Returns:
+            Span or NullSpan: Context manager timing its block.
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, category, args)
+
+    def thread(self):
+        # Called with the lock held
+        ident = threading.get_ident()
+        if ident not in self.thread_names:
+            self.thread_names[ident] = threading.current_thread().name
+        return ident
+
+    def record(self, span, end):
+        duration = end - span.start
+        with self.lock:
+            self.events.append((span.name, span.category, span.start, duration, self.thread(), span.args))
+            totals = self.totals.get(span.name)
+            if totals is None:
+                self.totals[span.name] = [1, duration, duration]
+            else:
+                totals[0] += 1
+                totals[1] += duration
+                totals[2] = max(totals[2], duration)
+
+    def count(self, name, value=1):
+        # Adds to a named counter; the trace shows its running total
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = total = self.counters.get(name, 0) + value
+            self.events.append((name, 'counter', time.perf_counter_ns(), None, self.thread(), total))
+
+    def snapshot(self, label, limit=SNAPSHOT_TOP):
+        """
+        Records the allocation sites whose traced memory grew most since the previous
+        snapshot (or since memory tracing was enabled). Does nothing without memory tracing.
+        """
+        if not (self.enabled and self.memory and tracemalloc.is_tracing()):
+            return
+        snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        with self.lock:
+            previous, self.last_snapshot = self.last_snapshot, snapshot
+            if previous is None:
+                statistics = snapshot.statistics('lineno')
+                top = [(stat.traceback[0], stat.size, stat.count) for stat in statistics[:limit]]
+            else:
+                statistics = snapshot.compare_to(previous, 'lineno')
+                top = [(stat.traceback[0], stat.size_diff, stat.count_diff) for stat in statistics[:limit]]
+            self.snapshots.append((label, [(f"{os.path.basename(frame.filename)}:{frame.lineno}", size / 1024, blocks)
+                                           for frame, size, blocks in top]))
+
+    def chrome_trace(self):
+        """
+        Returns:
+            dict: The recorded spans and counters in the Chrome trace event format,
+            viewable in chrome://tracing or Perfetto.
+        """
+        pid = os.getpid()
+        with self.lock:
+            events = list(self.events)
+            snapshots = list(self.snapshots)
+            thread_names = dict(self.thread_names)
+        trace_events = []
+        threads = {}
+        for name, category, start, duration, thread, args in events:
+            tid = threads.setdefault(thread, len(threads))
+            timestamp = (start - self.origin) / 1000
+            if category == 'counter':
+                trace_events.append({'name': name, 'ph': 'C', 'ts': timestamp, 'pid': pid, 'tid': tid,
+                                     'args': {name: args}})
+            else:
+                trace_events.append({'name': name, 'cat': category, 'ph': 'X', 'ts': timestamp,
+                                     'dur': duration / 1000, 'pid': pid, 'tid': tid, 'args': args})
+        for thread, tid in threads.items():
+            trace_events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                                 'args': {'name': thread_names.get(thread, f'thread {tid}')}})
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms',
+                'otherData': {'counters': dict(self.counters),
+                              'snapshots': [{'label': label, 'top': top} for label, top in snapshots]}}
+
+    def save_chrome_trace(self, file_name=TRACE_FILE):
+        with open(file_name, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+
+    def summary(self):
+        """
+        Returns:
+            list of dict: Per span name, in order of total time: 'name', 'calls',
+            'total_ms', 'mean_ms' and 'max_ms'.
+        """
+        with self.lock:
+            totals = {name: list(values) for name, values in self.totals.items()}
+        rows = [{'name': name, 'calls': calls, 'total_ms': total / 1e6, 'mean_ms': total / calls / 1e6,
+                 'max_ms': longest / 1e6} for name, (calls, total, longest) in totals.items()]
+        return sorted(rows, key=lambda row: -row['total_ms'])
+
+    def format_summary(self):
+        # Span table, then counters and the snapshots' largest allocation sites
+        lines = [f"{'span':<16} {'calls':>8} {'total ms':>12} {'mean ms':>10} {'max ms':>10}"]
+        for row in self.summary():
+            lines.append(f"{row['name']:<16} {row['calls']:>8} {row['total_ms']:>12.2f} "
+                         f"{row['mean_ms']:>10.3f} {row['max_ms']:>10.2f}")
+        for name, total in sorted(self.counters.items()):
+            lines.append(f"counter {name}: {total}")
+        for label, top in self.snapshots:
+            lines.append(f"memory growth in {label}:")
+            lines.extend(f"    {site:<40} {size:>+10.1f} KiB {count:>+8} blocks" for site, size, count in top)
+        return '\n'.join(lines)
+
+
+TRACER = Tracer()
+
+
+def span(name, category=STAGE_CATEGORY, **args):
+    # Times a block on the application tracer; see Tracer.span
+    if not TRACER.enabled:
+        return NULL_SPAN
+    return Span(TRACER, name, category, args)
+
+
+def count(name, value=1):
+    TRACER.count(name, value)
+
+
+def traced(name, category=STAGE_CATEGORY):
+    """
+    Decorator timing every call of a function as a span on the application tracer.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return function(*args, **kwargs)
+            with Span(TRACER, name, category, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,42 +1,453 @@
 # mod_tree_generator.py
 
-import networkx as nx
+from functools import partial
+
 import numpy as np
-from util_math import calculate_genetic_distance
+from mod_graph import CompactGraph, unbounded_times
+from mod_layout import compute_layout, relax_layout, DEFAULT_LAYOUT
+from mod_cache import fingerprint_array, fingerprint_names, make_key
+from mod_tracing import span
+
+DEFAULT_TREE_METHOD = 'neighbor_joining'
 
-def generate_tree(processed_data):
+def distance_array(processed_data):
     """
-    Generates an evolutionary tree structure with 3D positions.
+    Returns the species distance matrix of processed data as a NumPy array.
 
     Parameters:
         processed_data (dict): Processed data containing species and distance matrix.
 
     Returns:
-        networkx.Graph: Graph representing the evolutionary tree with 3D positions.
+        numpy.ndarray: (n_species, n_species) float64 distances.
     """
+    if 'distance_array' in processed_data:
+        return np.asarray(processed_data['distance_array'], dtype=np.float64)
     species = processed_data['species']
     distance_matrix = processed_data['distance_matrix']
+    return np.array([[distance_matrix[sp1][sp2] for sp2 in species] for sp1 in species], dtype=np.float64)
+
+def finite_distances(distances):
+    """
+    Replaces infinite distances (species without comparable markers) with a finite ceiling.
+
+    Parameters:
+        distances (numpy.ndarray): Distance matrix.
+
+    Returns:
+        numpy.ndarray: Copy of the matrix with every entry finite.
+    """
+    distances = np.array(distances, dtype=np.float64)
+    finite = np.isfinite(distances)
+    ceiling = 2 * distances[finite].max() if finite.any() and distances[finite].max() > 0 else 1.0
+    distances[~finite] = ceiling
+    np.fill_diagonal(distances, 0.0)
+    return distances
+
+def finite_row(row):
+    # One distance row with infinite entries replaced by the ceiling finite_distances would use
+    row = np.asarray(row, dtype=np.float64)
+    finite = np.isfinite(row)
+    ceiling = 2 * row[finite].max() if finite.any() and row[finite].max() > 0 else 1.0
+    return np.where(finite, row, ceiling)
+
+def neighbor_joining(distances, block_size=128, progress=None):
+    """
+    Builds a tree by neighbor joining.
+
+    The active matrix is kept compact by moving the last active row into the
+    slot freed by each join, and the Q-criterion is evaluated in row blocks so
+    memory stays at one distance matrix. The final join is rooted at the
+    midpoint of its edge.
+
+    Parameters:
+        distances (numpy.ndarray): (n, n) finite, symmetric distance matrix.
+        block_size (int): Rows of the Q matrix evaluated at once.
+        progress (callable, optional): Called with the fraction of joins done after each join.
+
+    Returns:
+        tuple: (children, lengths) arrays of shape (n - 1, 2); row k creates node n + k.
+    """
+    n = len(distances)
+    D = np.array(distances, dtype=np.float64)
+    R = D.sum(axis=1)
+    ids = np.arange(n)
+    children = np.empty((max(n - 1, 0), 2), dtype=np.int64)
+    lengths = np.empty((max(n - 1, 0), 2), dtype=np.float64)
+    buffer = np.empty((min(block_size, n), n), dtype=np.float64)
+    active = n
+    for step in range(n - 1):
+        if active == 2:
+            i, j = 0, 1
+            half = D[0, 1] / 2
+            length_i, length_j = half, half
+        else:
+            # argmin of (active - 2) * D - R_i - R_j, scaled to D - r_i - r_j
+            r = R[:active] / (active - 2)
+            best = np.inf
+            i = j = -1
+            for start in range(0, active, block_size):
+                stop = min(start + block_size, active)
+                # Q is symmetric, so columns left of the block's diagonal can be skipped
+                width = active - start
+                q = buffer[:stop - start, :width]
+                np.subtract(D[start:stop, start:active], r[None, start:active], out=q)
+                q -= r[start:stop, None]
+                np.fill_diagonal(q, np.inf)
+                flat = np.argmin(q)
+                if q.flat[flat] < best:
+                    best = q.flat[flat]
+                    i, j = start + flat // width, start + flat % width
+            i, j = min(i, j), max(i, j)
+            dij = D[i, j]
+            length_i = 0.5 * dij + (R[i] - R[j]) / (2 * (active - 2))
+            length_j = dij - length_i
+
+            merged = 0.5 * (D[i, :active] + D[j, :active] - dij)
+            R[:active] += merged - D[:active, i] - D[:active, j]
+            merged[i] = merged[j] = 0.0
+            D[i, :active] = merged
+            D[:active, i] = merged
+            R[i] = merged.sum()
+
+        children[step] = ids[i], ids[j]
+        lengths[step] = max(length_i, 0.0), max(length_j, 0.0)
+        ids[i] = n + step
+
+        last = active - 1
+        if j != last:
+            D[j, :active] = D[last, :active]
+            D[:active, j] = D[:active, last]
+            D[j, j] = 0.0
+            R[j] = R[last]
+            ids[j] = ids[last]
+        active -= 1
+        if progress is not None:
+            progress((step + 1) / (n - 1))
+    return children, lengths
+
+def upgma(distances, progress=None):
+    """
+    Builds an ultrametric tree by UPGMA (average linkage).
+
+    Uses the nearest-neighbor chain algorithm, so the whole tree is built with
+    O(n^2) work instead of a global minimum search per merge.
+
+    Parameters:
+        distances (numpy.ndarray): (n, n) finite, symmetric distance matrix.
+        progress (callable, optional): Called with the fraction of merges done after each merge.
+
+    Returns:
+        tuple: (children, lengths) arrays of shape (n - 1, 2); row k creates node n + k.
+    """
+    n = len(distances)
+    D = np.array(distances, dtype=np.float64)
+    np.fill_diagonal(D, np.inf)
+    ids = np.arange(n)
+    sizes = np.ones(n)
+    heights = np.zeros(2 * n - 1)
+    alive = np.ones(n, dtype=bool)
+    children = np.empty((max(n - 1, 0), 2), dtype=np.int64)
+    lengths = np.empty((max(n - 1, 0), 2), dtype=np.float64)
+    chain = []
+    for step in range(n - 1):
+        if not chain:
+            chain.append(int(np.argmax(alive)))
+        while True:
+            a = chain[-1]
+            b = int(np.argmin(D[a]))
+            if len(chain) > 1 and D[a, chain[-2]] <= D[a, b]:
+                b = chain[-2]
+            if len(chain) > 1 and b == chain[-2]:
+                break
+            chain.append(b)
+        a, b = chain.pop(), chain.pop()
+        node = n + step
+        heights[node] = D[a, b] / 2
+        children[step] = ids[a], ids[b]
+        lengths[step] = (max(heights[node] - heights[ids[a]], 0.0), max(heights[node] - heights[ids[b]], 0.0))
+
+        # Slot a becomes the merged cluster, slot b is retired
+        merged = (sizes[a] * D[a] + sizes[b] * D[b]) / (sizes[a] + sizes[b])
+        D[a] = merged
+        D[:, a] = merged
+        D[b] = np.inf
+        D[:, b] = np.inf
+        D[a, a] = np.inf
+        alive[b] = False
+        sizes[a] += sizes[b]
+        ids[a] = node
+        if progress is not None:
+            progress((step + 1) / (n - 1))
+    return children, lengths
+
+TREE_BUILDERS = {
+    'neighbor_joining': neighbor_joining,
+    'upgma': upgma,
+}
+
+def tree_from_merges(species, children, lengths):
+    """
+    Converts merge records into a tree.
+
+    Parameters:
+        species (sequence): Leaf names; leaf k has node id k.
+        children (numpy.ndarray): Child ids of every internal node.
+        lengths (numpy.ndarray): Branch lengths to each child.
+
+    Returns:
+        CompactGraph: Tree with node ids as in the merge records, 'Ancestor k' names for
+        internal node n + k - 1 and branch lengths as edge weights.
+    """
+    names = list(species)
+    n = len(names)
+    taken = set(names)
+    for k in range(len(children)):
+        name = f"Ancestor {k + 1}"
+        while name in taken:
+            name = f"_{name}"
+        taken.add(name)
+        names.append(name)
+    parents = np.repeat(np.arange(n, n + len(children)), 2)
+    edges = np.column_stack([parents, np.asarray(children).reshape(-1)])
+    internal = np.zeros(len(names), dtype=np.uint8)
+    internal[n:] = 1
+    return CompactGraph(names, edges, np.asarray(lengths, dtype=np.float64).reshape(-1), internal=internal)
+
+def assign_times(G, species, species_times):
+    """
+    Sets node lifetimes from the species lifetimes.
+
+    Inferred ancestors span the lifetimes of all the species below them, with
+    the tree rooted at the last internal node (the final merge).
+
+    Parameters:
+        G (CompactGraph): Tree from tree_from_merges or complete_graph.
+        species (sequence): Species names.
+        species_times (numpy.ndarray or None): (n_species, 2) [start, end]; nothing is set if None.
+
+    Returns:
+        CompactGraph: G, with node_times set.
+    """
+    if species_times is None or not len(G):
+        return G
+    times = np.empty((G.n_nodes, 2))
+    times[:, 0] = np.inf
+    times[:, 1] = -np.inf
+    index = G.index()
+    known = [(index[sp], i) for i, sp in enumerate(species) if sp in index]
+    if known:
+        nodes, rows = np.array(known).T
+        times[nodes] = np.asarray(species_times, dtype=np.float64)[rows]
+    if G.internal.any():
+        preorder, parent, _ = G.preorder(G.root())
+        starts, ends, parents = times[:, 0].tolist(), times[:, 1].tolist(), parent.tolist()
+        for node in reversed(preorder.tolist()):
+            up = parents[node]
+            if up >= 0:
+                starts[up] = min(starts[up], starts[node])
+                ends[up] = max(ends[up], ends[node])
+        times = np.column_stack([starts, ends])
+    # Nodes without any timed species below them stay unbounded
+    times[~np.isfinite(times[:, 0]), 0] = -np.inf
+    times[~np.isfinite(times[:, 1]), 1] = np.inf
+    G.node_times = times.astype(np.float32)
+    return G
+
+def complete_graph(species, distances):
+    # Legacy complete graph: one edge per species pair weighted by distance
+    rows, cols = np.nonzero(np.triu(distances >= 0, k=1))
+    return CompactGraph(species, np.column_stack([rows, cols]), distances[rows, cols])
+
+def insert_species(G, distances, species, added):
+    """
+    Attaches new species to a tree without rebuilding it.
+
+    Each new species is joined to the closest species already in the tree
+    (earlier new ones included) the way a neighbor-joining step joins a pair:
+    a new ancestor splits the branch above the closest species, both hang
+    from it, and the branch lengths come from the neighbor-joining formula
+    over the species placed so far. The new nodes are numbered just before
+    the root, so the root stays the last internal node and every other node
+    keeps its id.
+
+    Parameters:
+        G (CompactGraph): Tree, e.g. from generate_tree.
+        distances (numpy.ndarray): Distance matrix over all species, the new ones included.
+        species (sequence): Species names in distance matrix order.
+        added (sequence of int): Rows of the new species, inserted in this order.
+
+    Returns:
+        tuple: (CompactGraph with the new leaves and ancestors, int64 ids of the new nodes).
+        New nodes have NaN positions if the tree has positions and unbounded lifetimes;
+        edge lifetimes are derived from the nodes again.
+    """
+    if not len(G) or G.n_edges != G.n_nodes - 1:
+        raise ValueError("Species can only be inserted into a non-empty tree")
+    n = G.n_nodes
+    root = G.root()
+    _, parent, parent_edge = G.preorder(root)
+    parent, parent_edge = parent.tolist(), parent_edge.tolist()
+    index = G.index()
+    node_of = np.array([index.get(name, -1) for name in species], dtype=np.int64)
+    placed = node_of >= 0
+    if not placed.any():
+        raise ValueError("None of the species are in the tree")
+    edges = G.edges.tolist()
+    weights = G.weights.tolist()
+    names = G.node_names()
+    taken = set(names)
+    ancestors = int(G.internal.sum())
+    new_names, new_internal = [], []
+
+    for row in added:
+        if placed[row]:
+            continue
+        row_distances = finite_row(distances[row])
+        nearest = int(np.argmin(np.where(placed, row_distances, np.inf)))
+        leaf = int(node_of[nearest])
+        distance = row_distances[nearest]
+        others = placed.copy()
+        others[nearest] = False
+        length = 0.5 * distance
+        if others.any():
+            length += 0.5 * (row_distances[others].mean() - finite_row(distances[nearest])[others].mean())
+        length = min(max(length, 0.0), distance)
+
+        ancestors += 1
+        name = f"Ancestor {ancestors}"
+        while name in taken:
+            name = f"_{name}"
+        taken.add(name)
+        ancestor, new_leaf = n + len(new_names), n + len(new_names) + 1
+        new_names += [name, species[row]]
+        new_internal += [1, 0]
+
+        # The ancestor takes the leaf's place on the branch above it
+        up, branch = parent[leaf], parent_edge[leaf]
+        leaf_length = distance - length
+        if branch >= 0:
+            leaf_length = min(leaf_length, weights[branch])
+            edges[branch] = [up, ancestor]
+            weights[branch] -= leaf_length
+        edges += [[ancestor, leaf], [ancestor, new_leaf]]
+        weights += [leaf_length, length]
+        parent += [up, ancestor]
+        parent_edge += [branch, len(edges) - 1]
+        parent[leaf], parent_edge[leaf] = ancestor, len(edges) - 2
+        node_of[row] = new_leaf
+        placed[row] = True
+
+    # Temporary ids n, n + 1, ... move in front of the root
+    added_count = len(new_names)
+    old_ids = np.arange(n)
+    remap = np.concatenate([old_ids + np.where(old_ids >= root, added_count, 0), root + np.arange(added_count)])
+    order = np.argsort(remap)
+    all_names = names + new_names
+    positions = None
+    if G.positions is not None:
+        positions = np.concatenate([G.positions, np.full((added_count, 3), np.nan, dtype=np.float32)])[order]
+    grown = CompactGraph(
+        [all_names[i] for i in order], remap[np.array(edges, dtype=np.int64).reshape(-1, 2)], weights,
+        internal=np.concatenate([G.internal, np.array(new_internal, dtype=np.uint8)])[order],
+        positions=positions,
+        attribute_codes=np.concatenate([G.attribute_codes, np.zeros(added_count, dtype=np.uint16)])[order],
+        attribute_names=G.attribute_names,
+        node_times=np.concatenate([G.node_times, unbounded_times(added_count)])[order],
+    )
+    return grown, root + np.arange(added_count)
+
+def extend_tree(processed_data, G, layout_params=None, progress=None):
+    """
+    Adds the species of processed data that a laid-out tree lacks, keeping the existing layout.
+
+    The new species are attached with insert_species, then only the new nodes
+    are relaxed with relax_layout around the current positions, so existing
+    nodes keep theirs exactly. An empty tree is built from scratch with
+    generate_tree.
+
+    Parameters:
+        processed_data (dict): Processed data over the tree's species and the new ones,
+            e.g. from data_processor.extend_processed_data.
+        G (CompactGraph): Laid-out tree from generate_tree or an earlier call.
+        layout_params (dict, optional): Layout settings; 'seed' and 'theta' are used.
+        progress (callable, optional): Called as progress('layout', fraction).
+
+    Returns:
+        CompactGraph: The grown tree with positions and lifetimes.
+    """
+    if not len(G):
+        return generate_tree(processed_data, layout_params=layout_params, progress=progress)
+    if G.positions is None:
+        raise ValueError("Species can only be added to a laid-out tree")
+    species = list(processed_data['species'])
+    added = [row for row, name in enumerate(species) if name not in G]
+    if not added:
+        return G
+    with span('tree', method='insert', species=len(added)):
+        G, new_nodes = insert_species(G, distance_array(processed_data), species, added)
+    layout_params = layout_params or {}
+    movable = np.zeros(G.n_nodes, dtype=bool)
+    movable[new_nodes] = True
+    with span('layout', method='relax', nodes=len(new_nodes)):
+        G.positions = relax_layout(G, movable, seed=layout_params.get('seed', 42),
+                                   theta=layout_params.get('theta', 1.0),
+                                   progress=partial(progress, 'layout') if progress else None).astype(np.float32)
+    return assign_times(G, species, processed_data.get('species_times'))
+
+def generate_tree(processed_data, method=None, layout_params=None, layout_cache=None, progress=None, preview=None):
+    """
+    Generates an evolutionary tree structure with 3D positions.
+
+    Parameters:
+        processed_data (dict): Processed data containing species and distance matrix.
+        method (str, optional): 'neighbor_joining' (default), 'upgma' or 'complete'
+            for the legacy all-pairs graph.
+        layout_params (dict, optional): Layout 'method', 'seed' and algorithm parameters.
+        layout_cache (LayoutCache, optional): Cache of previously laid-out trees.
+        progress (callable, optional): Called as progress(stage, fraction) for the 'tree' and
+            'layout' stages; an exception it raises aborts the build.
+        preview (callable, optional): Receives a copy of the tree with a coarse radial layout
+            before a slower layout runs.
+
+    Returns:
+        CompactGraph: The evolutionary tree with 3D positions.
+    """
+    species = list(processed_data['species'])
+    distances = distance_array(processed_data)
+    method = method or DEFAULT_TREE_METHOD
+    layout_params = dict(layout_params or {})
+
+    if layout_cache is not None:
+        # Without a file hash, the species names must be keyed along with the distances they label
+        fingerprint = (processed_data.get('fingerprint')
+                       or make_key(fingerprint_array(distances), fingerprint_names(species)))
+        cache_key = layout_cache.key(fingerprint, method, layout_params)
+        G = layout_cache.load_graph(cache_key)
+        if G is not None:
+            return assign_times(G, species, processed_data.get('species_times'))
+
+    if method != 'complete' and method not in TREE_BUILDERS:
+        raise ValueError(f"Unknown tree method: {method}")
+    with span('tree', method=method, species=len(species)):
+        if method == 'complete':
+            G = complete_graph(species, distances)
+        else:
+            children, lengths = TREE_BUILDERS[method](finite_distances(distances),
+                                                      progress=partial(progress, 'tree') if progress else None)
+            G = tree_from_merges(species, children, lengths)
+
+    layout_method = layout_params.pop('method', None) or DEFAULT_LAYOUT
+    if preview is not None and layout_method != 'radial':
+        # The radial layout takes linear time, so the tree can be shown while the real layout runs
+        coarse = G.with_positions(compute_layout(G, 'radial'))
+        preview(assign_times(coarse, species, processed_data.get('species_times')))
     
-    # Create a graph
-    G = nx.Graph()
-    
-    # Add nodes
-    for sp in species:
-        G.add_node(sp)
-    
-    # Add edges with genetic distance as weight
-    for sp1 in species:
-        for sp2 in species:
-            if sp1 != sp2:
-                distance = distance_matrix[sp1][sp2]
-                if distance >= 0:
-                    G.add_edge(sp1, sp2, weight=distance)
-    
-    # Compute 3D positions using spring layout
-    pos = nx.spring_layout(G, dim=3, weight='weight', seed=42)
-    
-    # Assign positions to nodes
-    for node in G.nodes():
-        G.nodes[node]['pos'] = pos[node]
+    # Compute 3D positions with the configured layout engine
+    G.positions = compute_layout(G, layout_method, layout_params.pop('seed', 42),
+                                 progress=partial(progress, 'layout') if progress else None,
+                                 **layout_params).astype(np.float32)
+
+    if layout_cache is not None:
+        layout_cache.store_graph(cache_key, G)
     
-    return G
+    return assign_times(G, species, processed_data.get('species_times'))
@@ -1,10 +1,14 @@
 # mod_ui.py
 
 from PyQt5 import QtWidgets
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QHBoxLayout, QSlider, QLabel, QLineEdit, QTextEdit
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QHBoxLayout, QSlider, QLabel, QLineEdit, QTextEdit, QCompleter
+from PyQt5.QtCore import Qt, QStringListModel
 import logging
 
+from mod_edge_index import EDGE_FILTER_MODES
+from mod_pipeline import PIPELINE_STAGES
+from config_constants import TIME_SLIDER_STEPS
+
 logging.basicConfig(filename="app.log", level=logging.INFO)
 
 class LogViewer(QWidget):
@@ -36,7 +40,11 @@ class UserInterface(QWidget):
         self.settings = settings
         self.viz = visualization
         self.event_manager = event_manager
+        self.time_range = None
         self.initUI()
+        self.event_manager.subscribe('time_range', self.update_time_range)
+        self.event_manager.subscribe('edge_source', self.update_edge_source)
+        self.event_manager.subscribe('search_query', self.show_search_results)
 
     def initUI(self):
         self.setWindowTitle('User Interface')
@@ -63,11 +71,21 @@ class UserInterface(QWidget):
         self.zoom_out_button = QPushButton('Zoom Out')
         self.reset_view_button = QPushButton('Reset View')
         self.load_data_button = QPushButton('Load Data')
+        self.save_scene_button = QPushButton('Save Scene')
         
         layout.addWidget(self.zoom_in_button)
         layout.addWidget(self.zoom_out_button)
         layout.addWidget(self.reset_view_button)
         layout.addWidget(self.load_data_button)
+        layout.addWidget(self.save_scene_button)
+
+        # Progress of a background load, shown while one runs
+        self.load_progress = QtWidgets.QProgressBar()
+        self.load_progress.setRange(0, 100)
+        self.cancel_load_button = QPushButton('Cancel Load')
+        layout.addWidget(self.load_progress)
+        layout.addWidget(self.cancel_load_button)
+        self.end_load_progress()
         
         # Rotation Buttons
         rotate_layout = QHBoxLayout()
@@ -87,9 +105,9 @@ class UserInterface(QWidget):
         rotate_layout.addWidget(self.rotate_z_neg_button)
 
         self.time_slider = QtWidgets.QSlider(Qt.Horizontal)
-        self.time_slider.setMinimum(0)
-        self.time_slider.setMaximum(100)  # Adjust based on your data
+        self.time_slider.setRange(0, TIME_SLIDER_STEPS)
         self.time_slider.valueChanged.connect(self.update_time)
+        self.update_time_range(self.viz.time_range())
         layout.addWidget(self.time_slider)
 
         layout.addLayout(rotate_layout)
@@ -109,21 +127,50 @@ class UserInterface(QWidget):
         self.lod_slider.valueChanged.connect(self.update_lod)
         layout.addWidget(QLabel("Level of Detail"))
         layout.addWidget(self.lod_slider)
+
+        # Edge display filter: mode plus a percentage of the distance range / neighbor count
+        self.edge_filter_combo = QtWidgets.QComboBox()
+        self.edge_filter_combo.addItems(["All edges", "Edges below distance", "k nearest neighbors", "MST backbone"])
+        self.edge_filter_combo.currentIndexChanged.connect(self.update_edge_filter)
+        self.edge_filter_slider = QSlider(Qt.Horizontal)
+        self.edge_filter_slider.setRange(1, 100)
+        self.edge_filter_slider.setValue(25)
+        self.edge_filter_slider.valueChanged.connect(self.update_edge_filter)
+        layout.addWidget(QLabel("Edges"))
+        layout.addWidget(self.edge_filter_combo)
+        layout.addWidget(self.edge_filter_slider)
         
         self.show_logs_button = QPushButton("Show Logs")
         self.show_logs_button.clicked.connect(self.show_logs)
         layout.addWidget(self.show_logs_button)
 
         self.setLayout(layout)
+        self.setup_search_bar()
 
     def setup_search_bar(self):
         self.search_bar = QLineEdit()
         self.search_bar.setPlaceholderText("Search for a node...")
         self.search_bar.returnPressed.connect(self.search_node)
+        # Candidates come ranked from the search index, so the completer shows them unfiltered
+        self.search_results = QStringListModel(self)
+        self.search_completer = QCompleter(self.search_results, self)
+        self.search_completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.search_completer.activated[str].connect(self.search_node)
+        self.search_bar.setCompleter(self.search_completer)
+        self.search_bar.textEdited.connect(self.update_search_results)
         self.layout().addWidget(self.search_bar)
 
-    def search_node(self):
-        query = self.search_bar.text()
+    def update_search_results(self, text):
+        # Every keystroke emits; the event policy decides how often the completions are rebuilt
+        self.event_manager.emit('search_query', text)
+
+    def show_search_results(self, text):
+        self.search_results.setStringList(self.viz.search_nodes(text) if text.strip() else [])
+        if self.search_results.rowCount():
+            self.search_completer.complete()
+
+    def search_node(self, query=None):
+        query = self.search_bar.text() if query is None else query
         self.event_manager.emit('search_node', query)
   
     def get_legend_items(self):
@@ -145,16 +192,53 @@ class UserInterface(QWidget):
             self.legend_layout.addWidget(text_label)
 
     def update_node_size(self, value):
-        self.settings['visualization_params']['node_size'] = value
-        self.viz.update()
+        self.event_manager.emit('node_size', value)
 
     def update_lod(self, value):
         self.event_manager.emit('update_lod', value)
 
+    def update_edge_filter(self, _=None):
+        mode = EDGE_FILTER_MODES[self.edge_filter_combo.currentIndex()]
+        self.event_manager.emit('edge_filter', (mode, self.edge_filter_slider.value()))
+
+    def update_edge_source(self, available):
+        # Without pairwise distances only the tree edges exist, so the filters are reset and disabled
+        if not available:
+            self.edge_filter_combo.blockSignals(True)
+            self.edge_filter_combo.setCurrentIndex(0)
+            self.edge_filter_combo.blockSignals(False)
+        self.edge_filter_combo.setEnabled(available)
+        self.edge_filter_slider.setEnabled(available)
+
     def show_logs(self):
         self.log_viewer = LogViewer()
         self.log_viewer.show()
 
+    def show_load_progress(self, stage, fraction):
+        # The bar covers all pipeline stages; its text names the current one
+        overall = (PIPELINE_STAGES.index(stage) + fraction) / len(PIPELINE_STAGES)
+        self.load_progress.setValue(int(overall * 100))
+        self.load_progress.setFormat(f"{stage.capitalize()}: %p%")
+        self.load_progress.setVisible(True)
+        self.cancel_load_button.setVisible(True)
+
+    def end_load_progress(self):
+        self.load_progress.setVisible(False)
+        self.cancel_load_button.setVisible(False)
+
     def update_time(self, value):
-        # Update time logic here
-        pass
\ No newline at end of file
+        # Slider positions span the data's time range
+        if self.time_range is None:
+            return
+        start, end = self.time_range
+        self.event_manager.emit('update_time', start + (end - start) * value / TIME_SLIDER_STEPS)
+
+    def update_time_range(self, time_range):
+        # New data starts with everything shown; data without times disables the slider
+        self.time_range = time_range
+        self.time_slider.blockSignals(True)
+        self.time_slider.setValue(TIME_SLIDER_STEPS)
+        self.time_slider.blockSignals(False)
+        self.time_slider.setEnabled(time_range is not None)
+        if time_range is not None:
+            self.time_slider.setToolTip(f"Time {time_range[0]:g} to {time_range[1]:g}")
\ No newline at end of file
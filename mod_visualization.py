@@ -4,31 +4,67 @@ from PyQt5.QtGui import QPainter, QColor, QFont
 from PyQt5.QtCore import Qt
 from OpenGL.GL import *
 from OpenGL.GLU import *
-from OpenGL.arrays import vbo
 import sys
+import logging
 import networkx as nx
 import numpy as np
 from sklearn.cluster import KMeans
-from memory_profiler import profile
+from mod_graph import as_compact_graph
+from mod_scene import scene_from_graph
+from mod_renderer import SceneRenderer, node_colors, NODE_RADIUS_SCALE, HIGHLIGHT_COLOR, HIGHLIGHT_SCALE
+from mod_spatial import VisibilityIndex
+from mod_frame_scheduler import FrameScheduler
+from mod_time_index import TimeIndex
+from mod_search_index import SearchIndex, SEARCH_LIMIT
+from util_math import perspective_matrix, view_matrix, frustum_planes, camera_position, pick_matrix, project_points
+from config_constants import FIELD_OF_VIEW, NEAR_PLANE, FAR_PLANE, LOD_BUDGET, COUNT_LABEL_LIMIT
+from mod_tracing import traced, count
 
 class Visualization(QOpenGLWidget):
     def __init__(self, tree, settings, event_manager):
         super(Visualization, self).__init__()
-        self.node_id_map = {}
-        self.tree = tree
+        self.tree = as_compact_graph(tree)
+        self.scene = scene_from_graph(self.tree) if tree is not None else None
+        self.annotations = {}  # Node name -> annotation texts
+        self.node_clusters = None  # K-means label per node id
+        self.renderer = SceneRenderer()
+        self.buffers_dirty = True
+        self.node_names = []
+        self.node_index = {}
+        self.visibility = None
+        self.color_sums = None  # Prefix sums of node colors in octree order, for cluster glyph colors
+        self.lod_nodes = None  # Nodes drawn individually in cluster LOD mode
+        self.lod_glyphs = None
+        self.time_value = None  # Current time of the time slider; None shows everything
+        self.applied_time = None  # Time the node and edge opacity currently reflect
+        self.node_time_index = None
+        self.edge_time_index = None
+        self.node_active = None  # Nodes existing at applied_time; None until buffers are uploaded
+        self.edge_active = None
+        self.search_index = None  # Built from the node names on the first search
         self.settings = settings
         self.zoom = -100  # Initial zoom level
         self.rotation = [0, 0, 0]  # Rotation angles for x, y, z axes
         self.setMinimumSize(800, 600)
         self.last_mouse_pos = None
         self.setFocusPolicy(Qt.StrongFocus)
-        self.camera_pos = [0, 0, -100]  # Initial camera position
+        self.camera_pos = [0, 0, 100]  # Eye position in world coordinates, updated from the view
         self.lod_threshold = 50  # Initial LOD threshold
         self.selection_radius = 5  # Radius for node selection in pixels
         self.event_manager = event_manager
         self.event_manager.subscribe('search_node', self.highlight_searched_node)
         self.event_manager.subscribe('update_lod', self.update_lod_threshold)
+        self.event_manager.subscribe('edge_filter', self.update_edge_filter)
+        self.event_manager.subscribe('update_time', self.update_time)
+        self.event_manager.subscribe('node_size', self.update_node_size)
         self.pan = [0, 0]  # Initialize pan
+        self.pending_hover = None  # Cursor position awaiting a hover pick
+        self.edge_source = None  # Species behind the edge filters, in edge index order
+        self.edge_index = None
+        self.species_nodes = None
+        self.edge_filter = ('all', None)
+        self.edges_dirty = False
+        self.frame_scheduler = FrameScheduler(self, settings.get('render_params', {}).get('max_fps', 60))
     
     def initializeGL(self):
         # Background color and other initial settings
@@ -45,80 +81,278 @@ class Visualization(QOpenGLWidget):
         glLightfv(GL_LIGHT0, GL_POSITION, [0, 0, 1, 0])
         glLightfv(GL_LIGHT0, GL_DIFFUSE, [1, 1, 1, 1])
 
-        # Create Vertex Buffer Object (VBO) for efficient rendering
+        # Create Vertex Buffer Objects (VBOs) for efficient rendering
+        self.renderer.initialize()
         self.create_vbo()
 
-    def highlight_searched_node(self, node_name):
-        if node_name in self.tree.nodes:
-            self.highlighted_node = node_name
-            self.center_view_on_node(node_name)
-            self.update()
+    def search_nodes(self, query, limit=SEARCH_LIMIT):
+        # Ranked node names for a search query: prefix matches, then typo-tolerant ones
+        if self.scene is None:
+            return []
+        if self.search_index is None:
+            self.search_index = SearchIndex(self.scene.node_names())
+        return self.search_index.search(query, limit)
+
+    def highlight_searched_node(self, query):
+        # An exact node name, else the best search candidate
+        matches = [query] if query in self.node_index else self.search_nodes(query, limit=1)
+        if matches:
+            self.highlighted_node = matches[0]
+            self.center_view_on_node(matches[0])
+            self.request_frame()
 
     def center_view_on_node(self, node_name):
         # Implement logic to center the view on the given node
         pass
 
+    @traced('upload', 'render')
     def create_vbo(self):
-        # Prepare vertex data for VBO
-        vertices = []
-        for node in self.tree.nodes():
-            pos = self.tree.nodes[node]['pos']
-            vertices.extend(pos)
-        self.node_vbo = vbo.VBO(np.array(vertices, dtype='f'))
+        # Vertex data comes straight from the scene arrays (possibly memory-mapped)
+        if self.scene is None:
+            return
+        node_size = self.settings['visualization_params']['node_size']
+        colors = node_colors(self.scene, self.get_color_for_attribute)
+        edge_width = self.settings['visualization_params'].get('edge_width', 1)
+        self.renderer.upload(self.scene, colors, node_size * NODE_RADIUS_SCALE, edge_width)
+        self.node_names = self.scene.node_names()
+        self.node_index = {name: i for i, name in enumerate(self.node_names)}
+        self.visibility = VisibilityIndex(self.scene.positions)
+        if self.visibility.tree is not None:
+            self.color_sums = np.vstack([np.zeros((1, 3)),
+                                         np.cumsum(colors[self.visibility.tree.order], axis=0, dtype=np.float64)])
+            # Position of every node in octree order, to find the cluster glyph holding it
+            self.node_rank = np.argsort(self.visibility.tree.order)
+        self.node_time_index = TimeIndex(self.scene.node_times)
+        self.edge_time_index = TimeIndex(self.scene.edge_times)
+        self.node_active = self.edge_active = None
+        self.species_nodes = None
+        self.edges_dirty = self.edge_filter[0] != 'all'
+        self.buffers_dirty = False
+
+    def invalidate_buffers(self):
+        # Buffers are re-uploaded on the next paint, when the GL context is current
+        self.buffers_dirty = True
+        self.request_frame('data')
+
+    def request_frame(self, reason='view'):
+        # Repaints are coalesced and capped by the frame scheduler; nothing is drawn while idle
+        self.frame_scheduler.request_frame(reason)
+
+    def frame_stats(self):
+        # Rolling frame-time statistics (p50/p95/p99 in milliseconds)
+        return self.frame_scheduler.stats.summary()
+
+    def reset_frame_stats(self):
+        # Frame times are reported per dataset, so log and restart them when the data changes
+        if self.frame_scheduler.stats.frames:
+            stats = self.frame_stats()
+            logging.info(f"Frame times over {stats['frames']} frames: p50 {stats['p50_ms']:.1f} ms, "
+                         f"p95 {stats['p95_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms")
+        self.frame_scheduler.stats.reset()
 
     def cluster_nodes(self, n_clusters):
-        positions = np.array([self.tree.nodes[node]['pos'] for node in self.tree.nodes()])
         kmeans = KMeans(n_clusters=n_clusters)
-        labels = kmeans.fit_predict(positions)
-        for node, label in zip(self.tree.nodes(), labels):
-            self.tree.nodes[node]['cluster'] = label
-
-    @profile
-    def draw_tree(self, select_mode=False):
-        # Draw edges with variable thickness
-        max_weight = max([data['weight'] for _, _, data in self.tree.edges(data=True)])
-        glBegin(GL_LINES)
-        for edge in self.tree.edges(data=True):
-            node1, node2, data = edge
-            pos1 = self.tree.nodes[node1]['pos']
-            pos2 = self.tree.nodes[node2]['pos']
-            weight = data['weight']
-            normalized_weight = (weight / max_weight)
-            glLineWidth(1 + normalized_weight * 5)  # Adjust max thickness
-            glColor3f(0.0, 0.0, 1.0 - normalized_weight)  # Blue to light blue
-            glVertex3f(*pos1)
-            glVertex3f(*pos2)
-        glEnd()
+        self.node_clusters = kmeans.fit_predict(self.tree.positions)
+
+    def draw_tree(self):
+        if self.scene is None:
+            return
 
-        # Calculate visible nodes based on distance and LOD threshold
-        for idx, node in enumerate(self.tree.nodes()):
-            pos = self.tree.nodes[node]['pos']
-            distance = np.linalg.norm([pos[0] - self.camera_pos[0],
-                                       pos[1] - self.camera_pos[1],
-                                       pos[2] - self.camera_pos[2]])
-            if distance < self.lod_threshold:
-                if select_mode:
-                    glLoadName(idx + 1)
-                    self.node_id_map[idx + 1] = node
-                else:
-                    # Assign color based on node attribute
-                    attr = self.tree.nodes[node].get('attribute', 'default')
-                    glColor3f(*self.get_color_for_attribute(attr))
-                self.draw_node(pos)
+        # Edge styling is precomputed; it is only redone when the edge width setting changes
+        edge_width = self.settings['visualization_params'].get('edge_width', 1)
+        if self.edges_dirty or edge_width != self.renderer.edge_width:
+            edges, weights, times = self.displayed_edges()
+            self.renderer.upload_edges(self.scene.positions, edges, weights, edge_width)
+            self.edge_time_index = TimeIndex(times)
+            self.edge_active = None
+            self.edges_dirty = False
+        self.apply_time()
+        # The visible set is only recomputed when the view or the LOD threshold changes
+        node_size = self.settings['visualization_params']['node_size']
+        view_key = (tuple(self.pan), self.zoom, tuple(self.rotation), self.lod_threshold,
+                    self.width(), self.height(), node_size)
+        if view_key != self.renderer.visible_key:
+            self.update_level_of_detail(view_key)
+            count('lod_updates')
+        self.renderer.draw(point_size=node_size)
 
         # Draw highlighted node
-        if hasattr(self, 'highlighted_node') and self.highlighted_node and not select_mode:
-            pos = self.tree.nodes[self.highlighted_node]['pos']
-            glColor3f(1.0, 1.0, 0.0)  # Highlight color (yellow)
-            self.draw_node(pos)
-
-    def draw_node(self, pos):
-        glPushMatrix()
-        glTranslatef(*pos)
-        quadric = gluNewQuadric()
-        gluSphere(quadric, self.settings['visualization_params']['node_size'] * 0.1, 16, 16)
-        gluDeleteQuadric(quadric)
-        glPopMatrix()
+        if getattr(self, 'highlighted_node', None) in self.node_index and self.node_active[self.node_index[self.highlighted_node]]:
+            self.renderer.draw_node(self.node_index[self.highlighted_node], HIGHLIGHT_COLOR,
+                                    node_size * NODE_RADIUS_SCALE * HIGHLIGHT_SCALE, point_size=node_size * HIGHLIGHT_SCALE)
+
+    def set_edge_source(self, species, edge_index):
+        # EdgeIndex behind the threshold / k-nearest / MST edge filters, built off the GUI thread
+        self.edge_source = list(species)
+        self.edge_index = edge_index
+        self.species_nodes = None
+        self.edges_dirty = self.edge_filter[0] != 'all'
+        self.event_manager.emit('edge_source', True)
+        self.request_frame('data')
+
+    def clear_edge_source(self):
+        # Data without pairwise distances, such as a saved scene, only has its tree edges to show
+        self.edge_source = None
+        self.edge_index = None
+        self.species_nodes = None
+        self.edge_filter = ('all', self.edge_filter[1])
+        self.edges_dirty = True
+        self.event_manager.emit('edge_source', False)
+
+    def update_edge_filter(self, edge_filter):
+        # edge_filter is (mode, value): value is a percentage of the distance range for
+        # 'threshold' and of the indexed neighbor count for 'knn'
+        self.edge_filter = edge_filter
+        self.edges_dirty = True
+        self.request_frame('data')
+
+    def displayed_edges(self):
+        # Edges to draw as scene node index pairs, weights and [start, end] lifetimes
+        mode, value = self.edge_filter
+        if mode == 'all' or self.edge_index is None:
+            return self.scene.edges, self.scene.branch_lengths, self.scene.edge_times
+        if self.species_nodes is None:
+            self.species_nodes = np.array([self.node_index.get(str(sp), -1) for sp in self.edge_source], dtype=np.int64)
+
+        if mode == 'threshold':
+            lo, hi = self.edge_index.weight_range()
+            pairs, weights = self.edge_index.below(lo + (hi - lo) * value / 100)
+        elif mode == 'knn':
+            pairs, weights = self.edge_index.nearest(max(1, int(np.ceil(self.edge_index.max_neighbors * value / 100))))
+        elif mode == 'mst':
+            pairs, weights = self.edge_index.backbone()
+        else:
+            raise ValueError(f"Unknown edge filter: {mode}")
+        nodes = self.species_nodes[pairs.astype(np.int64)].reshape(-1, 2)
+        shown = (nodes >= 0).all(axis=1)
+        nodes, weights = nodes[shown], weights[shown]
+        # A species pair edge exists while both species do
+        first, second = self.scene.node_times[nodes[:, 0]], self.scene.node_times[nodes[:, 1]]
+        return nodes, weights, np.column_stack([np.maximum(first[:, 0], second[:, 0]),
+                                                np.minimum(first[:, 1], second[:, 1])])
+
+    def view_matrices(self):
+        # The modelview and projection matrices paintGL sets up, computed on the CPU
+        modelview = view_matrix(self.pan, self.zoom, self.rotation)
+        aspect = self.width() / self.height() if self.height() else 1
+        projection = perspective_matrix(FIELD_OF_VIEW, aspect, NEAR_PLANE, FAR_PLANE)
+        self.camera_pos = camera_position(modelview).tolist()
+        return modelview, projection
+
+    def visible_nodes(self):
+        # Nodes inside the view frustum and within the LOD distance of the eye
+        modelview, projection = self.view_matrices()
+        radius = self.settings['visualization_params']['node_size'] * NODE_RADIUS_SCALE
+        return self.visibility.query(frustum_planes(projection @ modelview), self.camera_pos,
+                                     self.lod_threshold, margin=radius)
+
+    def update_level_of_detail(self, key=None):
+        # 'distance' mode hides nodes beyond the LOD threshold. 'clusters' mode collapses
+        # groups of nodes smaller than 1 / lod_threshold radians on screen into a glyph,
+        # drawing at most lod_budget nodes and glyphs, and only edges between drawn nodes.
+        render_params = self.settings.get('render_params', {})
+        if render_params.get('lod_mode', 'clusters') != 'clusters':
+            self.lod_nodes = self.lod_glyphs = None
+            self.renderer.set_visible(self.visible_nodes(), key=key)
+            self.renderer.set_glyphs(np.zeros((0, 3)), np.zeros((0, 3)), np.zeros(0))
+            return
+
+        modelview, projection = self.view_matrices()
+        radius = self.settings['visualization_params']['node_size'] * NODE_RADIUS_SCALE
+        nodes, glyphs = self.visibility.cluster_cut(frustum_planes(projection @ modelview), self.camera_pos,
+                                                    1.0 / self.lod_threshold,
+                                                    render_params.get('lod_budget', LOD_BUDGET), margin=radius)
+        # Sorted by octree range, so the glyph holding a node is a binary search away
+        order = np.argsort(glyphs['start'])
+        glyphs = {name: values[order] for name, values in glyphs.items()}
+        start, count = glyphs['start'], glyphs['count']
+        glyphs['color'] = (self.color_sums[start + count] - self.color_sums[start]) / np.maximum(count, 1)[:, None]
+        # Glyph volume grows with the member count, but never beyond the cluster itself
+        glyphs['size'] = np.minimum(radius * np.cbrt(count), np.maximum(glyphs['radius'], radius))
+        # Members existing at the current time
+        glyphs['active'] = count.copy()
+        if self.node_active is not None and self.applied_time is not None:
+            active_sums = np.r_[0, np.cumsum(self.node_active[self.visibility.tree.order])]
+            glyphs['active'] = active_sums[start + count] - active_sums[start]
+        self.lod_nodes = np.zeros(len(self.visibility), dtype=bool)
+        self.lod_nodes[nodes] = True
+        self.lod_glyphs = glyphs
+        self.renderer.set_visible(nodes, key=key, connected_only=True)
+        self.upload_glyphs()
+
+    def upload_glyphs(self):
+        # Glyphs with no member existing at the current time are hidden
+        glyphs = self.lod_glyphs
+        self.renderer.set_glyphs(glyphs['center'], np.column_stack([glyphs['color'], glyphs['active'] > 0]),
+                                 glyphs['size'])
+
+    def time_range(self):
+        # Earliest and latest node time, or None for data without times
+        if self.scene is None:
+            return None
+        times = self.scene.node_times[np.isfinite(self.scene.node_times)]
+        return (float(times.min()), float(times.max())) if len(times) else None
+
+    def update_time(self, time_value):
+        # Only records the time; the opacity changes are applied at the next paint
+        self.time_value = time_value
+        self.request_frame('data')
+
+    def apply_time(self):
+        # Brings node and edge opacity to time_value. After a time step only the elements whose
+        # lifetime starts or ends in between are touched; fresh buffers get one full pass.
+        if self.time_value == self.applied_time and self.node_active is not None and self.edge_active is not None:
+            return
+        self.node_active, changes = self.step_time(self.node_time_index, self.node_active, self.renderer.set_node_alpha)
+        self.edge_active, _ = self.step_time(self.edge_time_index, self.edge_active, self.renderer.set_edge_alpha)
+        self.applied_time = self.time_value
+
+        if self.lod_glyphs is not None and len(self.lod_glyphs['start']):
+            start, count = self.lod_glyphs['start'], self.lod_glyphs['count']
+            if changes is None:
+                active_sums = np.r_[0, np.cumsum(self.node_active[self.visibility.tree.order])]
+                self.lod_glyphs['active'] = active_sums[start + count] - active_sums[start]
+            else:
+                for nodes, step in zip(changes, (1, -1)):
+                    rank = self.node_rank[nodes]
+                    glyph = np.searchsorted(start, rank, side='right') - 1
+                    inside = (glyph >= 0) & (rank < start[glyph] + count[glyph])
+                    np.add.at(self.lod_glyphs['active'], glyph[inside], step)
+            self.upload_glyphs()
+
+    def step_time(self, index, active, set_alpha):
+        # Returns the new active mask and the (appearing, disappearing) elements, or None after a full pass
+        if active is None or self.applied_time is None or self.time_value is None:
+            previous = active
+            active = index.active(self.time_value)
+            if previous is not None or not active.all():
+                set_alpha(None, active.astype(np.float32))
+            return active, None
+        appearing, disappearing = index.delta(self.applied_time, self.time_value)
+        active[appearing] = True
+        active[disappearing] = False
+        if len(appearing) or len(disappearing):
+            set_alpha(np.concatenate([appearing, disappearing]),
+                      np.r_[np.ones(len(appearing)), np.zeros(len(disappearing))].astype(np.float32))
+        return active, (appearing, disappearing)
+
+    def draw_cluster_counts(self):
+        # Node counts over the largest cluster glyphs, painted over the GL scene
+        if not self.lod_glyphs or not self.lod_glyphs['active'].any():
+            return
+        largest = np.argsort(-self.lod_glyphs['active'], kind='stable')[:COUNT_LABEL_LIMIT]
+        largest = largest[self.lod_glyphs['active'][largest] > 0]
+        modelview, projection = self.view_matrices()
+        window = project_points(self.lod_glyphs['center'][largest], projection @ modelview,
+                                (0, 0, self.width(), self.height()))
+        painter = QPainter(self)
+        if not painter.isActive():
+            return
+        painter.setPen(QColor(0, 0, 0))
+        painter.setFont(QFont('Arial', 8))
+        for (x, y, _), count in zip(window, self.lod_glyphs['active'][largest]):
+            painter.drawText(int(x), int(self.height() - y), str(count))
+        painter.end()
 
     def get_color_for_attribute(self, attr):
         # Assign color based on attribute
@@ -134,10 +368,12 @@ class Visualization(QOpenGLWidget):
         glViewport(0, 0, w, h)
         glMatrixMode(GL_PROJECTION)
         glLoadIdentity()
-        gluPerspective(45, (w / h) if h != 0 else 1, 0.1, 1000.0)
+        gluPerspective(FIELD_OF_VIEW, (w / h) if h != 0 else 1, NEAR_PLANE, FAR_PLANE)
         glMatrixMode(GL_MODELVIEW)
 
+    @traced('frame', 'render')
     def paintGL(self):
+        self.frame_scheduler.begin_frame()
         # Clear the screen and reset the view
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         glLoadIdentity()
@@ -150,8 +386,16 @@ class Visualization(QOpenGLWidget):
         glRotatef(self.rotation[2], 0, 0, 1)
         
         # Draw the tree
+        if self.buffers_dirty:
+            self.create_vbo()
+        # Hover picking runs at most once per frame, for the latest cursor position
+        if self.pending_hover is not None:
+            x, y = self.pending_hover
+            self.pending_hover = None
+            self.highlighted_node = self.pick_node(x, self.height() - y)
         self.draw_tree()
-        self.update()
+        self.draw_cluster_counts()
+        self.frame_scheduler.end_frame()
 
     def project_position(self, x, y, z):
         # Convert 3D coordinates to 2D screen coordinates for label rendering
@@ -194,8 +438,8 @@ class Visualization(QOpenGLWidget):
             self.pan[1] -= dy * 0.01
 
         self.last_mouse_pos = event.pos()
-        self.update()
-        self.highlight_node(event.x(), event.y())
+        self.pending_hover = (event.x(), event.y())
+        self.request_frame('hover')
 
     def mouseReleaseEvent(self, event):
         # Reset mouse press position on release
@@ -214,43 +458,28 @@ class Visualization(QOpenGLWidget):
         if selected_node:
             self.show_node_info(selected_node)
 
+    @traced('pick', 'render')
     def pick_node(self, x, y):
-        # Node picking using OpenGL selection mode with selection radius
-        buffer_size = 512
-        select_buffer = glSelectBuffer(buffer_size)
-        glRenderMode(GL_SELECT)
-        glInitNames()
-        glPushName(0)
-
-        glMatrixMode(GL_PROJECTION)
-        glPushMatrix()
-        glLoadIdentity()
-        viewport = glGetIntegerv(GL_VIEWPORT)
-        gluPickMatrix(x, y, self.selection_radius, self.selection_radius, viewport)
-        gluPerspective(45, viewport[2] / viewport[3], 0.1, 1000.0)
-        glMatrixMode(GL_MODELVIEW)
-
-        glPushMatrix()
-        glLoadIdentity()
-        glTranslatef(self.pan[0], self.pan[1], self.zoom)
-        glRotatef(self.rotation[0], 1, 0, 0)
-        glRotatef(self.rotation[1], 0, 1, 0)
-        glRotatef(self.rotation[2], 0, 0, 1)
-
-        self.draw_tree(select_mode=True)
-
-        glPopMatrix()
-        glMatrixMode(GL_PROJECTION)
-        glPopMatrix()
-        glFlush()
-
-        hits = glRenderMode(GL_RENDER)
-        if hits:
-            closest_hit = min(hits, key=lambda hit: hit.near)
-            node_id = closest_hit.names[0]
-            node_name = self.node_id_map.get(node_id)
-            return node_name
-        return None
+        # Ray-cast picking: the front-most visible node within selection_radius pixels of (x, y),
+        # with y measured from the bottom edge as in OpenGL window coordinates
+        if self.visibility is None:
+            return None
+        modelview, projection = self.view_matrices()
+        viewport = (0, 0, self.width(), self.height())
+        size = 2 * self.selection_radius
+        planes = frustum_planes(pick_matrix(x, y, size, size, viewport) @ projection @ modelview)
+        radius = self.settings['visualization_params']['node_size'] * NODE_RADIUS_SCALE
+        if self.lod_nodes is None:
+            index = self.visibility.nearest(planes, self.camera_pos, self.lod_threshold, margin=radius)
+        else:
+            # Nodes collapsed into a cluster glyph cannot be picked
+            index = self.visibility.nearest(planes, self.camera_pos, margin=radius)
+            if index is not None and not self.lod_nodes[index]:
+                index = None
+        # Nor can nodes that do not exist at the current time
+        if index is not None and self.node_active is not None and not self.node_active[index]:
+            index = None
+        return self.node_names[index] if index is not None else None
 
     def show_node_info(self, node_name):
         # Display node information in a message box
@@ -260,23 +489,38 @@ class Visualization(QOpenGLWidget):
     def update_zoom(self, delta):
         # Update zoom level and refresh the view
         self.zoom += delta
-        self.update()
+        self.request_frame()
 
     def update_rotation(self, axis, angle):
         # Update rotation for the specified axis
         self.rotation[axis] += angle
-        self.update()
+        self.request_frame()
     
     def update_tree(self, new_tree):
-        self.tree = new_tree
-        self.create_vbo()
-        self.update()
+        self.reset_frame_stats()
+        self.tree = as_compact_graph(new_tree)
+        self.scene = scene_from_graph(self.tree)
+        self.annotations = {}
+        self.search_index = None
+        self.reset_time()
+        self.invalidate_buffers()
+
+    def set_scene(self, scene):
+        # Drawing reads the scene arrays; the graph shares them and is kept for editing
+        self.reset_frame_stats()
+        self.scene = scene
+        self.tree = scene.to_compact()
+        self.annotations = {}
+        self.search_index = None
+        self.clear_edge_source()
+        self.reset_time()
+        self.invalidate_buffers()
+
+    def reset_time(self):
+        # New data starts with every node shown; the UI rescales its time slider
+        self.time_value = self.applied_time = None
+        self.event_manager.emit('time_range', self.time_range())
         
-    def update_time(self, time_value):
-        # Filter or modify the tree based on time_value
-        # Update VBOs or data structures accordingly
-        self.update()
-
     def animate_to(self, target_zoom=None, target_rotation=None):
         # Store the target values
         self.target_zoom = target_zoom if target_zoom is not None else self.zoom
@@ -300,7 +544,7 @@ class Visualization(QOpenGLWidget):
                 for i in range(3)
             ]
             self.animation_step += 1
-            self.update()
+            self.request_frame()
         else:
             self.timer.stop()
 
@@ -320,7 +564,7 @@ class Visualization(QOpenGLWidget):
         node_name = self.pick_node(x, self.height() - y)
         if node_name != getattr(self, 'highlighted_node', None):
             self.highlighted_node = node_name
-            self.update()
+            self.request_frame()
 
     def show_context_menu(self, position, node_name):
         menu = QtWidgets.QMenu()
@@ -335,7 +579,7 @@ class Visualization(QOpenGLWidget):
 
     def zoom_to_node(self, node_name):
         # Smoothly animate zooming to the selected node
-        target_pos = self.tree.nodes[node_name]['pos']
+        target_pos = self.tree.positions[self.tree.node_id(node_name)]
         # Compute required transformations to center and zoom in on the node
         # Implement similar to animate_to method
         # Example:
@@ -352,7 +596,12 @@ class Visualization(QOpenGLWidget):
 
     def update_lod_threshold(self, value):
         self.lod_threshold = value
-        self.update()
+        self.request_frame()
+
+    def update_node_size(self, value):
+        # Node radii are baked into the uploaded buffers
+        self.settings['visualization_params']['node_size'] = value
+        self.invalidate_buffers()
 
     def keyPressEvent(self, event):
         if event.key() == Qt.Key_Plus:
@@ -369,29 +618,27 @@ class Visualization(QOpenGLWidget):
             self.update_rotation(0, -5)
         elif event.key() == Qt.Key_Down:
             self.update_rotation(0, 5)
-        self.update()
 
     def reset_view(self):
         self.zoom = -100
         self.rotation = [0, 0, 0]
         self.pan = [0, 0]
-        self.update()
+        self.request_frame()
 
     def annotate_node(self, node_name, annotation):
         # Add an annotation to a node and display it
-        if 'annotations' not in self.tree.nodes[node_name]:
-            self.tree.nodes[node_name]['annotations'] = []
-        self.tree.nodes[node_name]['annotations'].append(annotation)
+        self.annotations.setdefault(node_name, []).append(annotation)
         info = f"Annotated Node: {node_name}\nAnnotation: {annotation}"
         QtWidgets.QMessageBox.information(self, "Node Annotation", info)
-        self.update()
+        self.request_frame()
 
     def delete_node(self, node_name):
         # Remove a node from the tree
-        if node_name in self.tree.nodes:
-            self.tree.remove_node(node_name)
-            self.create_vbo()
-            self.update()
+        if node_name in self.tree:
+            self.tree = self.tree.remove_nodes([node_name])
+            self.annotations.pop(node_name, None)
+            self.scene = scene_from_graph(self.tree)
+            self.invalidate_buffers()
 
     def add_context_menu_actions(self, menu, node_name):
         annotate_action = menu.addAction("Add Annotation")
@@ -0,0 +1,59 @@
+# test_batch.py
+
+import ctypes.util
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from mod_batch import process_dataset, run_batch, output_names, StageTimer, REPORT_SUFFIX
+from mod_scene import load_scene
+
+SETTINGS = {'cache_params': {'enabled': False}, 'tree_params': {'method': 'upgma'},
+            'layout_params': {'iterations': 5}, 'visualization_params': {'node_size': 10, 'edge_width': 1}}
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_process_dataset(self):
+        report = process_dataset('data_sample_dataset.csv', self.output_dir, SETTINGS)
+        self.assertEqual(report['status'], 'ok')
+        self.assertEqual(list(report['timings']), ['load', 'distances', 'tree', 'layout', 'scene', 'total'])
+        scene = load_scene(report['artifacts']['scene'])
+        self.assertEqual((scene.n_nodes, scene.n_edges), (report['nodes'], report['edges']))
+        with open(os.path.join(self.output_dir, 'data_sample_dataset' + REPORT_SUFFIX), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['species'], report['species'])
+
+    def test_failure_is_reported(self):
+        report = process_dataset('missing.csv', self.output_dir, SETTINGS)
+        self.assertEqual(report['status'], 'error')
+        self.assertIn('FileNotFoundError', report['error'])
+        self.assertTrue(os.path.exists(report['artifacts']['report']))
+
+    @unittest.skipUnless(ctypes.util.find_library('EGL'), "EGL is not installed")
+    def test_pool_with_screenshots(self):
+        reports = run_batch(['data_sample_dataset.csv', 'missing.csv', 'data_sample_dataset.csv'],
+                            self.output_dir, SETTINGS, workers=2, screenshot_size=(160, 120))
+        self.assertEqual([report['status'] for report in reports], ['ok', 'error', 'ok'])
+        self.assertEqual(reports[2]['name'], 'data_sample_dataset-2')
+        for report in (reports[0], reports[2]):
+            self.assertGreater(os.path.getsize(report['artifacts']['screenshot']), 0)
+            self.assertIn('screenshot', report['timings'])
+
+    def test_helpers(self):
+        self.assertEqual(output_names(['a/x.csv', 'b/x.csv', 'y.json']), ['x', 'x-2', 'y'])
+        timer = StageTimer()
+        for stage in ('load', 'load', 'tree', 'layout'):
+            timer(stage, 0.5)
+        timer.stop()
+        durations = timer.durations()
+        self.assertEqual(list(durations), ['load', 'tree', 'layout'])
+        self.assertTrue(all(seconds >= 0 for seconds in durations.values()))
+
+if __name__ == '__main__':
+    unittest.main()
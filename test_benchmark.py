@@ -0,0 +1,57 @@
+# test_benchmark.py
+
+import unittest
+
+from benchmark import SizeRun, find_regressions, format_results, measure, STAGE_LIMITS
+
+def results(**stages):
+    return {'sizes': {'1000': {'species': 1000, 'stages': stages}}}
+
+class TestBenchmark(unittest.TestCase):
+    def test_size_run(self):
+        stages = ('load_data', 'load_columnar', 'process_data', 'tree_upgma', 'tree_igraph', 'layout_radial', 'scene')
+        run = SizeRun(60, stages=stages).run()
+        self.assertEqual(list(run['stages']), list(stages))
+        self.assertEqual(run['tree_source'], 'upgma')
+        for stage in stages[:-1]:
+            self.assertGreater(run['stages'][stage]['seconds'], 0)
+            self.assertGreater(run['stages'][stage]['peak_rss_mb'], 0)
+        # The scene needs the force-directed layout, which was not run
+        self.assertEqual(run['stages']['scene'], {'skipped': "input stage did not run"})
+
+    def test_limits(self):
+        run = SizeRun(STAGE_LIMITS['tree_igraph'] + 1, stages=('load_data', 'process_data', 'tree_igraph')).run()
+        self.assertIn('limit', run['stages']['tree_igraph']['skipped'])
+        self.assertEqual(run['tree_source'], 'ancestry')
+
+    def test_measure_repeats_fast_stages(self):
+        calls = []
+        result, record = measure(calls.append, 1)
+        self.assertIsNone(result)
+        self.assertEqual(record['runs'], len(calls))
+        self.assertGreater(record['runs'], 1)
+
+    def test_find_regressions(self):
+        baseline = results(tree_upgma={'seconds': 1.0}, load_data={'seconds': 0.001},
+                           scene={'seconds': 0.5}, layout_radial={'seconds': 0.2})
+        current = results(tree_upgma={'seconds': 1.3}, load_data={'seconds': 0.01},
+                          scene={'error': "MemoryError: "}, layout_radial={'skipped': "over the limit"})
+        # 30% over the baseline; the tiny stage's 10x slowdown is within the absolute slack
+        self.assertEqual(find_regressions(baseline, current, tolerance=0.25),
+                         [{'size': '1000', 'stage': 'tree_upgma', 'baseline': 1.0, 'current': 1.3},
+                          {'size': '1000', 'stage': 'scene', 'baseline': 0.5, 'current': None}])
+        self.assertEqual(len(find_regressions(baseline, current, tolerance=0.5)), 1)
+        self.assertIn('+30%', format_results(results(tree_upgma={'seconds': 1.3, 'peak_rss_mb': 10.0}), baseline))
+
+    def test_failed_size_is_a_regression(self):
+        baseline = results(tree_upgma={'seconds': 1.0}, scene={'seconds': 0.5})
+        failed = {'sizes': {'1000': {'species': 1000, 'error': "BrokenProcessPool: ", 'stages': {}}}}
+        expected = [{'size': '1000', 'stage': 'tree_upgma', 'baseline': 1.0, 'current': None},
+                    {'size': '1000', 'stage': 'scene', 'baseline': 0.5, 'current': None}]
+        self.assertEqual(find_regressions(baseline, failed), expected)
+        self.assertEqual(find_regressions(baseline, {'sizes': {}}), expected)
+        # A stage the current run no longer reports counts too
+        self.assertEqual(find_regressions(baseline, results(tree_upgma={'seconds': 1.0})), expected[1:])
+
+if __name__ == '__main__':
+    unittest.main()
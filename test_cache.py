@@ -0,0 +1,116 @@
+# test_cache.py
+
+import os
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+from data_processor import load_processed_data
+from mod_cache import ArrayCache, LayoutCache, ProcessedDataCache, fingerprint_array
+from mod_distance_engine import pairwise_distance_matrix
+from mod_tree_generator import generate_tree
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def test_roundtrip_is_memory_mapped(self):
+        cache = ArrayCache(self.temp_dir.name, max_bytes=10 ** 6)
+        cache.put('entry', {'values': np.arange(10.0)})
+        arrays = ArrayCache(self.temp_dir.name).get('entry')
+        self.assertIsInstance(arrays['values'], np.memmap)
+        np.testing.assert_array_equal(arrays['values'], np.arange(10.0))
+        self.assertIsNone(cache.get('missing'))
+
+    def test_lru_eviction_and_invalidate(self):
+        cache = ArrayCache(self.temp_dir.name, max_bytes=3000)
+        for key in ('a', 'b'):
+            cache.put(key, {'values': np.zeros(128)})
+        cache.get('a')
+        cache.put('c', {'values': np.zeros(128)})
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        cache.invalidate()
+        self.assertEqual(cache.total_bytes, 0)
+        self.assertNotIn('a', cache)
+
+    def test_instances_sharing_a_directory_merge_their_index(self):
+        first = ArrayCache(self.temp_dir.name, max_bytes=10 ** 6)
+        second = ArrayCache(self.temp_dir.name, max_bytes=10 ** 6)
+        first.put('k1', {'values': np.ones(10)})
+        second.put('k2', {'values': np.ones(10)})
+        self.assertIsNotNone(first.get('k2'))
+        self.assertEqual(set(ArrayCache(self.temp_dir.name).index), {'k1', 'k2'})
+        # Entry directories the index does not track are swept
+        os.makedirs(os.path.join(self.temp_dir.name, 'orphan'))
+        second.evict()
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir.name, 'orphan')))
+        first.invalidate()
+        self.assertEqual([name for name in os.listdir(self.temp_dir.name)
+                          if os.path.isdir(os.path.join(self.temp_dir.name, name))], [])
+
+    def test_threads_share_one_instance(self):
+        cache = ArrayCache(self.temp_dir.name, max_bytes=10 ** 6)
+        errors = []
+
+        def worker(thread):
+            try:
+                for i in range(20):
+                    cache.put(f'{thread}-{i}', {'values': np.full(16, i)})
+                    self.assertEqual(cache.get(f'{thread}-{i}')['values'][0], i)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=worker, args=(thread,)) for thread in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(ArrayCache(self.temp_dir.name).index), 80)
+
+    def test_generate_tree_uses_layout_cache(self):
+        distances = np.array([[0, 1, 2], [1, 0, 2], [2, 2, 0]], dtype=float)
+        processed = {'species': np.array(['a', 'b', 'c'], dtype=object), 'distance_array': distances}
+        cache = LayoutCache(self.temp_dir.name)
+        tree = generate_tree(processed, 'upgma', {'iterations': 5}, cache)
+        self.assertEqual(len(cache.index), 1)
+        cached = generate_tree(processed, 'upgma', {'iterations': 5}, cache)
+        self.assertEqual(cached.node_names(), tree.node_names())
+        np.testing.assert_array_equal(cached.edges, tree.edges)
+        np.testing.assert_array_equal(cached.positions, tree.positions)
+        generate_tree(processed, 'upgma', {'iterations': 6}, cache)
+        self.assertEqual(len(cache.index), 2)
+
+    def test_layout_cache_tells_renamed_species_apart(self):
+        distances = np.array([[0, 1, 2], [1, 0, 2], [2, 2, 0]], dtype=float)
+        cache = LayoutCache(self.temp_dir.name)
+        for names in (['Homo', 'Pan', 'Mus'], ['Alpha', 'Beta', 'Gamma'], ['Pan', 'Homo', 'Mus']):
+            processed = {'species': np.array(names, dtype=object), 'distance_array': distances}
+            tree = generate_tree(processed, 'upgma', {'iterations': 5}, cache)
+            self.assertEqual(set(tree.node_names()) & set(names), set(names))
+            self.assertEqual(tree.node_name(0), names[0])
+        self.assertEqual(len(cache.index), 3)
+
+    def test_processed_data_cache(self):
+        cache = ProcessedDataCache(self.temp_dir.name)
+        first = load_processed_data('data_sample_dataset.csv', {'workers': 1}, cache)
+        second = load_processed_data('data_sample_dataset.csv', {'workers': 4}, cache)
+        np.testing.assert_array_equal(first['distance_array'], second['distance_array'])
+        self.assertEqual(list(first['species']), list(second['species']))
+        self.assertEqual(first['fingerprint'], second['fingerprint'])
+        # The cached encoding still yields the distances, so the data can be extended
+        np.testing.assert_array_equal(pairwise_distance_matrix(second['encoding']), first['distance_array'])
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertGreater(stats['bytes_saved'], 0)
+
+    def test_fingerprint_depends_on_content(self):
+        self.assertEqual(fingerprint_array(np.ones(3)), fingerprint_array(np.ones(3)))
+        self.assertNotEqual(fingerprint_array(np.ones(3)), fingerprint_array(np.zeros(3)))
+
+if __name__ == '__main__':
+    unittest.main()
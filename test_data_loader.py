@@ -1,7 +1,15 @@
 # test_data_loader.py
 
+import io
+import json
+import os
+import tempfile
 import unittest
-from mod_data_loader import load_data
+from unittest import mock
+
+import numpy as np
+from data_processor import compute_processed_data, process_data
+from mod_data_loader import load_data, load_columnar, load_columnar_json, iter_json_array
 
 class TestDataLoader(unittest.TestCase):
     def test_load_csv(self):
@@ -18,5 +26,71 @@ class TestDataLoader(unittest.TestCase):
         data = load_data('data_sample_dataset.invalid')
         self.assertEqual(data, [])
 
+    def test_load_columnar_csv(self):
+        rows = load_data('data_sample_dataset.csv')
+        columnar = load_columnar('data_sample_dataset.csv')
+        self.assertEqual(len(columnar), len(rows))
+        self.assertEqual([columnar.species[code] for code in columnar.species_codes], [row['species'] for row in rows])
+        self.assertEqual(columnar.marker_strings(), [row['genetic_marker'] for row in rows])
+        self.assertIn('read', columnar.timings)
+
+    def test_load_columnar_json(self):
+        rows = [{'species': 'A', 'genetic_marker': 'ACGT'}, {'species': 'B', 'genetic_marker': 'AC'}]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'data.json')
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(rows, f)
+            columnar = load_columnar(file_path)
+        self.assertEqual(list(columnar.species), ['A', 'B'])
+        self.assertEqual(columnar.markers.shape, (2, 4))
+        self.assertEqual(columnar.marker_strings(), ['ACGT', 'AC'])
+        self.assertIn('parse', columnar.timings)
+
+    def test_time_columns(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'data.csv')
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write("species,genetic_marker,time,end_time\nA,ACGT,3,\nA,ACGA,1,\nB,TTGA,5,9\nC,TTGG,,\n")
+            columnar = load_columnar(file_path)
+        self.assertEqual(columnar.times.shape, (4, 2))
+        np.testing.assert_array_equal(columnar.species_times(), [[1, np.inf], [5, 9], [-np.inf, np.inf]])
+        self.assertIsNone(load_columnar('data_sample_dataset.csv').species_times())
+
+    def test_non_ascii_markers(self):
+        rows = [('Homo', 'ATCG'), ('Pan', 'ATGG'), ('Mus', 'ATCÉ'), ('Homo', 'AACG')]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'data.csv')
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write("species,genetic_marker\n" + ''.join(f"{sp},{marker}\n" for sp, marker in rows))
+            json_path = os.path.join(temp_dir, 'data.json')
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump([{'species': sp, 'genetic_marker': marker} for sp, marker in rows], f)
+            processed = compute_processed_data(file_path)
+            expected = process_data(load_data(file_path))
+            batched = load_columnar_json(json_path, {}, batch_rows=2)
+        self.assertEqual(list(processed['species']), list(expected['species']))
+        np.testing.assert_array_equal(processed['distance_array'], expected['distance_array'])
+        self.assertEqual(batched.marker_strings(), [marker for _, marker in rows])
+
+    def test_streaming_keeps_time_columns(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'data.csv')
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write("species,genetic_marker,time,end_time\nA,ACGT,3,\nB,TTGA,5,9\nA,ACGA,1,\nC,TTGG,,\nB,TTGC,4,\n")
+            with mock.patch('data_processor.STREAMING_THRESHOLD_BYTES', 0), \
+                    mock.patch('data_processor.STREAMING_CHUNK_ROWS', 2):
+                streamed = compute_processed_data(file_path)
+                untimed = compute_processed_data('data_sample_dataset.csv')
+        self.assertIsNone(streamed['raw_dataframe'])
+        self.assertEqual(list(streamed['species']), ['A', 'B', 'C'])
+        np.testing.assert_array_equal(streamed['species_times'], [[1, np.inf], [4, 9], [-np.inf, np.inf]])
+        self.assertIsNone(untimed['species_times'])
+
+    def test_iter_json_array_across_blocks(self):
+        text = '[1, {"a": [1, 2]}, "x]" , 2.5e3 ]'
+        self.assertEqual(list(iter_json_array(io.StringIO(text), block_size=3)), json.loads(text))
+        with self.assertRaises(ValueError):
+            list(iter_json_array(io.StringIO('{"a": 1}')))
+
 if __name__ == '__main__':
     unittest.main()
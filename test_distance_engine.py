@@ -0,0 +1,122 @@
+# test_distance_engine.py
+
+import csv
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from mod_distance_engine import (encode_markers, pairwise_distance_matrix, parallel_distance_matrix,
+                                 upper_triangle_tiles, pack_codes, unpack_codes, DistanceMatrixView,
+                                 MarkerAccumulator, merge_encodings, extend_distance_matrix)
+from data_processor import process_data, process_data_in_chunks, load_data_generator, extend_processed_data
+from util_math import calculate_genetic_distance
+
+def make_markers(seed, alphabet, n_species=25, lengths=(0, 3, 4, 9)):
+    rng = random.Random(seed)
+    species, markers = [], []
+    for i in range(n_species):
+        for _ in range(rng.randint(1, 4)):
+            species.append(f"Species {i}")
+            markers.append(''.join(rng.choice(alphabet) for _ in range(rng.choice(lengths))))
+    return species, markers
+
+class TestDistanceEngine(unittest.TestCase):
+    def assert_matches_reference(self, species, markers):
+        encoding = encode_markers(species, markers)
+        distances = pairwise_distance_matrix(encoding, batch_size=4)
+        by_species = {}
+        for sp, marker in zip(species, markers):
+            by_species.setdefault(sp, []).append(marker)
+        for i, sp1 in enumerate(encoding.species):
+            for j, sp2 in enumerate(encoding.species):
+                expected = calculate_genetic_distance(by_species[sp1], by_species[sp2])
+                self.assertEqual(distances[i, j], expected)
+
+    def test_nucleotides_match_reference(self):
+        species, markers = make_markers(0, 'ACGT')
+        self.assertEqual(encode_markers(species, markers).bits, 2)
+        self.assert_matches_reference(species, markers)
+
+    def test_other_alphabets_match_reference(self):
+        species, markers = make_markers(1, 'ACGTN-')
+        self.assertEqual(encode_markers(species, markers).bits, 8)
+        self.assert_matches_reference(species, markers)
+
+    def test_unequal_lengths_are_infinite(self):
+        encoding = encode_markers(['A', 'B'], ['ACG', 'ACGT'])
+        distances = pairwise_distance_matrix(encoding)
+        self.assertEqual(distances[0, 1], float('inf'))
+        self.assertEqual(distances[0, 0], 0.0)
+
+    def test_parallel_tiles_match_serial(self):
+        species, markers = make_markers(2, 'ACGT', n_species=60)
+        encoding = encode_markers(species, markers)
+        np.testing.assert_array_equal(parallel_distance_matrix(encoding, workers=2, tile_size=16),
+                                      pairwise_distance_matrix(encoding))
+
+    def test_upper_triangle_tiles(self):
+        tiles = upper_triangle_tiles(5, 2)
+        self.assertEqual(len(tiles), 6)
+        self.assertTrue(all(col_start >= row_start for row_start, _, col_start, _ in tiles))
+
+    def test_accumulator_widens_alphabet(self):
+        species, markers = make_markers(3, 'ACGT')
+        extra_species, extra_markers = make_markers(4, 'ACGTN')
+        accumulator = MarkerAccumulator()
+        accumulator.add(species, markers)
+        self.assertEqual(accumulator.bits, 2)
+        accumulator.add(extra_species, extra_markers)
+        self.assertEqual(accumulator.bits, 8)
+        np.testing.assert_array_equal(pairwise_distance_matrix(accumulator.finalize()),
+                                      pairwise_distance_matrix(encode_markers(species + extra_species,
+                                                                              markers + extra_markers)))
+
+    def test_extend_matches_full_matrix(self):
+        species, markers = make_markers(6, 'ACGT')
+        extra_species, extra_markers = make_markers(7, 'ACGTN')
+        extra_species = [f"New {name}" for name in extra_species]
+        encoding = encode_markers(species, markers)
+        merged = merge_encodings(encoding, encode_markers(extra_species, extra_markers))
+        self.assertEqual(merged.bits, 8)
+        full = pairwise_distance_matrix(encode_markers(species + extra_species, markers + extra_markers))
+        np.testing.assert_array_equal(extend_distance_matrix(pairwise_distance_matrix(encoding), merged, batch_size=4),
+                                      full)
+        rows = [{'species': sp, 'genetic_marker': marker} for sp, marker in zip(species, markers)]
+        extra_rows = [{'species': sp, 'genetic_marker': marker} for sp, marker in zip(extra_species, extra_markers)]
+        extended = extend_processed_data(process_data(rows), extra_rows)
+        np.testing.assert_array_equal(extended['distance_array'], process_data(rows + extra_rows)['distance_array'])
+        with self.assertRaises(ValueError):
+            extend_processed_data(extended, extra_rows[:1])
+
+    def test_streaming_matches_process_data(self):
+        species, markers = make_markers(5, 'ACGT-')
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'markers.csv')
+            with open(file_path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['species', 'genetic_marker'])
+                writer.writerows(zip(species, markers))
+            rows = list(load_data_generator(file_path))
+            streamed = process_data_in_chunks(file_path, chunk_size=7)
+        expected = process_data(rows)
+        self.assertEqual(len(rows), len(markers))
+        self.assertEqual(list(streamed['species']), list(expected['species']))
+        np.testing.assert_array_equal(streamed['distance_array'], expected['distance_array'])
+
+    def test_pack_roundtrip(self):
+        codes = np.random.default_rng(0).integers(0, 4, size=(10, 7)).astype(np.uint8)
+        packed = pack_codes(codes, 2)
+        self.assertEqual(packed.shape, (10, 2))
+        np.testing.assert_array_equal(unpack_codes(packed, 7, 2), codes)
+
+    def test_distance_matrix_view(self):
+        species = np.array(['A', 'B'], dtype=object)
+        view = DistanceMatrixView(species, np.array([[0.0, 2.0], [2.0, 0.0]]))
+        self.assertEqual(view['A']['B'], 2.0)
+        self.assertEqual(list(view), ['A', 'B'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+# test_edge_index.py
+
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from mod_edge_index import EdgeIndex, minimum_spanning_tree, nearest_neighbors, sorted_pairs
+
+class TestEdgeIndex(unittest.TestCase):
+    def setUp(self):
+        points = np.random.default_rng(0).normal(size=(60, 3))
+        self.distances = np.linalg.norm(points[:, None] - points[None], axis=2)
+        self.index = EdgeIndex.from_distances(self.distances, max_neighbors=5)
+
+    def test_minimum_spanning_tree(self):
+        edges, weights = minimum_spanning_tree(self.distances)
+        self.assertEqual(len(edges), len(self.distances) - 1)
+        np.testing.assert_allclose(weights, self.distances[edges[:, 0], edges[:, 1]])
+        expected = nx.minimum_spanning_tree(nx.from_numpy_array(self.distances)).size(weight='weight')
+        self.assertAlmostEqual(weights.sum(), expected)
+
+    def test_nearest_neighbors(self):
+        neighbors = nearest_neighbors(self.distances, 4)
+        brute = np.argsort(self.distances + np.diag(np.full(len(self.distances), np.inf)), axis=1)[:, :4]
+        np.testing.assert_array_equal(neighbors, brute)
+
+    def test_filters(self):
+        lo, hi = self.index.weight_range()
+        pairs, weights = self.index.below((lo + hi) / 2)
+        self.assertEqual(len(pairs), int(np.triu(self.distances <= (lo + hi) / 2, k=1).sum()))
+        self.assertTrue((np.diff(weights) >= 0).all())
+        self.assertEqual(len(self.index.below(hi)[0]), 60 * 59 // 2)
+
+        one, _ = self.index.nearest(1)
+        everyone = set(one.ravel().tolist())
+        self.assertEqual(everyone, set(range(60)))
+        self.assertEqual(self.index.max_neighbors, 5)
+        self.assertLess(len(one), len(self.index.nearest(5)[0]))
+
+    def test_incomparable_species(self):
+        distances = self.distances.copy()
+        distances[0, 1:] = distances[1:, 0] = np.inf
+        index = EdgeIndex.from_distances(distances, max_neighbors=3)
+        self.assertTrue(np.isfinite(index.weights).all())
+        self.assertNotIn(0, index.nearest(3)[0].ravel().tolist())
+        pairs, _ = index.backbone()
+        self.assertEqual(len(pairs), 58)
+
+    def test_sorted_pairs(self):
+        distances = self.distances.copy()
+        distances[3, 5:] = distances[5:, 3] = np.inf
+        rows, cols = np.triu_indices(60, k=1)
+        comparable = np.isfinite(distances[rows, cols])
+        pairs, weights = sorted_pairs(distances, block_pairs=100)
+        self.assertEqual(pairs.dtype, np.uint32)
+        self.assertEqual(len(pairs), int(comparable.sum()))
+        self.assertTrue((pairs[:, 0] < pairs[:, 1]).all())
+        self.assertTrue((np.diff(weights) >= 0).all())
+        np.testing.assert_allclose(distances[pairs[:, 0], pairs[:, 1]], weights, rtol=1e-6)
+        self.assertEqual(set(map(tuple, pairs.tolist())), set(zip(rows[comparable].tolist(), cols[comparable].tolist())))
+
+if __name__ == '__main__':
+    unittest.main()
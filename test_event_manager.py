@@ -0,0 +1,103 @@
+# test_event_manager.py
+
+import os
+import threading
+import time
+import unittest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+
+from event_manager import EventManager, COALESCE, DEBOUNCE, THROTTLE, IMMEDIATE
+
+def run_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        QApplication.processEvents()
+        time.sleep(0.002)
+
+class TestEventManager(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.events = EventManager()
+        self.received = []
+        self.events.subscribe('tick', self.received.append)
+
+    def test_immediate(self):
+        self.events.emit('tick', 1)
+        self.events.emit('other', 2)
+        self.assertEqual(self.received, [1])
+        self.events.unsubscribe('tick', self.received.append)
+        self.events.emit('tick', 3)
+        self.assertEqual(self.received, [1])
+
+    def test_coalesce(self):
+        self.events.set_policy('tick', COALESCE)
+        for value in range(10):
+            self.events.emit('tick', value)
+        self.assertEqual(self.received, [])
+        run_loop(0.05)
+        self.assertEqual(self.received, [9])
+        stats = self.events.stats_summary()['tick']
+        self.assertEqual((stats['emitted'], stats['dispatched'], stats['coalesced']), (10, 1, 9))
+        self.assertGreaterEqual(stats['max_latency_ms'], 0)
+
+    def test_debounce(self):
+        self.events.set_policy('tick', DEBOUNCE, 40)
+        for value in range(5):
+            self.events.emit('tick', value)
+            run_loop(0.01)
+        self.assertEqual(self.received, [])
+        run_loop(0.1)
+        self.assertEqual(self.received, [4])
+
+    def test_throttle(self):
+        self.events.set_policy('tick', THROTTLE, 50)
+        self.events.emit('tick', 0)
+        self.assertEqual(self.received, [0])
+        for value in range(1, 5):
+            self.events.emit('tick', value)
+        self.assertEqual(self.received, [0])
+        run_loop(0.12)
+        self.assertEqual(self.received, [0, 4])
+
+    def test_flush_and_policy_change(self):
+        self.events.set_policy('tick', DEBOUNCE, 10000)
+        self.events.emit('tick', 1)
+        self.events.flush()
+        self.assertEqual(self.received, [1])
+        self.events.emit('tick', 2)
+        # Leaving a deferring policy delivers what it held back
+        self.events.set_policy('tick', IMMEDIATE)
+        self.events.emit('tick', 3)
+        self.assertEqual(self.received, [1, 2, 3])
+        with self.assertRaises(ValueError):
+            self.events.set_policy('tick', 'sometimes')
+
+    def test_worker_thread_emit(self):
+        threads = []
+        self.events.subscribe('tick', lambda value: threads.append(threading.current_thread()))
+        worker = threading.Thread(target=lambda: self.events.emit('tick', 'from worker'))
+        worker.start()
+        worker.join()
+        self.assertEqual(self.received, [])
+        run_loop(0.05)
+        self.assertEqual(self.received, ['from worker'])
+        self.assertEqual(threads, [threading.main_thread()])
+
+    def test_failing_listener(self):
+        def fail(value):
+            raise RuntimeError(value)
+        events = EventManager()
+        events.subscribe('tick', fail)
+        events.subscribe('tick', self.received.append)
+        events.emit('tick', 1)
+        self.assertEqual(self.received, [1])
+        self.assertEqual(events.stats_summary()['tick']['errors'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+# test_frame_scheduler.py
+
+import os
+import time
+import unittest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5 import QtCore
+from PyQt5.QtWidgets import QApplication
+
+from mod_frame_scheduler import FrameScheduler, FrameTimeStats
+
+class Target(QtCore.QObject):
+    def __init__(self):
+        super().__init__()
+        self.updates = 0
+
+    def update(self):
+        self.updates += 1
+
+def process_events(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        QApplication.processEvents()
+        time.sleep(0.002)
+
+class TestFrameScheduler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def test_requests_are_coalesced_and_idle(self):
+        target = Target()
+        scheduler = FrameScheduler(target)
+        for _ in range(5):
+            scheduler.request_frame('view')
+        scheduler.request_frame('hover')
+        process_events(0.05)
+        self.assertEqual(target.updates, 1)
+        self.assertEqual(scheduler.begin_frame(), {'view', 'hover'})
+        scheduler.end_frame()
+        self.assertTrue(scheduler.idle)
+        process_events(0.05)
+        self.assertEqual(target.updates, 1)
+
+    def test_fps_cap_delays_next_frame(self):
+        target = Target()
+        scheduler = FrameScheduler(target, max_fps=5)
+        scheduler.begin_frame()
+        scheduler.end_frame()
+        scheduler.request_frame()
+        process_events(0.05)
+        self.assertEqual(target.updates, 0)
+        process_events(0.3)
+        self.assertEqual(target.updates, 1)
+
+    def test_frame_time_stats(self):
+        stats = FrameTimeStats(window=100)
+        for ms in range(1, 201):
+            stats.add(ms / 1000.0)
+        summary = stats.summary()
+        self.assertEqual((summary['frames'], summary['window']), (200, 100))
+        self.assertAlmostEqual(summary['p50_ms'], 150.5)
+        self.assertAlmostEqual(summary['max_ms'], 200.0)
+        self.assertLessEqual(summary['p95_ms'], summary['p99_ms'])
+        stats.reset()
+        self.assertEqual(stats.summary()['frames'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+# test_graph.py
+
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from mod_graph import CompactGraph
+from mod_layout import compute_layout
+from mod_scene import scene_from_graph
+from mod_tree_generator import tree_from_merges, upgma
+
+class TestCompactGraph(unittest.TestCase):
+    def setUp(self):
+        points = np.random.default_rng(0).random((40, 3))
+        self.names = [f"Species {i}" for i in range(40)]
+        self.tree = tree_from_merges(self.names, *upgma(np.linalg.norm(points[:, None] - points[None], axis=-1)))
+
+    def test_csr_matches_networkx(self):
+        G = self.tree.to_networkx()
+        names = self.tree.node_names()
+        for node in range(self.tree.n_nodes):
+            self.assertEqual({names[i] for i in self.tree.neighbors(node)}, set(G[names[node]]))
+        np.testing.assert_array_equal(self.tree.degrees(), [G.degree(name) for name in names])
+        preorder, parent, parent_edge = self.tree.preorder(self.tree.root())
+        self.assertEqual(len(preorder), self.tree.n_nodes)
+        for node in preorder[1:]:
+            self.assertIn(parent[node], self.tree.edges[parent_edge[node]])
+
+    def test_networkx_roundtrip(self):
+        G = nx.Graph()
+        G.add_node('Ancestor 0', pos=np.zeros(3), internal=True, start_time=1.0)
+        G.add_node('Homo sapiens', pos=np.ones(3), attribute='primate')
+        G.add_edge('Ancestor 0', 'Homo sapiens', weight=0.25, end_time=3.0)
+        graph = CompactGraph.from_networkx(G)
+        # An edge's own times replace the ones derived from its nodes
+        np.testing.assert_array_equal(graph.lifetimes(), [[-np.inf, 3.0]])
+        H = graph.to_networkx()
+        self.assertEqual(dict(H.nodes(data='attribute')), {'Ancestor 0': None, 'Homo sapiens': 'primate'})
+        self.assertEqual(H.nodes['Ancestor 0']['start_time'], 1.0)
+        self.assertEqual(H.edges['Ancestor 0', 'Homo sapiens']['weight'], 0.25)
+
+    def test_layout_and_scene_share_node_order(self):
+        positions = compute_layout(self.tree, 'radial')
+        self.assertEqual(positions.shape, (self.tree.n_nodes, 3))
+        scene = scene_from_graph(self.tree.with_positions(positions))
+        self.assertEqual(scene.node_names(), self.tree.node_names())
+        np.testing.assert_array_equal(scene.edges, self.tree.edges)
+        back = scene.to_compact()
+        self.assertTrue(np.shares_memory(back.positions, scene.positions))
+
+    def test_remove_nodes_renumbers_edges(self):
+        smaller = self.tree.remove_nodes(['Species 3'])
+        self.assertEqual((smaller.n_nodes, smaller.n_edges), (self.tree.n_nodes - 1, self.tree.n_edges - 1))
+        self.assertNotIn('Species 3', smaller)
+        names = smaller.node_names()
+        expected = {frozenset(edge) for edge in self.tree.to_networkx().edges() if 'Species 3' not in edge}
+        self.assertEqual({frozenset((names[u], names[v])) for u, v in smaller.edges.tolist()}, expected)
+
+    def test_bytes_per_node(self):
+        tree = self.tree.with_positions(compute_layout(self.tree, 'radial'))
+        tree.csr()
+        self.assertLess(tree.nbytes / tree.n_nodes, 100)
+
+if __name__ == '__main__':
+    unittest.main()
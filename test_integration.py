@@ -1,11 +1,41 @@
+import os
 import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+from event_manager import EventManager
 from mod_data_loader import load_data
+from mod_edge_index import EdgeIndex
+from data_processor import process_data
+from mod_scene import scene_from_graph
 from mod_tree_generator import generate_tree
 from mod_visualization import Visualization
 
 def test_data_pipeline():
-    settings = {"data_file": "sample_data.json", "visualization_params": {"node_size": 10}}
+    app = QApplication.instance() or QApplication([])
+    settings = {"data_file": "data_sample_dataset.csv", "visualization_params": {"node_size": 10}}
     data = load_data(settings["data_file"])
-    tree = generate_tree(data)
-    viz = Visualization(tree, settings)
-    assert viz.tree is not None
\ No newline at end of file
+    processed_data = process_data(data)
+    tree = generate_tree(processed_data)
+    viz = Visualization(tree, settings, EventManager())
+    assert viz.tree is not None
+    assert viz.scene.n_nodes == tree.n_nodes
+    assert set(processed_data['species']) <= set(tree.node_names())
+
+def test_opening_a_scene_resets_the_edge_filter():
+    app = QApplication.instance() or QApplication([])
+    settings = {"data_file": "data_sample_dataset.csv", "visualization_params": {"node_size": 10}}
+    processed_data = process_data(load_data(settings["data_file"]))
+    tree = generate_tree(processed_data)
+    events = EventManager()
+    sources = []
+    events.subscribe('edge_source', sources.append)
+    viz = Visualization(tree, settings, events)
+    viz.set_edge_source(processed_data['species'], EdgeIndex.from_distances(processed_data['distance_array']))
+    viz.update_edge_filter(('knn', 50))
+    assert viz.displayed_edges()[0].shape[1] == 2
+    viz.set_scene(scene_from_graph(tree))
+    assert viz.edge_filter[0] == 'all'
+    assert viz.displayed_edges()[0] is viz.scene.edges
+    assert sources == [True, False]
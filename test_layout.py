@@ -0,0 +1,68 @@
+# test_layout.py
+
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from mod_graph import CompactGraph
+from mod_layout import Octree, repulsive_displacement, compute_layout, relax_layout
+
+class TestLayout(unittest.TestCase):
+    def test_barnes_hut_exact_with_zero_theta(self):
+        points = np.random.default_rng(0).random((200, 3))
+        delta = points[:, None] - points[None]
+        distance2 = (delta ** 2).sum(axis=-1)
+        np.fill_diagonal(distance2, np.inf)
+        expected = ((0.3 ** 2 / distance2)[..., None] * delta).sum(axis=1)
+        result = repulsive_displacement(Octree(points, max_depth=6), 0.3, theta=0.0)
+        np.testing.assert_allclose(result, expected, atol=1e-10)
+
+    def test_queries_and_cutoff_match_exact(self):
+        rng = np.random.default_rng(1)
+        points, queries = rng.random((200, 3)), rng.random((20, 3)) * 1.5
+        delta = queries[:, None] - points[None]
+        distance2 = (delta ** 2).sum(axis=-1)
+        tree = Octree(points, max_depth=6)
+        expected = ((0.3 ** 2 / distance2)[..., None] * delta).sum(axis=1)
+        np.testing.assert_allclose(repulsive_displacement(tree, 0.3, 0.0, queries=queries), expected, atol=1e-10)
+        near = np.where(distance2 < 0.25 ** 2, 0.3 ** 2 / distance2, 0.0)
+        np.testing.assert_allclose(repulsive_displacement(tree, 0.3, 0.0, queries=queries, cutoff=0.25),
+                                   (near[..., None] * delta).sum(axis=1), atol=1e-10)
+
+    def test_relax_layout_moves_only_movable_nodes(self):
+        G = CompactGraph([str(node) for node in range(12)], np.array(nx.path_graph(12).edges()))
+        positions = compute_layout(G, 'barnes_hut', iterations=10)
+        positions[10:] = np.nan
+        movable = np.zeros(12, dtype=bool)
+        movable[9] = True
+        laid_out = G.with_positions(positions)
+        result = relax_layout(laid_out, movable, iterations=10)
+        np.testing.assert_array_equal(result[:9], laid_out.positions[:9])
+        self.assertTrue(np.isfinite(result).all())
+        self.assertLess(np.linalg.norm(result[11] - result[8]), np.ptp(positions[:10], axis=0).max())
+
+    def test_layouts_are_seeded_and_three_dimensional(self):
+        G = nx.balanced_tree(2, 5)
+        for method in ('barnes_hut', 'radial'):
+            first = compute_layout(G, method, seed=3)
+            second = compute_layout(G, method, seed=3)
+            self.assertEqual(set(first), set(G.nodes()))
+            for node in G:
+                self.assertEqual(first[node].shape, (3,))
+                np.testing.assert_array_equal(first[node], second[node])
+
+    def test_warm_start_keeps_fixed_nodes(self):
+        G = nx.path_graph(10)
+        start = compute_layout(G, 'barnes_hut', iterations=10)
+        G.add_edge(9, 10)
+        result = compute_layout(G, 'barnes_hut', init_pos=start, fixed=range(10), iterations=5)
+        for node in range(10):
+            np.testing.assert_array_equal(result[node], start[node])
+
+    def test_unknown_layout(self):
+        with self.assertRaises(ValueError):
+            compute_layout(nx.path_graph(3), 'unknown')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+# test_pipeline.py
+
+import os
+import time
+import unittest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+
+from mod_pipeline import PipelineRun, PipelineRunner, PipelineCancelled, PIPELINE_STAGES
+
+SETTINGS = {'tree_params': {'method': 'upgma'}, 'layout_params': {'iterations': 5}}
+
+def wait_for(condition, timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        QApplication.processEvents()
+        time.sleep(0.005)
+    return condition()
+
+class TestPipeline(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.runner = PipelineRunner()
+        self.events = []
+        self.runner.progress.connect(lambda stage, fraction: self.events.append((stage, fraction)))
+        for name in ('preview', 'finished', 'failed'):
+            getattr(self.runner, name).connect(lambda value, name=name: self.events.append((name, value)))
+        self.runner.cancelled.connect(lambda: self.events.append(('cancelled', None)))
+
+    def tearDown(self):
+        self.runner.shutdown()
+
+    def names(self):
+        return [name for name, _ in self.events]
+
+    def test_stages_preview_and_result(self):
+        self.runner.start('data_sample_dataset.csv', SETTINGS)
+        self.assertTrue(wait_for(lambda: not self.runner.busy))
+        names = self.names()
+        self.assertEqual(names[-1], 'finished')
+        # Stages are reported in order, and the coarse preview comes before the final tree
+        stages = [PIPELINE_STAGES.index(name) for name in names if name in PIPELINE_STAGES]
+        self.assertEqual(stages, sorted(stages))
+        self.assertLess(names.index('preview'), names.index('finished'))
+        result = self.events[-1][1]
+        tree = result['tree']
+        self.assertEqual(sorted(result['species']), sorted(n for n, internal in zip(tree.node_names(), tree.internal) if not internal))
+        self.assertEqual(tree.positions.shape, (tree.n_nodes, 3))
+        self.assertEqual(int(result['edge_index'].pairs.max()) + 1, len(result['species']))
+
+    def test_shutdown_drops_queued_runs(self):
+        runner = PipelineRunner(workers=1)
+        first = runner.start('data_sample_dataset.csv', SETTINGS)
+        queued = runner.start('data_sample_dataset.csv', SETTINGS)
+        runner.shutdown()
+        self.assertTrue(first.cancelled and queued.cancelled)
+        self.assertFalse(runner.busy)
+        with self.assertRaises(RuntimeError):
+            runner.start('data_sample_dataset.csv', SETTINGS)
+
+    def test_cancel(self):
+        run = PipelineRun('data_sample_dataset.csv', SETTINGS,
+                          on_progress=lambda stage, fraction: stage == 'tree' and run.cancel())
+        with self.assertRaises(PipelineCancelled):
+            run.run()
+        # A cancelled run is dropped: nothing but the cancellation reaches the GUI
+        self.runner.start('data_sample_dataset.csv', SETTINGS)
+        self.runner.cancel()
+        self.assertFalse(self.runner.busy)
+        wait_for(lambda: False, timeout=0.5)
+        self.assertEqual(self.names(), ['cancelled'])
+
+    def test_superseded_run_and_failure(self):
+        self.runner.start('data_sample_dataset.csv', SETTINGS)
+        self.runner.start('missing_file.csv', SETTINGS)
+        self.assertTrue(wait_for(lambda: not self.runner.busy))
+        wait_for(lambda: False, timeout=0.5)
+        self.assertEqual(self.names()[0], 'cancelled')
+        self.assertEqual(self.names()[-1], 'failed')
+        self.assertNotIn('finished', self.names())
+
+if __name__ == '__main__':
+    unittest.main()
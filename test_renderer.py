@@ -0,0 +1,53 @@
+# test_renderer.py
+
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from mod_renderer import node_colors, edge_style
+from mod_scene import scene_from_graph
+
+class TestRenderer(unittest.TestCase):
+    def setUp(self):
+        G = nx.Graph()
+        G.add_node('a', pos=np.array([0.0, 0.0, 0.0]), attribute='red')
+        G.add_node('b', pos=np.array([1.0, 0.0, 0.0]))
+        G.add_node('c', pos=np.array([0.0, 5.0, 0.0]), attribute='red')
+        G.add_edge('a', 'b', weight=1.0)
+        G.add_edge('a', 'c', weight=4.0)
+        self.scene = scene_from_graph(G)
+
+    def test_node_colors_follow_attributes(self):
+        colors = node_colors(self.scene, lambda attr: (1.0, 0.0, 0.0) if attr == 'red' else (0.5, 0.5, 0.5))
+        self.assertEqual(colors.dtype, np.float32)
+        np.testing.assert_array_equal(colors, [[1, 0, 0], [0.5, 0.5, 0.5], [1, 0, 0]])
+
+    def test_edge_style_buckets(self):
+        vertices, colors, buckets, _ = edge_style(self.scene.positions, self.scene.edges, self.scene.branch_lengths,
+                                              edge_width=2.0, buckets=4)
+        # The short branch (weight 1/4 of the longest) lands in bucket 1, the longest in bucket 3
+        np.testing.assert_array_equal(vertices, [[0, 0, 0], [1, 0, 0], [0, 0, 0], [0, 5, 0]])
+        np.testing.assert_allclose(colors[:, 2], [0.75, 0.75, 0.0, 0.0])
+        self.assertEqual([(first, count) for first, count, _ in buckets], [(0, 2), (2, 2)])
+        np.testing.assert_allclose([width for _, _, width in buckets], [2.0 * (1 + 5 * 1.5 / 4), 2.0 * (1 + 5 * 3.5 / 4)])
+
+    def test_edge_style_groups_by_width(self):
+        G = nx.path_graph(50)
+        weights = np.random.default_rng(0).random(49)
+        for (u, v), weight in zip(G.edges(), weights):
+            G.edges[u, v]['weight'] = weight
+            G.nodes[u]['pos'] = G.nodes[v]['pos'] = np.zeros(3)
+        scene = scene_from_graph(G)
+        vertices, colors, buckets, order = edge_style(scene.positions, scene.edges, scene.branch_lengths)
+        self.assertEqual(sum(count for _, count, _ in buckets), 2 * 49)
+        widths = [width for _, _, width in buckets]
+        self.assertEqual(widths, sorted(widths))
+        for first, count, _ in buckets:
+            shade = colors[first:first + count, 2]
+            self.assertLess(shade.max() - shade.min(), 1.0 / 6 + 1e-6)
+        np.testing.assert_array_equal(np.sort(order), np.arange(49))
+        np.testing.assert_allclose(colors[::2, 2], 1 - weights[order] / weights.max(), atol=1e-6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+# test_scene.py
+
+import os
+import tempfile
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from mod_scene import load_scene, save_scene, scene_from_graph
+
+class TestScene(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.path = os.path.join(self.temp_dir.name, 'tree.e3ds')
+        self.G = nx.Graph()
+        self.G.add_node('Ancestor 0', pos=np.zeros(3), internal=True)
+        self.G.add_node('Homo sapiens', pos=np.array([1.0, 2.0, 3.0]), attribute='primate')
+        self.G.add_node('Äpfel', pos=np.array([-1.0, 0.5, 0.0]))
+        self.G.add_edge('Ancestor 0', 'Homo sapiens', weight=0.25)
+        self.G.add_edge('Ancestor 0', 'Äpfel', weight=1.5)
+
+    def test_roundtrip_is_memory_mapped(self):
+        scene = scene_from_graph(self.G)
+        save_scene(self.path, scene)
+        loaded = load_scene(self.path)
+        for name in ('positions', 'edges', 'branch_lengths', 'attribute_codes', 'internal'):
+            np.testing.assert_array_equal(getattr(loaded, name), getattr(scene, name))
+            self.assertFalse(getattr(loaded, name).flags.writeable)
+        self.assertEqual(loaded.node_names(), list(self.G.nodes()))
+        self.assertEqual(loaded.node_name(2), 'Äpfel')
+        self.assertEqual(loaded.attribute_names, scene.attribute_names)
+
+    def test_to_graph(self):
+        save_scene(self.path, scene_from_graph(self.G))
+        G = load_scene(self.path).to_graph()
+        self.assertEqual(set(map(frozenset, G.edges())), set(map(frozenset, self.G.edges())))
+        self.assertTrue(G.nodes['Ancestor 0']['internal'])
+        self.assertEqual(G.nodes['Homo sapiens']['attribute'], 'primate')
+        self.assertNotIn('attribute', G.nodes['Äpfel'])
+        self.assertAlmostEqual(G.edges['Ancestor 0', 'Äpfel']['weight'], 1.5)
+
+    def test_lifetimes(self):
+        self.G.nodes['Homo sapiens']['start_time'] = 2.0
+        self.G.nodes['Äpfel']['start_time'] = 1.0
+        self.G.nodes['Äpfel']['end_time'] = 4.0
+        scene = scene_from_graph(self.G)
+        np.testing.assert_array_equal(scene.node_times, [[-np.inf, np.inf], [2, np.inf], [1, 4]])
+        # Edges exist while both of their nodes do
+        np.testing.assert_array_equal(scene.edge_times, [[2, np.inf], [1, 4]])
+        save_scene(self.path, scene)
+        loaded = load_scene(self.path)
+        np.testing.assert_array_equal(loaded.edge_times, scene.edge_times)
+        G = loaded.to_graph()
+        self.assertEqual((G.nodes['Äpfel']['start_time'], G.nodes['Äpfel']['end_time']), (1.0, 4.0))
+        self.assertNotIn('start_time', G.nodes['Ancestor 0'])
+
+    def test_empty_scene(self):
+        save_scene(self.path, scene_from_graph(nx.Graph()))
+        loaded = load_scene(self.path)
+        self.assertEqual((loaded.n_nodes, loaded.n_edges), (0, 0))
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a scene file')
+        with self.assertRaises(ValueError):
+            load_scene(self.path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+# test_search_index.py
+
+import unittest
+
+import numpy as np
+
+from mod_search_index import SearchIndex
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.names = ['Homo sapiens', 'Homo erectus', 'Pan troglodytes', 'Pan paniscus',
+                      'Gorilla gorilla', 'Pongo abelii', 'Hylobates lar', 'Internal_3', 'homo']
+        self.index = SearchIndex(self.names)
+
+    def found(self, ids):
+        return [self.names[i] for i in ids]
+
+    def test_prefix(self):
+        # Exact match first, then longer names, then names with a matching word
+        self.assertEqual(self.found(self.index.prefix('HOMO')), ['homo', 'Homo erectus', 'Homo sapiens'])
+        self.assertEqual(self.found(self.index.prefix('pan')), ['Pan paniscus', 'Pan troglodytes'])
+        self.assertEqual(self.found(self.index.prefix('goril')), ['Gorilla gorilla'])
+        self.assertEqual(self.found(self.index.prefix('sap')), ['Homo sapiens'])
+        self.assertEqual(self.found(self.index.prefix('homo  sap')), ['Homo sapiens'])
+        self.assertEqual(len(self.index.prefix('homo', limit=2)), 2)
+        self.assertEqual(self.index.prefix('xyz'), [])
+        self.assertEqual(self.index.prefix('  '), [])
+
+    def test_fuzzy(self):
+        ids, scores = self.index.fuzzy('homo sapeins')
+        self.assertEqual(self.names[ids[0]], 'Homo sapiens')
+        self.assertTrue((np.diff(scores) <= 0).all())
+        ids, _ = self.index.fuzzy('troglodites')
+        self.assertEqual(self.names[ids[0]], 'Pan troglodytes')
+        self.assertEqual(len(self.index.fuzzy('qqqq')[0]), 0)
+        # Similarity is shared trigrams over the union: identical strings score 1
+        ids, scores = self.index.fuzzy('Pongo abelii')
+        self.assertEqual((self.names[ids[0]], scores[0]), ('Pongo abelii', 1.0))
+
+    def test_search_ranks_prefix_before_fuzzy(self):
+        self.assertEqual(self.index.search('hylo')[0], 'Hylobates lar')
+        self.assertEqual(self.index.search('hylobtes lar')[0], 'Hylobates lar')
+        self.assertEqual(self.index.search('homo')[:3], ['homo', 'Homo erectus', 'Homo sapiens'])
+        self.assertEqual(len(set(self.index.search('homo'))), len(self.index.search('homo')))
+        self.assertEqual(self.index.search(''), [])
+
+    def test_large_index_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        syllables = np.array(['ba', 'co', 'de', 'fi', 'gu', 'ha', 'ji', 'ko', 'lu', 'ma', 'ne', 'po'])
+        names = [' '.join(''.join(rng.choice(syllables, 3)) for _ in range(2)) for _ in range(3000)]
+        index = SearchIndex(names)
+        for query in ('bac', 'ko', 'lumane f'):
+            expected = sorted(i for i, name in enumerate(names)
+                              if name.startswith(query) or any(word.startswith(query) for word in name.split()))
+            self.assertEqual(sorted(index.prefix(query, limit=len(names))), expected)
+        ids, _ = index.fuzzy(names[42][:-1] + 'x')
+        self.assertIn(42, ids.tolist())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+# test_spatial.py
+
+import unittest
+
+import numpy as np
+
+from mod_spatial import VisibilityIndex
+from util_math import perspective_matrix, view_matrix, frustum_planes, camera_position, pick_matrix, project_points
+
+class TestSpatial(unittest.TestCase):
+    def setUp(self):
+        self.positions = np.random.default_rng(0).normal(0, 20, size=(5000, 3))
+        self.index = VisibilityIndex(self.positions, leaf_size=16)
+        self.modelview = view_matrix((2, -1), -60, (20, 35, 5))
+        self.planes = frustum_planes(perspective_matrix(45, 4 / 3, 0.1, 1000.0) @ self.modelview)
+        self.eye = camera_position(self.modelview)
+
+    def brute_force(self, max_distance=None, margin=0.0):
+        keep = (self.positions @ self.planes[:, :3].T + self.planes[:, 3] >= -margin).all(axis=1)
+        if max_distance is not None:
+            keep &= ((self.positions - self.eye) ** 2).sum(axis=1) < max_distance ** 2
+        return np.flatnonzero(keep)
+
+    def test_matches_brute_force(self):
+        for max_distance in (None, 40, 70):
+            result = self.index.query(self.planes, self.eye, max_distance, margin=0.5)
+            self.assertEqual(result.dtype, np.uint32)
+            self.assertEqual(len(result), len(set(result.tolist())))
+            np.testing.assert_array_equal(np.sort(result), self.brute_force(max_distance, margin=0.5))
+
+    def test_camera(self):
+        np.testing.assert_allclose(camera_position(self.modelview), np.linalg.inv(self.modelview)[:3, 3], atol=1e-9)
+        planes = frustum_planes(perspective_matrix(45, 1.0, 0.1, 1000.0) @ view_matrix((0, 0), -10, (0, 0, 0)))
+        in_front, behind = np.array([0, 0, 0, 1.0]), np.array([0, 0, 20, 1.0])
+        self.assertTrue((planes @ in_front >= 0).all())
+        self.assertFalse((planes @ behind >= 0).all())
+
+    def test_pick_front_most(self):
+        viewport = (0, 0, 800, 600)
+        projection = perspective_matrix(45, 4 / 3, 0.1, 1000.0)
+        clip = projection @ self.modelview
+        for target in (0, 17, 4321):
+            x, y, _ = project_points(self.positions[target], clip, viewport)[0]
+            planes = frustum_planes(pick_matrix(x, y, 4, 4, viewport) @ clip)
+            hits = self.index.query(planes, self.eye, margin=0.1)
+            self.assertIn(target, hits.tolist())
+            expected = hits[np.argmin(((self.positions[hits] - self.eye) ** 2).sum(axis=1))]
+            self.assertEqual(self.index.nearest(planes, self.eye, margin=0.1), expected)
+        # Nothing within the distance limit
+        self.assertIsNone(self.index.nearest(planes, self.eye, max_distance=1.0))
+
+    def test_cluster_cut(self):
+        visible = self.brute_force(margin=0.5)
+        for expand_size, budget in ((0.02, 300), (0.0, 10 ** 6), (10.0, 300)):
+            points, glyphs = self.index.cluster_cut(self.planes, self.eye, expand_size, budget, margin=0.5)
+            self.assertLessEqual(len(points) + len(glyphs['count']), budget)
+            # Glyphs and points partition the cells the frustum touches
+            members = np.concatenate([points] + [self.index.tree.order[s:s + c]
+                                                 for s, c in zip(glyphs['start'], glyphs['count'])])
+            self.assertEqual(len(members), len(set(members.tolist())))
+            self.assertTrue(set(visible.tolist()) <= set(members.tolist()))
+            self.assertTrue((glyphs['count'] > 1).all())
+        # No cell is large enough to open: the root alone
+        self.assertEqual(len(glyphs['count']), 1)
+        # Unlimited budget and no size limit: every point of a visible leaf cell is drawn on its own
+        points, glyphs = self.index.cluster_cut(self.planes, self.eye, 0.0, 10 ** 6, margin=0.5)
+        self.assertEqual(len(glyphs['count']), 0)
+
+    def test_empty_and_unbounded(self):
+        self.assertEqual(len(VisibilityIndex(np.zeros((0, 3))).query(self.planes)), 0)
+        self.assertIsNone(VisibilityIndex(np.zeros((0, 3))).nearest(self.planes, self.eye))
+        points, glyphs = VisibilityIndex(np.zeros((0, 3))).cluster_cut(self.planes, self.eye, 0.01, 100)
+        self.assertEqual((len(points), len(glyphs['count'])), (0, 0))
+        np.testing.assert_array_equal(np.sort(self.index.query()), np.arange(len(self.positions)))
+
+if __name__ == '__main__':
+    unittest.main()
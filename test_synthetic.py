@@ -0,0 +1,38 @@
+# test_synthetic.py
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from mod_synthetic import synthetic_dataset, write_dataset, ancestry_tree
+from mod_data_loader import load_columnar
+
+class TestSynthetic(unittest.TestCase):
+    def test_seeded(self):
+        first = synthetic_dataset(200, seed=3)
+        self.assertTrue(np.array_equal(first['markers'], synthetic_dataset(200, seed=3)['markers']))
+        self.assertFalse(np.array_equal(first['markers'], synthetic_dataset(200, seed=4)['markers']))
+        self.assertEqual(len(first['markers']), 400)
+        self.assertTrue(all(len(marker) == 32 and set(marker) <= set('ACGT') for marker in first['markers']))
+        # Ancestors come first, and children start after their ancestors
+        self.assertTrue(np.all(first['parents'][1:] < np.arange(1, 200)))
+        self.assertTrue(np.all(first['times'][1:] > first['times'][first['parents'][1:]]))
+
+    def test_written_file_loads(self):
+        dataset = synthetic_dataset(50, markers_per_species=3, marker_length=12, seed=1)
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'synthetic.csv')
+            write_dataset(file_path, dataset)
+            columnar = load_columnar(file_path)
+        self.assertEqual(len(columnar), 150)
+        self.assertEqual(list(columnar.species), list(dataset['species']))
+        self.assertTrue(np.allclose(columnar.species_times()[:, 0], dataset['times'], atol=1e-4))
+
+    def test_ancestry_tree(self):
+        tree = ancestry_tree(synthetic_dataset(100))
+        self.assertEqual((tree.n_nodes, tree.n_edges), (100, 99))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+# test_time_index.py
+
+import unittest
+
+import numpy as np
+
+from mod_time_index import TimeIndex
+
+class TestTimeIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        starts = rng.integers(0, 50, 2000).astype(float)
+        ends = starts + rng.integers(0, 30, 2000)
+        starts[:100] = -np.inf
+        ends[100:300] = np.inf
+        self.rng = rng
+        self.index = TimeIndex(np.column_stack([starts, ends]))
+
+    def test_delta_matches_active(self):
+        current = 10.0
+        active = self.index.active(current)
+        # Steps forward and backward, small and large, landing on and between interval ends
+        for _ in range(500):
+            target = float(self.rng.integers(-5, 90)) + self.rng.choice([0.0, 0.5])
+            appearing, disappearing = self.index.delta(current, target)
+            self.assertFalse(active[appearing].any())
+            self.assertTrue(active[disappearing].all())
+            active[appearing] = True
+            active[disappearing] = False
+            np.testing.assert_array_equal(active, self.index.active(target))
+            current = target
+
+    def test_range_and_unbounded(self):
+        self.assertEqual(self.index.time_range(), (0.0, 78.0))
+        self.assertTrue(self.index.active(None).all())
+        untimed = TimeIndex(np.tile([-np.inf, np.inf], (5, 1)))
+        self.assertIsNone(untimed.time_range())
+        self.assertTrue(untimed.active(3.0).all())
+        self.assertEqual([len(ids) for ids in untimed.delta(0.0, 10.0)], [0, 0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+# test_tracing.py
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from mod_tracing import Tracer, NULL_SPAN, TRACER, traced
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.tracer = Tracer()
+
+    def tearDown(self):
+        self.tracer.disable()
+
+    def test_disabled_records_nothing(self):
+        self.assertIs(self.tracer.span('frame'), NULL_SPAN)
+        with self.tracer.span('frame'):
+            self.tracer.count('frames')
+        self.tracer.snapshot('load')
+        self.assertEqual((self.tracer.summary(), self.tracer.counters), ([], {}))
+
+    def test_spans_counters_and_chrome_trace(self):
+        self.tracer.enable()
+        with self.tracer.span('tree', method='upgma'):
+            with self.tracer.span('layout', nodes=3):
+                pass
+        worker = threading.Thread(target=lambda: self.tracer.span('pick', 'render').__enter__().__exit__(None, None, None),
+                                  name='picker')
+        worker.start()
+        worker.join()
+        with self.assertRaises(ValueError):
+            with self.tracer.span('tree'):
+                raise ValueError
+        self.tracer.count('frames')
+        self.tracer.count('frames', 2)
+
+        summary = {row['name']: row for row in self.tracer.summary()}
+        self.assertEqual(summary['tree']['calls'], 2)
+        self.assertGreaterEqual(summary['tree']['max_ms'], summary['layout']['max_ms'])
+        self.assertEqual(self.tracer.counters, {'frames': 3})
+        self.assertIn('counter frames: 3', self.tracer.format_summary())
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'trace.json')
+            self.tracer.save_chrome_trace(file_name)
+            with open(file_name, encoding='utf-8') as f:
+                events = json.load(f)['traceEvents']
+        spans = [event for event in events if event['ph'] == 'X']
+        self.assertEqual([event['name'] for event in spans], ['layout', 'tree', 'pick', 'tree'])
+        layout, tree = spans[:2]
+        # The nested span lies within its parent on the same thread
+        self.assertEqual(layout['tid'], tree['tid'])
+        self.assertTrue(tree['ts'] <= layout['ts'] and layout['ts'] + layout['dur'] <= tree['ts'] + tree['dur'])
+        self.assertEqual(tree['args'], {'method': 'upgma'})
+        self.assertEqual(spans[3]['args'], {'error': 'ValueError'})
+        self.assertNotEqual(spans[2]['tid'], tree['tid'])
+        self.assertIn({'name': 'picker'}, [event['args'] for event in events if event['ph'] == 'M'])
+        self.assertEqual([event['args'] for event in events if event['ph'] == 'C'], [{'frames': 1}, {'frames': 3}])
+
+    def test_memory_snapshots(self):
+        self.tracer.enable(memory=True)
+        with self.tracer.span('load'):
+            data = [bytearray(1024) for _ in range(1000)]
+        with self.tracer.span('frame', 'render'):
+            pass
+        self.assertGreater(self.tracer.events[0][5]['memory_delta_kb'], 900)
+        # Only stage spans end with a snapshot
+        self.assertEqual([label for label, _ in self.tracer.snapshots], ['load'])
+        self.assertTrue(self.tracer.snapshots[0][1])
+        del data
+
+    def test_traced(self):
+        @traced('distances')
+        def work(x):
+            return x * 2
+        self.assertEqual(work(2), 4)
+        TRACER.enable()
+        try:
+            self.assertEqual(work(3), 6)
+            self.assertIn('distances', [row['name'] for row in TRACER.summary()])
+        finally:
+            TRACER.disable()
+            TRACER.reset()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+# test_tree_generator.py
+
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from config_settings import DEFAULT_SETTINGS
+
+from mod_tree_generator import generate_tree, extend_tree, neighbor_joining, upgma, tree_from_merges
+
+# Additive distances of a five-taxon tree
+ADDITIVE = np.array([
+    [0, 5, 9, 9, 8],
+    [5, 0, 10, 10, 9],
+    [9, 10, 0, 8, 7],
+    [9, 10, 8, 0, 3],
+    [8, 9, 7, 3, 0],
+], dtype=float)
+
+def path_lengths(G, names):
+    lengths = dict(nx.all_pairs_dijkstra_path_length(G))
+    return np.array([[lengths[a][b] for b in names] for a in names])
+
+class TestTreeGenerator(unittest.TestCase):
+    def test_neighbor_joining_recovers_additive_tree(self):
+        names = list('abcde')
+        G = tree_from_merges(names, *neighbor_joining(ADDITIVE)).to_networkx()
+        self.assertTrue(nx.is_tree(G))
+        self.assertEqual(G.number_of_nodes(), 2 * len(names) - 1)
+        np.testing.assert_allclose(path_lengths(G, names), ADDITIVE)
+
+    def test_upgma_is_ultrametric(self):
+        points = np.random.default_rng(0).random((30, 3))
+        distances = np.linalg.norm(points[:, None] - points[None], axis=-1)
+        children, lengths = upgma(distances)
+        heights = np.zeros(2 * len(points) - 1)
+        for k, (child, length) in enumerate(zip(children, lengths)):
+            heights[len(points) + k] = heights[child[0]] + length[0]
+            self.assertAlmostEqual(heights[child[0]] + length[0], heights[child[1]] + length[1])
+        self.assertTrue(np.all(np.diff(np.sort(heights[len(points):])) >= 0))
+
+    def test_generate_tree_methods(self):
+        processed = {'species': np.array(list('abcde'), dtype=object), 'distance_array': ADDITIVE}
+        for method in ('neighbor_joining', 'upgma'):
+            G = generate_tree(processed, method)
+            self.assertEqual(G.n_edges, 8)
+            self.assertEqual(G.positions.shape, (9, 3))
+        self.assertEqual(generate_tree(processed, 'complete').n_edges, 10)
+        with self.assertRaises(ValueError):
+            generate_tree(processed, 'unknown')
+
+    def test_default_layout_settings_fit_every_method(self):
+        processed = {'species': np.array(list('abcde'), dtype=object), 'distance_array': ADDITIVE}
+        for method in ('barnes_hut', 'radial'):
+            layout_params = dict(DEFAULT_SETTINGS['layout_params'], method=method)
+            G = generate_tree(processed, 'neighbor_joining', layout_params)
+            self.assertEqual(G.positions.shape, (9, 3))
+
+    def test_ancestors_span_descendant_lifetimes(self):
+        times = np.array([[0, 3], [1, np.inf], [2, 5], [4, 6], [-np.inf, 7]], dtype=float)
+        processed = {'species': np.array(list('abcde'), dtype=object), 'distance_array': ADDITIVE,
+                     'species_times': times}
+        G = generate_tree(processed, 'upgma').to_networkx()
+        self.assertEqual((G.nodes['c']['start_time'], G.nodes['c']['end_time']), (2.0, 5.0))
+        self.assertNotIn('end_time', G.nodes['b'])
+        root = list(G.nodes())[-1]
+        self.assertNotIn('start_time', G.nodes[root])
+        self.assertNotIn('end_time', G.nodes[root])
+        for parent, child in nx.dfs_edges(G, root):
+            if G.nodes[parent]['internal']:
+                self.assertLessEqual(G.nodes[parent].get('start_time', -np.inf), G.nodes[child].get('start_time', -np.inf))
+                self.assertGreaterEqual(G.nodes[parent].get('end_time', np.inf), G.nodes[child].get('end_time', np.inf))
+
+    def test_extend_tree_keeps_layout(self):
+        names = np.array(list('abcde'), dtype=object)
+        G = generate_tree({'species': names[:3], 'distance_array': ADDITIVE[:3, :3]}, 'neighbor_joining')
+        grown = extend_tree({'species': names, 'distance_array': ADDITIVE}, G)
+        H = grown.to_networkx()
+        self.assertTrue(nx.is_tree(H))
+        self.assertEqual(grown.n_nodes, 2 * len(names) - 1)
+        self.assertEqual(grown.node_name(grown.root()), G.node_name(G.root()))
+        index = grown.index()
+        for node, name in enumerate(G.node_names()):
+            np.testing.assert_array_equal(grown.positions[index[name]], G.positions[node])
+        self.assertTrue(np.isfinite(grown.positions).all())
+        np.testing.assert_allclose(path_lengths(H, ['d', 'e']), ADDITIVE[3:, 3:])
+
+if __name__ == '__main__':
+    unittest.main()
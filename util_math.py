@@ -1,5 +1,7 @@
 # util_math.py
 
+import numpy as np
+
 def calculate_genetic_distance(markers1, markers2):
     """
     Calculates the average genetic distance between two species based on genetic markers.
@@ -38,3 +40,126 @@ def hamming_distance(s1, s2):
     if len(s1) != len(s2):
         return -1  # Undefined for unequal lengths
     return sum(c1 != c2 for c1, c2 in zip(s1, s2))
+
+
+def perspective_matrix(fovy, aspect, near, far):
+    """
+    Builds the projection matrix of gluPerspective.
+
+    Parameters:
+        fovy (float): Vertical field of view in degrees.
+        aspect (float): Viewport width / height.
+        near (float): Near clipping distance.
+        far (float): Far clipping distance.
+
+    Returns:
+        numpy.ndarray: 4x4 matrix acting on column vectors.
+    """
+    f = 1.0 / np.tan(np.radians(fovy) / 2)
+    return np.array([
+        [f / aspect, 0, 0, 0],
+        [0, f, 0, 0],
+        [0, 0, (far + near) / (near - far), 2 * far * near / (near - far)],
+        [0, 0, -1, 0],
+    ])
+
+def rotation_matrix(angle, axis):
+    """
+    Builds the matrix of glRotatef about a coordinate axis.
+
+    Parameters:
+        angle (float): Angle in degrees.
+        axis (int): 0, 1 or 2 for x, y or z.
+
+    Returns:
+        numpy.ndarray: 4x4 matrix acting on column vectors.
+    """
+    c, s = np.cos(np.radians(angle)), np.sin(np.radians(angle))
+    i, j = [(1, 2), (2, 0), (0, 1)][axis]
+    matrix = np.eye(4)
+    matrix[i, i] = matrix[j, j] = c
+    matrix[i, j] = -s
+    matrix[j, i] = s
+    return matrix
+
+def view_matrix(pan, zoom, rotation):
+    """
+    Builds the modelview matrix the viewer sets up: translate by (pan, zoom), then rotate about x, y and z.
+
+    Parameters:
+        pan (sequence): (x, y) pan offset.
+        zoom (float): Translation along z.
+        rotation (sequence): Rotation angles in degrees about x, y and z.
+
+    Returns:
+        numpy.ndarray: 4x4 matrix acting on column vectors.
+    """
+    matrix = np.eye(4)
+    matrix[:3, 3] = (pan[0], pan[1], zoom)
+    for axis in range(3):
+        matrix = matrix @ rotation_matrix(rotation[axis], axis)
+    return matrix
+
+def frustum_planes(clip_matrix):
+    """
+    Extracts the six clipping planes from a projection @ modelview matrix.
+
+    Parameters:
+        clip_matrix (numpy.ndarray): 4x4 matrix acting on column vectors.
+
+    Returns:
+        numpy.ndarray: (6, 4) planes (a, b, c, d) with unit normals; a point p is
+        inside when a*x + b*y + c*z + d >= 0 for every plane.
+    """
+    m = np.asarray(clip_matrix, dtype=np.float64)
+    planes = np.array([m[3] + m[0], m[3] - m[0], m[3] + m[1], m[3] - m[1], m[3] + m[2], m[3] - m[2]])
+    return planes / np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+
+def camera_position(modelview):
+    """
+    Returns the eye position in world coordinates for a rigid modelview matrix.
+    """
+    rotation, translation = modelview[:3, :3], modelview[:3, 3]
+    return -rotation.T @ translation
+
+def pick_matrix(x, y, width, height, viewport):
+    """
+    Builds the matrix of gluPickMatrix, restricting the view to a small window region.
+
+    Parameters:
+        x (float): Window x of the region center.
+        y (float): Window y of the region center, from the bottom edge.
+        width (float): Region width in pixels.
+        height (float): Region height in pixels.
+        viewport (sequence): (x, y, width, height) of the viewport.
+
+    Returns:
+        numpy.ndarray: 4x4 matrix to apply before the projection matrix.
+    """
+    matrix = np.eye(4)
+    matrix[0, 0] = viewport[2] / width
+    matrix[1, 1] = viewport[3] / height
+    matrix[0, 3] = (viewport[2] - 2 * (x - viewport[0])) / width
+    matrix[1, 3] = (viewport[3] - 2 * (y - viewport[1])) / height
+    return matrix
+
+def project_points(points, clip_matrix, viewport):
+    """
+    Maps world points to window coordinates like gluProject.
+
+    Parameters:
+        points (numpy.ndarray): (n, 3) world positions.
+        clip_matrix (numpy.ndarray): projection @ modelview.
+        viewport (sequence): (x, y, width, height) of the viewport.
+
+    Returns:
+        numpy.ndarray: (n, 3) window x, y (from the bottom edge) and depth in [0, 1].
+    """
+    points = np.atleast_2d(points)
+    clip = np.column_stack([points, np.ones(len(points))]) @ np.asarray(clip_matrix).T
+    ndc = clip[:, :3] / clip[:, 3:]
+    return np.column_stack([
+        viewport[0] + (ndc[:, 0] + 1) * viewport[2] / 2,
+        viewport[1] + (ndc[:, 1] + 1) * viewport[3] / 2,
+        (ndc[:, 2] + 1) / 2,
+    ])